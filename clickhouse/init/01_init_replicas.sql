@@ -50,3 +50,44 @@ CREATE TABLE shard.filter_applications (
 ) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/filter_applications', '{replica}') 
 PARTITION BY toYYYYMMDD(event_time) 
 ORDER BY (filter_type, filter_value, event_time);
+
+
+-- Изменения лайков, закладок и комментариев из ugc_crud_service (publisher.py).
+-- Повторы после перезапуска публикатора отбрасывает kafka_clickhouse_etl по change_id до вставки:
+-- materialized view считает каждую вставленную строку, слияние его уже не исправит.
+CREATE TABLE shard.ugc_changes (
+    event_time DateTime64(3, 'UTC'),
+    change_id String,
+    entity Enum8('like' = 1, 'bookmark' = 2, 'comment' = 3),
+    operation Enum8('insert' = 1, 'update' = 2, 'delete' = 3),
+    sign Int8,
+    id UUID,
+    user_id Nullable(UUID),
+    content_id Nullable(UUID),
+    rate Nullable(UInt8)
+) ENGINE = ReplicatedReplacingMergeTree('/clickhouse/tables/{shard}/ugc_changes', '{replica}')
+PARTITION BY toYYYYMM(event_time)
+ORDER BY (entity, id, change_id, sign);
+
+-- Дневные счётчики по фильмам: прирост числа записей и суммы оценок.
+-- Строка изменения несёт sign: +1 — новое состояние записи, -1 — прежнее, 0 — не учитывается
+CREATE TABLE shard.ugc_content_daily (
+    day Date,
+    entity Enum8('like' = 1, 'bookmark' = 2, 'comment' = 3),
+    content_id UUID,
+    records Int64,
+    rate_sum Int64
+) ENGINE = ReplicatedSummingMergeTree('/clickhouse/tables/{shard}/ugc_content_daily', '{replica}')
+PARTITION BY toYYYYMM(day)
+ORDER BY (entity, content_id, day);
+
+CREATE MATERIALIZED VIEW shard.ugc_content_daily_mv TO shard.ugc_content_daily AS
+SELECT
+    toDate(event_time) AS day,
+    entity,
+    assumeNotNull(content_id) AS content_id,
+    sum(sign) AS records,
+    sum(sign * toInt64(ifNull(rate, 0))) AS rate_sum
+FROM shard.ugc_changes
+WHERE content_id IS NOT NULL AND sign != 0
+GROUP BY day, entity, content_id;
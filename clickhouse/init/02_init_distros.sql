@@ -16,4 +16,12 @@ AS shard.completed_viewings;
 
 CREATE TABLE default.filter_applications
 ENGINE = Distributed('{cluster}', '', filter_applications, rand())
-AS shard.filter_applications;
\ No newline at end of file
+AS shard.filter_applications;
+
+CREATE TABLE default.ugc_changes
+ENGINE = Distributed('{cluster}', '', ugc_changes, cityHash64(id))
+AS shard.ugc_changes;
+
+CREATE TABLE default.ugc_content_daily
+ENGINE = Distributed('{cluster}', '', ugc_content_daily, rand())
+AS shard.ugc_content_daily;
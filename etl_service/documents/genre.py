@@ -2,34 +2,16 @@ from datetime import datetime
 from typing import Generator
 
 import psycopg
-from elasticsearch_dsl import (
-    Document,
-    Float,
-    InnerDoc,
-    Keyword,
-    MetaField,
-    Nested,
-    Text,
-)
+from elasticsearch_dsl import Document, Keyword, MetaField, Text
 from psycopg import ServerCursor
 from psycopg.conninfo import make_conninfo
 from psycopg.rows import class_row
 
 
-class FilmCommon(InnerDoc):
-    id = Keyword()
-    title = Text(analyzer="ru_en")
-    imdb_rating = Float()
-
-    class Meta:
-        dynamic = MetaField("strict")
-
-
 class Genre(Document):
     id = Keyword()
     name = Text(analyzer="ru_en", fields={"raw": Keyword()})
     description = Text(analyzer="ru_en")
-    films = Nested(FilmCommon)
     last_change_date = Keyword(index=False)
 
     class Index:
@@ -87,20 +69,12 @@ def get_genre_index_data(
             g.id,
             g.name,
             COALESCE(g.description, '') as description,
-            COALESCE(
-            json_agg(
-                DISTINCT jsonb_build_object(
-                    'id', fw.id,
-                    'title', fw.title,
-                    'imdb_rating', fw.rating
-                )
-            ) FILTER (WHERE fw.id IS NOT NULL),
-            '[]'
-        ) AS films, -- фильмы в формате JSON,
             MAX(v.last_change_date) AS last_change_date -- последняя дата изменения
         FROM content.genre g
         LEFT JOIN content.genre_film_work gfw ON g.id = gfw.genre_id
         LEFT JOIN content.film_work fw ON fw.id = gfw.film_work_id
+        -- фильмы в документ не входят, но их изменения переиндексируют жанр,
+        -- чтобы API сбросил закэшированные страницы фильмов жанра
         CROSS JOIN LATERAL (
             VALUES
                 (g.modified),   -- дата изменения жанра
@@ -0,0 +1,18 @@
+from elasticsearch_dsl import Document, Keyword, MetaField, Object
+
+
+class SimilarMovie(Document):
+    """
+    Предрассчитанные похожие фильмы: сервис отдаёт их одним get по id
+    фильма. Список хранится целиком и не индексируется.
+    """
+
+    id = Keyword()
+    films = Object(enabled=False)
+
+    class Index:
+        name = "similar_movies"
+        settings = {"refresh_interval": "30s"}
+
+    class Meta:
+        dynamic = MetaField("strict")
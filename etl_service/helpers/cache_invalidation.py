@@ -0,0 +1,46 @@
+import json
+
+from redis import Redis
+
+# Формат ключей тегов кэша theatre_service (db/cache.py)
+TAG_KEY_PREFIX = 'tag:'
+TAG_SEQUENCE_KEY = 'tag-seq'
+TAG_INVALIDATED_PREFIX = 'tag-invalidated:'
+TAG_INVALIDATED_TTL_SECONDS = 600
+# Отправитель сообщений о сброшенных ключах в канале реплик
+ETL_ORIGIN = 'etl'
+
+
+def invalidate_tags(redis: Redis, tags: list[str], channel: str) -> int:
+    """
+    Сбрасывает ключи кэша theatre_service, зависящие от документов `tags`
+    вида "<индекс>:<id>", так же, как RedisCacheStorage.invalidate_tags.
+    Сброс выполняется в Redis один раз, а не каждой репликой, и не теряется,
+    если ни одна реплика не подписана. Канал реплик нужен только для
+    очистки их кэшей в памяти. Возвращает число сброшенных ключей.
+    """
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return 0
+    tag_keys = [f'{TAG_KEY_PREFIX}{tag}' for tag in tags]
+    sequence = redis.incr(TAG_SEQUENCE_KEY)
+    # Отметки сбросов ставятся вместе с чтением множеств: загрузка, которая
+    # не попала в SUNION, увидит отметку и не оставит значение в кэше
+    with redis.pipeline(transaction=True) as pipe:
+        for tag in tags:
+            pipe.set(
+                f'{TAG_INVALIDATED_PREFIX}{tag}',
+                sequence,
+                ex=TAG_INVALIDATED_TTL_SECONDS,
+            )
+        pipe.sunion(tag_keys)
+        pipe.delete(*tag_keys)
+        *_, members, _ = pipe.execute()
+
+    keys = [member.decode() for member in members]
+    if keys:
+        redis.delete(*keys)
+        redis.publish(
+            channel, json.dumps({'origin': ETL_ORIGIN, 'keys': keys})
+        )
+    return len(keys)
@@ -1,9 +1,11 @@
 import time
 from datetime import datetime
-from typing import Generator, Any
+from typing import Any, Callable, Generator
 
 import pytz
 from dateutil import parser
+from redis import Redis
+from redis.exceptions import RedisError
 from elasticsearch.helpers import bulk
 from elasticsearch_dsl import connections, Document
 import sentry_sdk
@@ -11,6 +13,7 @@ from documents.movie import Movie, get_movie_index_data
 from documents.genre import Genre, get_genre_index_data
 from documents.person import Person, get_person_index_data
 from helpers.backoff_func_wrapper import backoff
+from helpers.cache_invalidation import invalidate_tags
 from logger import logger
 from settings import settings
 from state_manager.json_file_storage import JsonFileStorage
@@ -24,10 +27,66 @@ def _send_to_es(es_load_data: Generator[dict[str, Any], Any, None]):
     bulk(
         connections.get_connection(),
         es_load_data,
+        # Документы должны быть видны в поиске до того, как сервисы
+        # сбросят кэш и перечитают их
+        refresh="wait_for",
     )
 
 
-def update_index(document: Document, get_index_data: Generator, state: str):
+# Ключ состояния с id документов, кэш которых не удалось сбросить
+PENDING_INVALIDATION_STATE = 'cache_invalidation_pending'
+
+
+def _invalidate_cache(
+    redis: Redis, state_manager: StateManager, index: str, ids: list[str]
+):
+    """
+    Сбрасываем кэш сервисов, зависящий от изменённых документов индекса.
+    При недоступном Redis id сохраняются в состоянии и сбрасываются при
+    следующей загрузке: загрузка в индекс из-за Redis не останавливается.
+    """
+    pending = state_manager.get_state(PENDING_INVALIDATION_STATE) or {}
+    ids = list(dict.fromkeys([*pending.get(index, []), *ids]))
+    try:
+        invalidate_tags(
+            redis,
+            [f'{index}:{id_}' for id_ in ids],
+            settings.cache_invalidation_channel,
+        )
+    except RedisError as e:
+        logger.error(f'Invalidating {index} cache failed with {e}')
+        max_pending = settings.cache_invalidation_pending_max
+        if len(ids) > max_pending:
+            logger.error(
+                f'{len(ids) - max_pending} {index} changes dropped, '
+                f'their cache expires by TTL'
+            )
+        pending[index] = ids[-max_pending:]
+        state_manager.set_state(PENDING_INVALIDATION_STATE, pending)
+        return
+    if index in pending:
+        del pending[index]
+        state_manager.set_state(PENDING_INVALIDATION_STATE, pending)
+
+
+def _genres_of_movies(rows: list[Movie]) -> dict[str, list[str]]:
+    """
+    Страницы жанров строятся запросом к индексу movies, поэтому изменённый
+    фильм меняет и страницы своих жанров, даже если на них его ещё не было
+    """
+    genre_ids = (
+        str(genre["uuid"]) for movie in rows for genre in movie.genres or []
+    )
+    return {Genre.Index.name: list(dict.fromkeys(genre_ids))}
+
+
+def update_index(
+    document: Document,
+    get_index_data: Generator,
+    state: str,
+    redis: Redis,
+    get_related_changes: Callable[[list], dict[str, list[str]]] | None = None,
+):
     state_manager = StateManager(JsonFileStorage(logger=logger))
 
     last_sync_state = state_manager.get_state(state)
@@ -41,6 +100,8 @@ def update_index(document: Document, get_index_data: Generator, state: str):
         hosts=settings.elasticsearch_settings.get_host()
     )
     document.init()
+    # Повторяем сброс, не выполненный при прошлых загрузках
+    _invalidate_cache(redis, state_manager, document.Index.name, [])
 
     for rows in get_index_data(
         settings.database_settings.get_dsn(), last_sync_state, 100
@@ -51,6 +112,15 @@ def update_index(document: Document, get_index_data: Generator, state: str):
         )
 
         _send_to_es(es_load_data)
+        _invalidate_cache(
+            redis,
+            state_manager,
+            document.Index.name,
+            [str(d.id) for d in rows],
+        )
+        if get_related_changes:
+            for index, ids in get_related_changes(rows).items():
+                _invalidate_cache(redis, state_manager, index, ids)
 
         last_change_date = pytz.UTC.localize(
             max(item.last_change_date for item in rows)
@@ -68,17 +138,26 @@ if __name__ == "__main__":
             "get_index_data": get_person_index_data,
             "state": "person_index_last_sync_state",
         },
-        {
-            "document": Genre,
-            "get_index_data": get_genre_index_data,
-            "state": "genre_index_last_sync_state",
-        },
+        # Фильмы загружаются раньше жанров: сброс кэша страниц жанра не должен
+        # опережать переиндексацию фильмов, по которым они строятся
         {
             "document": Movie,
             "get_index_data": get_movie_index_data,
             "state": "movie_index_last_sync_state",
+            "get_related_changes": _genres_of_movies,
+        },
+        {
+            "document": Genre,
+            "get_index_data": get_genre_index_data,
+            "state": "genre_index_last_sync_state",
         },
     ]
+    redis = Redis(
+        host=settings.redis_settings.host,
+        port=settings.redis_settings.port,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+    )
     while True:
         try:
             for item in data:
@@ -86,6 +165,8 @@ if __name__ == "__main__":
                     document=item["document"],
                     get_index_data=item["get_index_data"],
                     state=item["state"],
+                    redis=redis,
+                    get_related_changes=item.get("get_related_changes"),
                 )
             time.sleep(60)
         except Exception as e:
@@ -23,10 +23,28 @@ class ElasticsearchSettings(BaseSettings):
         return f'http://{self.host}:{self.port}'
 
 
+class RedisSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix='redis_')
+    host: str = ...
+    port: int = 6379
+
+
 class Settings(BaseSettings):
     debug: bool = Field(...)
     database_settings: DatabaseSettings = DatabaseSettings()
     elasticsearch_settings: ElasticsearchSettings = ElasticsearchSettings()
+    redis_settings: RedisSettings = RedisSettings()
+    # Канал, через который реплики theatre_service очищают кэш в памяти
+    cache_invalidation_channel: str = Field(
+        'theatre:cache:invalidate', alias='CACHE_INVALIDATION_CHANNEL'
+    )
+    # Сколько id изменённых документов хранить до восстановления Redis
+    cache_invalidation_pending_max: int = Field(
+        10000, alias='CACHE_INVALIDATION_PENDING_MAX'
+    )
+    # Сколько похожих фильмов хранить на фильм и как часто пересчитывать, сек.
+    similar_films_top_k: int = Field(100, alias='SIMILAR_FILMS_TOP_K')
+    similar_films_interval: int = Field(3600, alias='SIMILAR_FILMS_INTERVAL')
     sentry_dsn_etl: str = Field(..., alias="SENTRY_DSN_ETL")
 
 
@@ -0,0 +1,182 @@
+import heapq
+import time
+from collections import Counter, defaultdict
+from typing import Any, Generator
+
+from elasticsearch.helpers import bulk, scan
+from elasticsearch_dsl import connections
+import sentry_sdk
+
+from documents.movie import Movie
+from documents.similar_movie import SimilarMovie
+from helpers.backoff_func_wrapper import backoff
+from logger import logger
+from settings import settings
+
+sentry_sdk.init(dsn=settings.sentry_dsn_etl)
+
+# Веса составляющих похожести: доля общих жанров (0..1), число общих
+# персон и собственный рейтинг кандидата (0..1)
+GENRE_WEIGHT = 1.0
+PERSON_WEIGHT = 0.5
+RATING_WEIGHT = 0.2
+# Кандидаты по жанру — только самые рейтинговые фильмы жанра, иначе
+# популярный жанр даёт квадратичное число пар
+GENRE_CANDIDATES = 200
+# То же для персон: у плодовитого актёра или режиссёра берутся только
+# самые рейтинговые фильмы
+PERSON_CANDIDATES = 50
+PERSON_ROLES = ("directors", "actors", "writers")
+
+
+def load_films() -> dict[str, dict[str, Any]]:
+    films = {}
+    for hit in scan(
+        connections.get_connection(),
+        index=Movie.Index.name,
+        _source=[
+            "title",
+            "imdb_rating",
+            "genres.uuid",
+            *(f"{role}.id" for role in PERSON_ROLES),
+        ],
+    ):
+        source = hit["_source"]
+        films[hit["_id"]] = {
+            "title": source.get("title"),
+            "imdb_rating": source.get("imdb_rating"),
+            "genres": {genre["uuid"] for genre in source.get("genres") or []},
+            "persons": {
+                person["id"]
+                for role in PERSON_ROLES
+                for person in source.get(role) or []
+            },
+        }
+    return films
+
+
+def compute_similar(
+    films: dict[str, dict[str, Any]], top_k: int
+) -> Generator[tuple[str, list[dict[str, Any]]], None, None]:
+    by_genre = defaultdict(list)
+    by_person = defaultdict(list)
+    for film_id, film in films.items():
+        for genre in film["genres"]:
+            by_genre[genre].append(film_id)
+        for person in film["persons"]:
+            by_person[person].append(film_id)
+
+    for candidates_index, limit in (
+        (by_genre, GENRE_CANDIDATES),
+        (by_person, PERSON_CANDIDATES),
+    ):
+        for film_ids in candidates_index.values():
+            film_ids.sort(
+                key=lambda film_id: films[film_id]["imdb_rating"] or 0,
+                reverse=True,
+            )
+            del film_ids[limit:]
+
+    for film_id, film in films.items():
+        shared_persons = Counter()
+        for person in film["persons"]:
+            shared_persons.update(by_person[person])
+        candidates = set(shared_persons)
+        for genre in film["genres"]:
+            candidates.update(by_genre[genre])
+        candidates.discard(film_id)
+
+        scored = []
+        for candidate_id in candidates:
+            candidate = films[candidate_id]
+            genres_union = film["genres"] | candidate["genres"]
+            genre_overlap = (
+                len(film["genres"] & candidate["genres"]) / len(genres_union)
+                if genres_union
+                else 0
+            )
+            score = (
+                GENRE_WEIGHT * genre_overlap
+                + PERSON_WEIGHT * shared_persons[candidate_id]
+                + RATING_WEIGHT * (candidate["imdb_rating"] or 0) / 10
+            )
+            scored.append((score, candidate_id))
+
+        yield film_id, [
+            {
+                "id": candidate_id,
+                "title": films[candidate_id]["title"],
+                "imdb_rating": films[candidate_id]["imdb_rating"],
+            }
+            for _, candidate_id in heapq.nlargest(top_k, scored)
+        ]
+
+
+@backoff(0.1, 2, 10, logger)
+def _send_to_es(actions: list[dict[str, Any]]):
+    bulk(connections.get_connection(), actions)
+
+
+def _delete_orphans(films: dict[str, dict[str, Any]], batch_size: int):
+    """Удаляет списки фильмов, которых больше нет в индексе movies"""
+    actions = []
+    deleted = 0
+    for hit in scan(
+        connections.get_connection(),
+        index=SimilarMovie.Index.name,
+        _source=False,
+    ):
+        if hit["_id"] in films:
+            continue
+        actions.append(
+            {
+                "_op_type": "delete",
+                "_index": SimilarMovie.Index.name,
+                "_id": hit["_id"],
+            }
+        )
+        if len(actions) >= batch_size:
+            _send_to_es(actions)
+            deleted += len(actions)
+            actions = []
+    if actions:
+        _send_to_es(actions)
+        deleted += len(actions)
+    if deleted:
+        logger.info(f"Similar films removed for {deleted} deleted films")
+
+
+def update_similar_films(batch_size: int = 500):
+    connections.create_connection(
+        hosts=settings.elasticsearch_settings.get_host()
+    )
+    SimilarMovie.init()
+
+    films = load_films()
+    actions = []
+    for film_id, similar in compute_similar(
+        films, settings.similar_films_top_k
+    ):
+        actions.append(
+            {
+                "_index": SimilarMovie.Index.name,
+                "_id": film_id,
+                "_source": {"id": film_id, "films": similar},
+            }
+        )
+        if len(actions) >= batch_size:
+            _send_to_es(actions)
+            actions = []
+    if actions:
+        _send_to_es(actions)
+    logger.info(f"Similar films updated for {len(films)} films")
+    _delete_orphans(films, batch_size)
+
+
+if __name__ == "__main__":
+    while True:
+        try:
+            update_similar_films()
+            time.sleep(settings.similar_films_interval)
+        except Exception as e:
+            logger.exception(e)
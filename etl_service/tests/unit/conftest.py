@@ -0,0 +1,14 @@
+import os
+
+# Обязательные настройки читаются при импорте settings; внешние
+# сервисы модульным тестам не нужны
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("SQL_HOST", "localhost")
+os.environ.setdefault("SQL_PORT", "5432")
+os.environ.setdefault("PG_DB", "movies")
+os.environ.setdefault("PG_USER", "postgres")
+os.environ.setdefault("PG_PASSWORD", "postgres")
+os.environ.setdefault("ES_HOST", "localhost")
+os.environ.setdefault("ES_PORT", "9200")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("SENTRY_DSN_ETL", "")
@@ -0,0 +1,40 @@
+import json
+
+from fakeredis import FakeRedis
+
+from helpers.cache_invalidation import invalidate_tags
+
+CHANNEL = 'theatre:cache:invalidate'
+
+
+def test_invalidate_tags_drops_keys_and_marks_tags():
+    redis = FakeRedis()
+    redis.set('movies:v1:1', 'film')
+    redis.set('movies:v1?page=1', 'list')
+    redis.set('persons:v1:1', 'person')
+    redis.sadd('tag:movies:1', 'movies:v1:1', 'movies:v1?page=1')
+    redis.sadd('tag:persons:1', 'persons:v1:1')
+    pubsub = redis.pubsub()
+    pubsub.subscribe(CHANNEL)
+    pubsub.get_message(timeout=1)
+
+    dropped = invalidate_tags(redis, ['movies:1', 'movies:2'], CHANNEL)
+
+    assert dropped == 2
+    assert not redis.exists('movies:v1:1', 'movies:v1?page=1', 'tag:movies:1')
+    assert redis.exists('persons:v1:1', 'tag:persons:1')
+    # Отметки сброса для загрузок, начатых до изменения
+    assert redis.get('tag-seq') == b'1'
+    assert redis.get('tag-invalidated:movies:1') == b'1'
+    assert redis.get('tag-invalidated:movies:2') == b'1'
+    message = json.loads(pubsub.get_message(timeout=1)['data'])
+    assert message['origin'] == 'etl'
+    assert sorted(message['keys']) == ['movies:v1:1', 'movies:v1?page=1']
+
+
+def test_invalidate_tags_without_cached_keys():
+    redis = FakeRedis()
+
+    assert invalidate_tags(redis, [], CHANNEL) == 0
+    assert invalidate_tags(redis, ['genres:1'], CHANNEL) == 0
+    assert redis.get('tag-invalidated:genres:1') == b'1'
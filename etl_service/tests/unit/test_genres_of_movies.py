@@ -0,0 +1,12 @@
+from documents.movie import Movie
+from main import _genres_of_movies
+
+
+def test_movie_changes_invalidate_their_genres():
+    rows = [
+        Movie(id='f1', genres=[{'uuid': 'g1', 'name': 'a'}, {'uuid': 'g2', 'name': 'b'}]),
+        Movie(id='f2', genres=[{'uuid': 'g2', 'name': 'b'}]),
+        Movie(id='f3', genres={}),
+    ]
+
+    assert _genres_of_movies(rows) == {'genres': ['g1', 'g2']}
@@ -0,0 +1,84 @@
+import similar_films
+from similar_films import compute_similar
+
+
+def film(title, genres=(), persons=(), rating=5.0):
+    return {
+        "title": title,
+        "imdb_rating": rating,
+        "genres": set(genres),
+        "persons": set(persons),
+    }
+
+
+def similar_ids(films, film_id, top_k=10):
+    return [
+        similar["id"]
+        for current_id, similar_films_list in compute_similar(films, top_k)
+        if current_id == film_id
+        for similar in similar_films_list
+    ]
+
+
+def test_genre_overlap_is_jaccard():
+    films = {
+        "a": film("A", genres={"drama", "crime"}),
+        "same": film("Same", genres={"drama", "crime"}),
+        "partial": film("Partial", genres={"drama", "comedy"}),
+        "wide": film("Wide", genres={"drama", "crime", "comedy", "horror"}),
+    }
+    # 2/2 > 2/4 > 1/3
+    assert similar_ids(films, "a") == ["same", "wide", "partial"]
+
+
+def test_shared_persons_add_to_score():
+    films = {
+        "a": film("A", genres={"drama"}, persons={"p1", "p2", "p3"}),
+        "three": film("Three", persons={"p1", "p2", "p3"}),
+        "one": film("One", persons={"p1"}),
+        "genre": film("Genre", genres={"drama"}),
+        "other": film("Other", genres={"comedy"}),
+    }
+    # 3 * 0.5 > общий жанр > 1 * 0.5; кандидаты только по общим жанрам
+    # и персонам
+    assert similar_ids(films, "a") == ["three", "genre", "one"]
+
+
+def test_rating_breaks_ties():
+    films = {
+        "a": film("A", genres={"drama"}),
+        "low": film("Low", genres={"drama"}, rating=3.0),
+        "high": film("High", genres={"drama"}, rating=9.0),
+        "unrated": film("Unrated", genres={"drama"}, rating=None),
+    }
+    assert similar_ids(films, "a") == ["high", "low", "unrated"]
+
+
+def test_top_k_and_no_self():
+    films = {
+        str(i): film(str(i), genres={"drama"}, rating=i) for i in range(10)
+    }
+    result = dict(compute_similar(films, top_k=3))
+
+    assert set(result) == set(films)
+    for film_id, similar in result.items():
+        ids = [item["id"] for item in similar]
+        assert film_id not in ids
+        assert len(ids) == 3
+    assert result["0"] == [
+        {"id": film_id, "title": film_id, "imdb_rating": int(film_id)}
+        for film_id in ("9", "8", "7")
+    ]
+
+
+def test_person_candidates_are_capped(monkeypatch):
+    monkeypatch.setattr(similar_films, "PERSON_CANDIDATES", 2)
+    films = {
+        "a": film("A", persons={"p"}, rating=1.0),
+        "b": film("B", persons={"p"}, rating=9.0),
+        "c": film("C", persons={"p"}, rating=8.0),
+        "d": film("D", persons={"p"}, rating=2.0),
+    }
+    # У персоны остаются два самых рейтинговых фильма
+    assert similar_ids(films, "d") == ["b", "c"]
+    assert similar_ids(films, "b") == ["c"]
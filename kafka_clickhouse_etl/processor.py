@@ -19,6 +19,7 @@ class EventProcessor:
             "resolution_changes": [],
             "completed_viewings": [],
             "filter_applications": [],
+            "ugc_changes": [],
         }
 
     @monitor_memory
@@ -37,6 +38,7 @@ class EventProcessor:
                 "resolution_change": self._process_resolution_change,
                 "completed_viewing": self._process_completed_viewing,
                 "filter_application": self._process_filter_application,
+                "ugc_change": self._process_ugc_change,
             }
 
             if event_type not in processor_map:
@@ -160,6 +162,68 @@ class EventProcessor:
             }
         )
 
+    def _process_ugc_change(self, event: dict[str, Any]):
+        """Обработка изменения лайка, закладки или комментария из ugc_crud_service.
+
+        Изменение раскладывается на строки со знаком для дневных счётчиков:
+        -1 с прежним состоянием записи и +1 с новым"""
+        required_fields = ["change_id", "entity", "operation", "id", "timestamp"]
+        self._validate_event(event, required_fields)
+
+        current = {
+            "user_id": event.get("user_id"),
+            "content_id": event.get("content_id"),
+            "rate": event.get("rate"),
+        }
+        previous = event.get("previous")
+        states = []
+        if event["operation"] == "insert":
+            states = [(1, current)]
+        elif previous and event["operation"] == "delete":
+            states = [(-1, previous)]
+        elif previous and event["operation"] == "update" and current["content_id"]:
+            states = [(-1, previous), (1, current)]
+        # Без прежнего состояния разницу не посчитать: изменение сохраняется, но не в счётчики
+        for sign, state in states or [(0, current)]:
+            self.buffers["ugc_changes"].append(
+                {
+                    "event_time": datetime.strptime(
+                        event["timestamp"], "%Y-%m-%dT%H:%M:%S.%fZ"
+                    ),
+                    "change_id": event["change_id"],
+                    "entity": event["entity"],
+                    "operation": event["operation"],
+                    "sign": sign,
+                    "id": event["id"],
+                    "user_id": state.get("user_id"),
+                    "content_id": state.get("content_id"),
+                    "rate": state.get("rate"),
+                }
+            )
+
+    def _new_ugc_changes(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Строки изменений, которых ещё нет в ugc_changes.
+
+        Materialized view считает каждую вставленную строку, поэтому повторно доставленные
+        изменения отбрасываются до вставки по change_id, а не слиянием ReplacingMergeTree"""
+        rows = list(
+            {(row["change_id"], row["sign"]): row for row in rows}.values()
+        )
+        stored = self.ch_client.execute(
+            "SELECT DISTINCT change_id FROM shard.ugc_changes "
+            "WHERE entity IN %(entities)s AND id IN %(ids)s "
+            "AND change_id IN %(change_ids)s",
+            {
+                "entities": list({row["entity"] for row in rows}),
+                "ids": list({row["id"] for row in rows}),
+                "change_ids": list({row["change_id"] for row in rows}),
+            },
+        )
+        stored = {change_id for (change_id,) in stored}
+        if stored:
+            logger.info(f"Skipped {len(stored)} redelivered UGC changes")
+        return [row for row in rows if row["change_id"] not in stored]
+
     def _validate_event(
         self, event: dict[str, Any], required_fields: list[str]
     ):
@@ -202,6 +266,13 @@ class EventProcessor:
                         "INSERT INTO shard.filter_applications (id, event_time, user_id, filter_type, filter_value) VALUES",
                         self.buffers[table],
                     )
+                case "ugc_changes":
+                    rows = self._new_ugc_changes(self.buffers[table])
+                    if rows:
+                        self.ch_client.execute(
+                            "INSERT INTO shard.ugc_changes (event_time, change_id, entity, operation, sign, id, user_id, content_id, rate) VALUES",
+                            rows,
+                        )
 
             logger.info(f"Inserted {len(self.buffers[table])} rows to {table}")
             self.buffers[table].clear()
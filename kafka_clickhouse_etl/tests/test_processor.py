@@ -44,3 +44,81 @@ def test_missing_field(processor, caplog):
         processor.process(message)
     except ValueError as e:
         assert "Missing required fields" in str(e)
+
+
+def test_process_ugc_change(processor, mock_ch_client):
+    message = json.dumps(
+        {
+            "event_type": "ugc_change",
+            "change_id": "8263F1A2B4000000012B0429",
+            "entity": "like",
+            "operation": "delete",
+            "id": "5b1f3a52-1d4e-4a0e-9a43-8d4d1f0c1a11",
+            "user_id": None,
+            "content_id": None,
+            "rate": None,
+            "previous": None,
+            "timestamp": "2023-01-01T12:00:00.000000Z",
+        }
+    )
+    mock_ch_client.execute.return_value = []
+
+    processor.process(message)
+
+    assert len(processor.buffers["ugc_changes"]) == 1
+    assert processor.buffers["ugc_changes"][0]["operation"] == "delete"
+    assert processor.buffers["ugc_changes"][0]["sign"] == 0
+
+    processor._flush("ugc_changes")
+    assert mock_ch_client.execute.call_count == 2
+
+
+def ugc_change(operation, change_id, rate=None, previous_rate=None):
+    event = {
+        "event_type": "ugc_change",
+        "change_id": change_id,
+        "entity": "like",
+        "operation": operation,
+        "id": "5b1f3a52-1d4e-4a0e-9a43-8d4d1f0c1a11",
+        "user_id": "0c6f1f8a-1c36-4f2a-8f4e-2b5b0f1d9e01",
+        "content_id": "9d3b7c1e-5a4f-4c7e-b1d2-3e4f5a6b7c8d",
+        "rate": rate,
+        "previous": None,
+        "timestamp": "2023-01-01T12:00:00.000000Z",
+    }
+    if previous_rate is not None:
+        event["previous"] = {
+            "user_id": event["user_id"],
+            "content_id": event["content_id"],
+            "rate": previous_rate,
+        }
+    return event
+
+
+def test_ugc_changes_are_signed_deltas(processor):
+    processor._process_ugc_change(ugc_change("insert", "01", rate=7))
+    processor._process_ugc_change(ugc_change("update", "02", rate=9, previous_rate=7))
+    processor._process_ugc_change(ugc_change("delete", "03", previous_rate=9))
+
+    rows = processor.buffers["ugc_changes"]
+    assert [(row["change_id"], row["sign"], row["rate"]) for row in rows] == [
+        ("01", 1, 7),
+        ("02", -1, 7),
+        ("02", 1, 9),
+        ("03", -1, 9),
+    ]
+    assert sum(row["sign"] for row in rows) == 0
+    assert sum(row["sign"] * row["rate"] for row in rows) == 0
+
+
+def test_redelivered_ugc_changes_are_not_inserted(processor, mock_ch_client):
+    mock_ch_client.execute.return_value = [("02",)]
+    processor._process_ugc_change(ugc_change("update", "02", rate=9, previous_rate=7))
+    processor._process_ugc_change(ugc_change("insert", "04", rate=5))
+    processor._process_ugc_change(ugc_change("insert", "04", rate=5))
+
+    processor._flush("ugc_changes")
+
+    inserted = mock_ch_client.execute.call_args.args[1]
+    assert [(row["change_id"], row["sign"]) for row in inserted] == [("04", 1)]
+    assert not processor.buffers["ugc_changes"]
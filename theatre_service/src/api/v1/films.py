@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
+from core.config import settings
 from services.film import FilmService, get_film_service
 from services.bearer import security_jwt
 from api.v1.schemes import FilmCommon, PersonCommon, Film
 from api.v1.pagination import PaginatedParams
+from models import models
 
 router = APIRouter()
 
@@ -22,10 +24,18 @@ router = APIRouter()
     summary="Поиск по фильмам",
 )
 async def films_list(
+    response: Response,
     genre_id: str = Query(default=None),
     query: str = Query(default=None),
     sort: str = Query(default="-imdb_rating"),
     pagination: PaginatedParams = Depends(),
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            "Курсорная пагинация вместо page_number: пустое значение — "
+            "первая страница, далее значение заголовка X-Next-Cursor"
+        ),
+    ),
     film_service: FilmService = Depends(get_film_service),
 ) -> list[FilmCommon]:
     parameters = {
@@ -35,7 +45,14 @@ async def films_list(
         "page_size": pagination.page_size,
         "page_number": pagination.page_number,
     }
-    films = await film_service.get_by_parameters(parameters)
+    if cursor is not None:
+        films, next_cursor = await film_service.get_page_by_cursor(
+            parameters, cursor
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    else:
+        films = await film_service.get_by_parameters(parameters)
     if not films:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="films not found"
@@ -49,21 +66,7 @@ async def films_list(
     ]
 
 
-@router.get(
-    "/{film_id}", response_model=Film, summary="Полная информация по фильму"
-)
-async def film_details(
-    user: Annotated[dict, Depends(security_jwt)],
-    film_id: str,
-    film_service: FilmService = Depends(get_film_service),
-) -> Film:
-    roles = user.get("roles") or []
-    film = await film_service.get_by_id(film_id, roles)
-    if not film:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail="film not found"
-        )
-
+def film_to_scheme(film: models.Film) -> Film:
     return Film(
         uuid=film.id,
         imdb_rating=film.imdb_rating,
@@ -84,6 +87,44 @@ async def film_details(
     )
 
 
+@router.get(
+    "/batch",
+    response_model=list[Film],
+    summary="Полная информация по списку фильмов",
+)
+async def films_batch(
+    user: Annotated[dict, Depends(security_jwt)],
+    ids: list[str] = Query(
+        min_length=1,
+        max_length=settings.batch_max_ids,
+        description="id фильмов, порядок ответа совпадает с запросом",
+    ),
+    film_service: FilmService = Depends(get_film_service),
+) -> list[Film]:
+    """Отсутствующие и недоступные пользователю фильмы пропускаются"""
+    roles = user.get("roles") or []
+    films = await film_service.get_by_ids(list(dict.fromkeys(ids)), roles)
+    return [film_to_scheme(film) for film in films]
+
+
+@router.get(
+    "/{film_id}", response_model=Film, summary="Полная информация по фильму"
+)
+async def film_details(
+    user: Annotated[dict, Depends(security_jwt)],
+    film_id: str,
+    film_service: FilmService = Depends(get_film_service),
+) -> Film:
+    roles = user.get("roles") or []
+    film = await film_service.get_by_id(film_id, roles)
+    if not film:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="film not found"
+        )
+
+    return film_to_scheme(film)
+
+
 # Похожие фильмы. Похожесть можно оценить с помощью ElasticSearch,
 # но цель модуля не в этом.
 # Сделаем просто: покажем фильмы того же жанра.
@@ -3,6 +3,7 @@ from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
+from core.config import settings
 from services.genre import GenreService, get_genre_service
 from api.v1.schemes import FilmCommon, GenreCommon, Genre
 from api.v1.pagination import PaginatedParams
@@ -43,6 +44,43 @@ async def genres_list(
     ]
 
 
+@router.get(
+    "/batch",
+    response_model=list[Genre],
+    summary="Данные по списку жанров с фильмами",
+)
+async def genres_batch(
+    ids: list[uuid.UUID] = Query(
+        min_length=1,
+        max_length=settings.batch_max_ids,
+        description="id жанров, порядок ответа совпадает с запросом",
+    ),
+    pagination: PaginatedParams = Depends(),
+    sort: str = Query("-imdb_rating", description="Сортировка по imdb_rating"),
+    genre_service: GenreService = Depends(get_genre_service),
+) -> list[Genre]:
+    """Отсутствующие жанры пропускаются, пагинация и сортировка
+    применяются к фильмам каждого жанра"""
+    parameters = {
+        "page_size": pagination.page_size,
+        "page_number": pagination.page_number,
+        "sort": sort,
+    }
+    genre_ids = list(dict.fromkeys(str(genre_id) for genre_id in ids))
+    genres = await genre_service.get_by_ids(genre_ids, parameters)
+    return [
+        Genre(
+            uuid=genre.uuid,
+            name=genre.name,
+            films=[
+                FilmCommon(uuid=f.id, imdb_rating=f.imdb_rating, title=f.title)
+                for f in genre.films
+            ],
+        )
+        for genre in genres
+    ]
+
+
 @router.get(
     "/{genre_id}",
     response_model=Genre,
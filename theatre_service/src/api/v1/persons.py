@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from fastapi import APIRouter, Depends, HTTPException, Query
 
+from core.config import settings
 from services.person import PersonService, get_person_service
 from api.v1.schemes import FilmCommon, FilmOfPerson, PersonCommon, Person
 from api.v1.pagination import PaginatedParams
@@ -13,12 +14,42 @@ router = APIRouter()
     response_model=list[PersonCommon],
     summary="Показ списка персон",
 )
+async def persons_list(
+    query: str = Query(
+        default=None, description="Поиск по названию или описанию"
+    ),
+    pagination: PaginatedParams = Depends(),
+    sort: str = Query(default="-full_name", description="Сортировка по имени"),
+    person_service: PersonService = Depends(get_person_service),
+) -> list[PersonCommon]:
+    # Параметры запроса: фильмы персон списку не нужны
+    parameters = {
+        "query": query,  # Поиск по имени
+        "page_size": pagination.page_size,
+        "page_number": pagination.page_number,
+        "sort": sort,  # Сортировка
+        "with_films": False,
+    }
+
+    # Получаем данные через сервис
+    persons = await person_service.get_by_parameters(parameters)
+    if not persons:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="persons not found"
+        )
+
+    return [
+        PersonCommon(uuid=person.id, full_name=person.full_name)
+        for person in persons
+    ]
+
+
 @router.get(
     "/search",
     response_model=list[Person],
     summary="Поиск по людям",
 )
-async def persons_list(
+async def persons_search(
     query: str = Query(
         default=None, description="Поиск по названию или описанию"
     ),
@@ -32,6 +63,7 @@ async def persons_list(
         "page_size": pagination.page_size,
         "page_number": pagination.page_number,
         "sort": sort,  # Сортировка
+        "with_films": True,
     }
 
     # Получаем данные через сервис
@@ -50,7 +82,34 @@ async def persons_list(
             ],
         )
         for person in persons
-    ]  # Возвращаем уже список объектов Person, а не PersonCommon
+    ]
+
+
+@router.get(
+    "/batch",
+    response_model=list[Person],
+    summary="Данные по списку людей",
+)
+async def persons_batch(
+    ids: list[str] = Query(
+        min_length=1,
+        max_length=settings.batch_max_ids,
+        description="id персон, порядок ответа совпадает с запросом",
+    ),
+    person_service: PersonService = Depends(get_person_service),
+) -> list[Person]:
+    """Отсутствующие персоны пропускаются"""
+    persons = await person_service.get_by_ids(list(dict.fromkeys(ids)))
+    return [
+        Person(
+            uuid=person.id,
+            full_name=person.full_name,
+            films=[
+                FilmOfPerson(uuid=f.id, roles=f.roles) for f in person.films
+            ],
+        )
+        for person in persons
+    ]
 
 
 @router.get(
@@ -1,20 +1,81 @@
-from typing import Dict, Any
+import base64
+import hashlib
+import json
+from typing import Dict, Any, Optional
 from http import HTTPStatus
+from urllib.parse import urlencode
 
 import aiohttp
 
+from core.config import settings
+
+
+# Параметры длиннее этого заменяются в ключе кэша их хэшем
+CACHE_KEY_PARAMS_MAX_LENGTH = 64
+
+# Зарегистрированные пространства имён ключей кэша
+cache_namespaces: set[str] = set()
+
+
+def register_cache_namespace(namespace: str) -> str:
+    """Регистрация пространства имён ключей кэша, повторная запрещена:
+    два сервиса не должны делить одни и те же ключи"""
+    if namespace in cache_namespaces:
+        raise ValueError(f"cache namespace {namespace!r} already registered")
+    cache_namespaces.add(namespace)
+    return namespace
+
 
 def make_cache_key(
-    key: str,
-    params: Dict[str, Any],
+    namespace: str,
+    params: Optional[Dict[str, Any]] = None,
+    item_id: Optional[Any] = None,
 ) -> str:
-    """Создание ключа для CacheStorage по первоначальному ключу
-    с добавленными к нему параметрами"""
-    params_to_key = []
-    for param in params:
-        params_to_key.append(f"{param}={params[param]}")
+    """Канонический ключ CacheStorage: глобальная версия, пространство
+    имён с его версией, id объекта и отсортированные параметры без None.
+    Длинные параметры заменяются хэшем"""
+    if namespace not in cache_namespaces:
+        raise ValueError(f"cache namespace {namespace!r} is not registered")
+
+    namespace_version = settings.cache_namespace_versions.get(namespace, 1)
+    key = f"v{settings.cache_key_version}:{namespace}:v{namespace_version}"
+    if item_id is not None:
+        key += f":{item_id}"
+
+    query = urlencode(
+        sorted(
+            (param, str(value))
+            for param, value in (params or {}).items()
+            if value is not None
+        )
+    )
+    if len(query) > CACHE_KEY_PARAMS_MAX_LENGTH:
+        return f"{key}#{hashlib.sha1(query.encode()).hexdigest()}"
+    return f"{key}?{query}" if query else key
+
+
+def encode_cursor(state: dict[str, Any]) -> str:
+    """Непрозрачный токен продолжения курсорной пагинации"""
+    data = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Разбор токена из encode_cursor, ValueError для испорченного токена"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(data)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(state, dict):
+        raise ValueError("invalid cursor")
+    return state
+
 
-    return key + "?" + "&".join(params_to_key)
+def params_fingerprint(params: Dict[str, Any]) -> str:
+    """Отпечаток параметров запроса, к которым привязан курсор"""
+    data = json.dumps(params, sort_keys=True, default=str).encode()
+    return hashlib.sha1(data).hexdigest()[:16]
 
 
 async def check_access(accesses: list[str], roles: list[str] = []) -> str:
@@ -25,6 +25,42 @@ class Settings(BaseSettings):
     redis_host: str = Field(..., alias="REDIS_HOST")
     redis_port: int = Field(6379, alias="REDIS_PORT")
 
+    # Кэш первого уровня в памяти процесса перед Redis
+    local_cache_max_size: int = Field(10000, alias="LOCAL_CACHE_MAX_SIZE")
+    local_cache_ttl: int = Field(10, alias="LOCAL_CACHE_TTL_SECONDS")
+    # Канал Redis, через который реплики и ETL сообщают об изменённых ключах
+    cache_invalidation_channel: str = Field(
+        "theatre:cache:invalidate", alias="CACHE_INVALIDATION_CHANNEL"
+    )
+    # Блокировка заполнения кэша между репликами (single-flight на весь кластер)
+    cache_fill_lock_enabled: bool = Field(
+        False, alias="CACHE_FILL_LOCK_ENABLED"
+    )
+    # Время жизни блокировки и максимальное ожидание заполнения ключа, сек.
+    cache_fill_lock_timeout: float = Field(
+        5.0, alias="CACHE_FILL_LOCK_TIMEOUT"
+    )
+    # Сколько ещё отдавать значение после мягкого истечения, пока оно
+    # обновляется в фоне, сек.
+    cache_stale_ttl: int = Field(60, alias="CACHE_STALE_TTL_SECONDS")
+    # Коэффициент раннего обновления XFetch: больше — обновление раньше
+    cache_xfetch_beta: float = Field(1.0, alias="CACHE_XFETCH_BETA")
+    # Предел ключей в множестве тега документа: сверх него множество
+    # очищается от истёкших ключей, а лишние живые ключи сбрасываются
+    cache_tag_max_members: int = Field(1000, alias="CACHE_TAG_MAX_MEMBERS")
+    # Версия всех ключей кэша: увеличение разом делает старые ключи
+    # недостижимыми, они доживают до истечения TTL
+    cache_key_version: int = Field(1, alias="CACHE_KEY_VERSION")
+    # Версии отдельных пространств имён (индексов), JSON: {"movies": 2}
+    cache_namespace_versions: dict[str, int] = Field(
+        {}, alias="CACHE_NAMESPACE_VERSIONS"
+    )
+
+    # Максимальное число id в пакетных запросах
+    batch_max_ids: int = Field(100, alias="BATCH_MAX_IDS")
+    # Длина списка похожих фильмов (совпадает с предрасчётом в etl_service)
+    similar_films_top_k: int = Field(100, alias="SIMILAR_FILMS_TOP_K")
+
     # Настройки Elasticsearch
     es_schema: str = "http://"
     es_host: str = Field(..., alias="ES_HOST")
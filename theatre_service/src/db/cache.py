@@ -1,13 +1,77 @@
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Optional, Any, Protocol
+import math
+import random
+import time
+import uuid
+from typing import (
+    Optional,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Protocol,
+    Type,
+    TypeVar,
+)
 
 import redis.exceptions
 from fastapi import Request, Depends
 from redis.asyncio import Redis
 from redis.exceptions import ConnectionError
+from pydantic import BaseModel
 import backoff
 
+from core.config import settings
+from db.local_cache import local_cache
+from db.single_flight import single_flight
+
 NO_CACHE_AFTER_PAGE_NUMBER = 10
+# Интервал опроса Redis, пока другая реплика заполняет ключ
+FILL_WAIT_INTERVAL_SECONDS = 0.05
+# Префикс множеств Redis с ключами кэша, зависящими от документа
+TAG_KEY_PREFIX = "tag:"
+# Счётчик сбросов по тегам и отметки с его значением при последнем сбросе
+# тега: загрузка, начатая до сброса, не должна оставить в кэше значение,
+# прочитанное до изменения документа
+TAG_SEQUENCE_KEY = "tag-seq"
+TAG_INVALIDATED_PREFIX = "tag-invalidated:"
+# Отметка живёт дольше любой загрузки
+TAG_INVALIDATED_TTL_SECONDS = 600
+# Префикс ключей single-flight фоновых обновлений: промах не должен
+# присоединяться к обновлению, которое не возвращает значение
+REFRESH_FLIGHT_PREFIX = "refresh:"
+# Идентификатор процесса, чтобы не обрабатывать собственные сообщения инвалидации
+INSTANCE_ID = uuid.uuid4().hex
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class CacheEntry(BaseModel, Generic[ModelT]):
+    """
+    Значение в кэше вместе с мягким сроком жизни. После soft_expire значение
+    ещё отдаётся клиентам, пока фоновая задача его обновляет; ключ в Redis
+    живёт дольше на CACHE_STALE_TTL_SECONDS.
+    """
+
+    value: ModelT
+    # Момент мягкого истечения, unix time
+    soft_expire: float
+    # Сколько заняла загрузка значения, сек.
+    delta: float = 0.0
+
+    def needs_refresh(self) -> bool:
+        """
+        Вероятностное раннее обновление (XFetch): чем ближе soft_expire и чем
+        дольше загрузка, тем вероятнее, что обновление начнётся заранее.
+        Истёкшее значение обновляется всегда.
+        """
+        jitter = self.delta * settings.cache_xfetch_beta
+        jitter *= -math.log(1.0 - random.random())
+        return time.time() + jitter >= self.soft_expire
 
 
 class CacheStorage(Protocol):
@@ -17,6 +81,32 @@ class CacheStorage(Protocol):
     async def set(self, key: str, value: Any, expire: int) -> None:
         pass
 
+    async def get_or_load(
+        self,
+        key: str,
+        model: Type[ModelT],
+        load: Callable[[], Awaitable[Optional[ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+    ) -> Optional[ModelT]:
+        pass
+
+    async def get_many_or_load(
+        self,
+        keys: dict[str, str],
+        model: Type[ModelT],
+        load: Callable[[list[str]], Awaitable[dict[str, ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+    ) -> dict[str, ModelT]:
+        pass
+
+    async def invalidate(self, *keys: str) -> None:
+        pass
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        pass
+
 
 class RedisCacheStorage(CacheStorage):
     def __init__(self, redis: Redis):
@@ -33,6 +123,404 @@ class RedisCacheStorage(CacheStorage):
         await self.redis.set(key, value, ex=expire)
         logging.info(f"Put to cache: {key}")
 
+    async def get_or_load(
+        self,
+        key: str,
+        model: Type[ModelT],
+        load: Callable[[], Awaitable[Optional[ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+    ) -> Optional[ModelT]:
+        """
+        Значение из кэша, а при промахе — из `load` с записью в кэш.
+        Одновременные промахи объединяются: одна загрузка на процесс,
+        а при включённой блокировке — одна на все реплики. Устаревающее
+        значение отдаётся сразу, а обновляется в фоне.
+        `tags` возвращает теги документов вида "<индекс>:<id>", от которых
+        зависит значение: по ним ключ сбрасывается при изменении документа.
+        """
+        entry = await self.get_entry(key, model)
+        if entry is None:
+            return await single_flight.do(
+                key,
+                lambda: self._fill_locked(
+                    key, lambda: self._load(key, model, load, expire, tags)
+                ),
+            )
+
+        if entry.needs_refresh():
+            single_flight.start(
+                f"{REFRESH_FLIGHT_PREFIX}{key}",
+                lambda: self._refresh_locked(
+                    key,
+                    lambda: self._load(
+                        key, model, load, expire, tags, check_cache=False
+                    ),
+                ),
+            )
+        return entry.value
+
+    async def get_many_or_load(
+        self,
+        keys: dict[str, str],
+        model: Type[ModelT],
+        load: Callable[[list[str]], Awaitable[dict[str, ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+    ) -> dict[str, ModelT]:
+        """
+        Пакетный вариант get_or_load. `keys` сопоставляет id объекта и ключ
+        кэша, `load` получает список id и возвращает найденные объекты по id.
+        Сначала кэш процесса, затем один MGET в Redis; промахи загружаются
+        одним вызовом `load` и записываются в Redis одним конвейером.
+        Устаревающие значения отдаются сразу и перезагружаются в фоне.
+        """
+        entry_model = CacheEntry[model]
+        entries: dict[str, CacheEntry[ModelT]] = {}
+        remote = []
+        for id_, key in keys.items():
+            entry = local_cache.get(key)
+            if isinstance(entry, entry_model):
+                entries[id_] = entry
+            else:
+                remote.append(id_)
+
+        if remote:
+            values = await self.redis.mget([keys[id_] for id_ in remote])
+            logging.info(f"Get from cache: {len(remote)} keys")
+            for id_, data in zip(remote, values):
+                if not data:
+                    continue
+                entry = entry_model.model_validate_json(data)
+                local_cache.set(keys[id_], entry)
+                entries[id_] = entry
+
+        stale = {
+            id_: keys[id_]
+            for id_, entry in entries.items()
+            if entry.needs_refresh()
+        }
+        if stale:
+            batch_key = hashlib.sha1(
+                "|".join(sorted(stale.values())).encode()
+            ).hexdigest()
+            single_flight.start(
+                f"batch:{batch_key}",
+                lambda: self._load_many(stale, load, expire, tags),
+            )
+
+        result = {id_: entry.value for id_, entry in entries.items()}
+        missing = {
+            id_: key for id_, key in keys.items() if id_ not in entries
+        }
+        if missing:
+            result.update(await self._load_many(missing, load, expire, tags))
+        return result
+
+    async def get_entry(
+        self, key: str, model: Type[ModelT]
+    ) -> Optional[CacheEntry[ModelT]]:
+        """
+        Сначала смотрим в кэш процесса, затем в Redis. Запись из Redis
+        валидируется один раз и кладётся в кэш процесса.
+        """
+        entry_model = CacheEntry[model]
+        entry = local_cache.get(key)
+        if isinstance(entry, entry_model):
+            return entry
+
+        data = await self.get(key)
+        if not data:
+            return None
+
+        entry = entry_model.model_validate_json(data)
+        local_cache.set(key, entry)
+        return entry
+
+    async def set_object(
+        self, key: str, obj: BaseModel, expire: int, delta: float = 0.0
+    ) -> None:
+        entry = CacheEntry[type(obj)](
+            value=obj, soft_expire=time.time() + expire, delta=delta
+        )
+        await self.set(
+            key, entry.model_dump_json(), expire + settings.cache_stale_ttl
+        )
+        local_cache.set(key, entry, expire)
+        await self.publish_invalidation(key)
+
+    async def invalidate(self, *keys: str) -> None:
+        if not keys:
+            return
+        local_cache.delete(*keys)
+        await self.redis.delete(*keys)
+        await self.publish_invalidation(*keys)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        """Сбрасывает все ключи, зависящие от перечисленных документов"""
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return
+        tag_keys = [f"{TAG_KEY_PREFIX}{tag}" for tag in tags]
+        sequence = await self.redis.incr(TAG_SEQUENCE_KEY)
+        # Отметки ставятся вместе с чтением множеств: запись, не попавшая
+        # в SUNION, увидит отметку и сбросит себя сама
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for tag in tags:
+                pipe.set(
+                    f"{TAG_INVALIDATED_PREFIX}{tag}",
+                    sequence,
+                    ex=TAG_INVALIDATED_TTL_SECONDS,
+                )
+            pipe.sunion(tag_keys)
+            pipe.delete(*tag_keys)
+            *_, members, _ = await pipe.execute()
+        await self.invalidate(*(member.decode() for member in members))
+
+    @staticmethod
+    def _tag(pipe, key: str, tags: Iterable[str], expire: int) -> list[str]:
+        """
+        Добавляет ключ в множества тегов и читает отметки их сбросов
+        (последний ответ конвейера, если теги есть), возвращает ключи множеств
+        """
+        tag_keys = list({f"{TAG_KEY_PREFIX}{tag}" for tag in tags})
+        # Множество тега живёт не меньше самих ключей
+        for tag_key in tag_keys:
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, expire)
+        if tag_keys:
+            pipe.mget(
+                [
+                    f"{TAG_INVALIDATED_PREFIX}{tag_key[len(TAG_KEY_PREFIX):]}"
+                    for tag_key in tag_keys
+                ]
+            )
+        return tag_keys
+
+    async def _tag_sequence(self) -> int:
+        return int(await self.redis.get(TAG_SEQUENCE_KEY) or 0)
+
+    @staticmethod
+    def _invalidated_since(sequence: int, marks: list[Optional[bytes]]) -> bool:
+        """Сбрасывался ли какой-то из тегов после чтения счётчика sequence"""
+        return any(mark and int(mark) > sequence for mark in marks)
+
+    async def _cap_tags(self, tag_keys: Iterable[str]) -> None:
+        """
+        Множество тега популярного документа продлевается каждой записью
+        и без ограничения копило бы все когда-либо записанные ключи.
+        Превысившее предел множество очищается от истёкших ключей, а если
+        живых всё ещё много, лишние сбрасываются из кэша: без тега они
+        пропустили бы инвалидацию.
+        """
+        tag_keys = list(tag_keys)
+        if not tag_keys:
+            return
+        max_members = settings.cache_tag_max_members
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.scard(tag_key)
+            sizes = await pipe.execute()
+        for tag_key, size in zip(tag_keys, sizes):
+            if size > max_members:
+                # Запас, чтобы очистка не повторялась на каждой записи
+                await self._prune_tag(tag_key, max_members * 3 // 4)
+
+    async def _prune_tag(self, tag_key: str, keep: int) -> None:
+        members = list(await self.redis.smembers(tag_key))
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.exists(member)
+            exists = await pipe.execute()
+        live = [member for member, found in zip(members, exists) if found]
+        dead = [member for member, found in zip(members, exists) if not found]
+        evicted = live[keep:]
+        if evicted:
+            await self.invalidate(*(member.decode() for member in evicted))
+        if dead or evicted:
+            await self.redis.srem(tag_key, *dead, *evicted)
+        logging.info(
+            f"Pruned cache tag {tag_key}: {len(dead)} expired, "
+            f"{len(evicted)} evicted"
+        )
+
+    async def _load(
+        self,
+        key: str,
+        model: Type[ModelT],
+        load: Callable[[], Awaitable[Optional[ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+        check_cache: bool = True,
+    ) -> Optional[ModelT]:
+        # Пока ждали очереди, ключ мог заполнить другой запрос или реплика
+        if check_cache and (entry := await self.get_entry(key, model)):
+            return entry.value
+
+        started = time.monotonic()
+        sequence = await self._tag_sequence() if tags else 0
+        obj = await load()
+        if obj is None:
+            # Отсутствующие объекты не кэшируются
+            return None
+
+        entry = CacheEntry[type(obj)](
+            value=obj,
+            soft_expire=time.time() + expire,
+            delta=time.monotonic() - started,
+        )
+        hard_expire = expire + settings.cache_stale_ttl
+        tag_keys = []
+        # Значение и его теги пишутся одной транзакцией: сброс документа
+        # не может попасть между ними и не найти ключ
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, entry.model_dump_json(), ex=hard_expire)
+            if tags:
+                tag_keys = self._tag(pipe, key, tags(obj), hard_expire)
+            results = await pipe.execute()
+        if tag_keys and self._invalidated_since(sequence, results[-1]):
+            # Документ изменился, пока шла загрузка
+            await self.invalidate(key)
+            return obj
+        logging.info(f"Put to cache: {key}")
+        local_cache.set(key, entry, expire)
+        await self.publish_invalidation(key)
+        await self._cap_tags(tag_keys)
+        return obj
+
+    async def _load_many(
+        self,
+        keys: dict[str, str],
+        load: Callable[[list[str]], Awaitable[dict[str, ModelT]]],
+        expire: int,
+        tags: Optional[Callable[[ModelT], Iterable[str]]] = None,
+    ) -> dict[str, ModelT]:
+        started = time.monotonic()
+        sequence = await self._tag_sequence() if tags else 0
+        objs = await load(list(keys))
+        if not objs:
+            return {}
+
+        delta = time.monotonic() - started
+        soft_expire = time.time() + expire
+        hard_expire = expire + settings.cache_stale_ttl
+        entries = {}
+        tag_keys = set()
+        # Ключи с тегами в порядке ответов MGET их отметок
+        tagged = []
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for id_, obj in objs.items():
+                key = keys[id_]
+                entries[key] = CacheEntry[type(obj)](
+                    value=obj, soft_expire=soft_expire, delta=delta
+                )
+                pipe.set(key, entries[key].model_dump_json(), ex=hard_expire)
+                if tags and (
+                    key_tags := self._tag(pipe, key, tags(obj), hard_expire)
+                ):
+                    tag_keys.update(key_tags)
+                    tagged.append(key)
+            results = await pipe.execute()
+        logging.info(f"Put to cache: {len(objs)} keys")
+
+        marks = [result for result in results if isinstance(result, list)]
+        changed = [
+            key
+            for key, key_marks in zip(tagged, marks)
+            if self._invalidated_since(sequence, key_marks)
+        ]
+        if changed:
+            # Документы изменились, пока шла загрузка
+            await self.invalidate(*changed)
+        for key, entry in entries.items():
+            if key not in changed:
+                local_cache.set(key, entry, expire)
+        await self._cap_tags(tag_keys)
+
+        await self.publish_invalidation(
+            *(key for key in entries if key not in changed)
+        )
+        return objs
+
+    def _lock(self, key: str):
+        return self.redis.lock(
+            f"lock:{key}",
+            timeout=settings.cache_fill_lock_timeout,
+            blocking=False,
+        )
+
+    async def _fill_locked(
+        self, key: str, load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if not settings.cache_fill_lock_enabled:
+            return await load()
+
+        lock = self._lock(key)
+        try:
+            acquired = await lock.acquire()
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Cache fill lock failed: {e}")
+            return await load()
+
+        if not acquired:
+            # Ключ заполняет другая реплика: ждём его появления, но не дольше
+            # времени жизни блокировки, после чего загружаем сами
+            await self._wait_for_key(key, settings.cache_fill_lock_timeout)
+            return await load()
+
+        try:
+            return await load()
+        finally:
+            await self._release(lock)
+
+    async def _refresh_locked(
+        self, key: str, load: Callable[[], Awaitable[Any]]
+    ) -> None:
+        if not settings.cache_fill_lock_enabled:
+            await load()
+            return
+
+        lock = self._lock(key)
+        try:
+            acquired = await lock.acquire()
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Cache fill lock failed: {e}")
+            return
+        if not acquired:
+            # Ключ уже обновляет другая реплика
+            return
+
+        try:
+            await load()
+        finally:
+            await self._release(lock)
+
+    async def _release(self, lock) -> None:
+        try:
+            await lock.release()
+        except redis.exceptions.RedisError as e:
+            # Например, блокировка истекла раньше, чем закончилась загрузка
+            logging.warning(f"Cache fill lock release failed: {e}")
+
+    async def _wait_for_key(self, key: str, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            if await self.redis.exists(key):
+                return
+            await asyncio.sleep(FILL_WAIT_INTERVAL_SECONDS)
+
+    async def publish_invalidation(self, *keys: str) -> None:
+        """Сообщаем остальным репликам, что их копии ключей устарели"""
+        message = json.dumps({"origin": INSTANCE_ID, "keys": list(keys)})
+        try:
+            await self.redis.publish(
+                settings.cache_invalidation_channel, message
+            )
+        except redis.exceptions.RedisError as e:
+            # Копии у соседей доживут до TTL кэша процесса
+            logging.warning(f"Cache invalidation publish failed: {e}")
+
 
 class CacheRules:
     def need_cache(self, page_number: Optional[int] = None) -> bool:
@@ -47,3 +535,43 @@ async def get_redis(request: Request) -> Redis:
 
 def get_cache_storage(redis: Redis = Depends(get_redis)) -> CacheStorage:
     return RedisCacheStorage(redis)
+
+
+async def listen_cache_invalidation(client: Redis) -> None:
+    """
+    Фоновая задача: удаляет из кэша процесса ключи, изменённые другими
+    репликами или сброшенные ETL (сам ETL сбрасывает их и в Redis). После
+    обрыва подписки сообщения могли потеряться, поэтому кэш процесса
+    очищается целиком.
+    """
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(settings.cache_invalidation_channel)
+            local_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    payload = json.loads(message["data"])
+                    origin = payload.get("origin")
+                    keys = [
+                        key
+                        for key in payload.get("keys", [])
+                        if isinstance(key, str)
+                    ]
+                except (ValueError, TypeError, AttributeError):
+                    # Испорченное сообщение не должно останавливать подписку
+                    logging.warning("Malformed cache invalidation message")
+                    continue
+                if origin == INSTANCE_ID:
+                    continue
+                local_cache.delete(*keys)
+        except asyncio.CancelledError:
+            raise
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Cache invalidation listener error: {e}")
+            local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
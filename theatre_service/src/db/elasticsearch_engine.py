@@ -1,13 +1,28 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from elastic_transport import ObjectApiResponse
-from elasticsearch import AsyncElasticsearch, NotFoundError
+from elasticsearch import AsyncElasticsearch, BadRequestError, NotFoundError
 from elasticsearch.exceptions import ConnectionError
 import backoff
 
 from .search_engine import SearchEngine
 from core import config
 
+# Поля, которые списочные запросы действительно отдают клиенту: остальной
+# _source (вложенные персоны, фильмы, описания) не передаётся и не
+# разбирается. Общее число совпадений списки не используют.
+FILM_LIST_PROJECTION = {
+    "_source": ["title", "imdb_rating"],
+    "track_total_hits": False,
+}
+GENRE_LIST_PROJECTION = {"_source": ["name"], "track_total_hits": False}
+PERSON_LIST_PROJECTION = {
+    "_source": ["full_name", "films.id", "films.roles"],
+    "track_total_hits": False,
+}
+# Список /persons/ показывает только имена
+PERSON_COMMON_PROJECTION = {"_source": ["full_name"], "track_total_hits": False}
+
 
 class ElasticsearchEngine(SearchEngine):
     def __init__(self, hosts: list[str]):
@@ -26,6 +41,12 @@ class ElasticsearchEngine(SearchEngine):
         except NotFoundError:
             return None
 
+    @backoff.on_exception(backoff.expo, exception=ConnectionError, max_time=60)
+    async def mget(self, index: str, ids: list[str]) -> list[dict]:
+        """Документы индекса по списку id одним запросом, только найденные"""
+        response = await self.client.mget(index=index, ids=ids)
+        return [doc for doc in response["docs"] if doc.get("found")]
+
     def film_parameters_to_body(
         self, parameters: dict[str, Any], query: dict[str, Any]
     ) -> dict:
@@ -118,6 +139,7 @@ class ElasticsearchEngine(SearchEngine):
             parameters=parameters,
             query=self.make_similar_films_query(parameters),
         )
+        body.update(FILM_LIST_PROJECTION)
         return await self.search(index=index, body=body)
 
     async def search_films_by_params(
@@ -127,8 +149,79 @@ class ElasticsearchEngine(SearchEngine):
             parameters=parameters,
             query=self.make_film_query_by_params(parameters),
         )
+        body.update(FILM_LIST_PROJECTION)
         return await self.search(index=index, body=body)
 
+    @backoff.on_exception(backoff.expo, exception=ConnectionError, max_time=60)
+    async def search_films_after(
+        self,
+        parameters: dict[str, Any],
+        index: str,
+        search_after: Optional[list[Any]],
+    ) -> ObjectApiResponse:
+        """
+        Страница фильмов после search_after: стоимость не растёт с номером
+        страницы. Порядок добивается полем id, поэтому продолжение
+        однозначно без снимка point-in-time, который пришлось бы держать
+        открытым между запросами. ValueError для некорректного search_after.
+        """
+        order = "asc" if parameters.get("sort") == "imdb_rating" else "desc"
+        body = {
+            "size": parameters["page_size"],
+            "query": self.make_film_query_by_params(parameters),
+            "sort": [
+                {"imdb_rating": {"order": order, "missing": "_last"}},
+                {"id": {"order": "asc"}},
+            ],
+            **FILM_LIST_PROJECTION,
+        }
+        if search_after:
+            body["search_after"] = search_after
+        try:
+            return await self.client.search(index=index, body=body)
+        except BadRequestError as e:
+            if search_after:
+                # Значения search_after пришли из курсора клиента
+                raise ValueError("invalid search_after") from e
+            raise
+
+    def make_genre_films_body(
+        self, genre_id: str, parameters: dict[str, Any]
+    ) -> dict:
+        """Страница фильмов жанра: фильтр по вложенному genres.uuid,
+        сортировка и пагинация выполняются в эластике"""
+        sort = []
+        if parameters.get("sort") in ("imdb_rating", "-imdb_rating"):
+            order = "asc" if parameters["sort"] == "imdb_rating" else "desc"
+            sort.append({"imdb_rating": {"order": order, "missing": "_last"}})
+        # Однозначный порядок между страницами при равном рейтинге
+        sort.append({"id": {"order": "asc"}})
+        return {
+            "from": (parameters["page_number"] - 1) * parameters["page_size"],
+            "size": parameters["page_size"],
+            "query": {
+                "nested": {
+                    "path": "genres",
+                    "query": {"term": {"genres.uuid": genre_id}},
+                }
+            },
+            "sort": sort,
+            **FILM_LIST_PROJECTION,
+        }
+
+    @backoff.on_exception(backoff.expo, exception=ConnectionError, max_time=60)
+    async def search_genre_films(
+        self, genre_ids: list[str], parameters: dict[str, Any], index: str
+    ) -> list[dict]:
+        """Страницы фильмов для нескольких жанров одним msearch,
+        ответы в порядке genre_ids"""
+        searches = []
+        for genre_id in genre_ids:
+            searches.append({"index": index})
+            searches.append(self.make_genre_films_body(genre_id, parameters))
+        response = await self.client.msearch(searches=searches)
+        return response["responses"]
+
     async def search_genres_by_params(
         self, parameters: dict[str, Any], index: str
     ):
@@ -136,6 +229,7 @@ class ElasticsearchEngine(SearchEngine):
             parameters=parameters,
             query=self.make_genres_query_by_params(parameters),
         )
+        body.update(GENRE_LIST_PROJECTION)
         return await self.search(index=index, body=body)
 
     def make_genres_query_by_params(self, parameters: dict[str, Any]):
@@ -177,6 +271,11 @@ class ElasticsearchEngine(SearchEngine):
             parameters=parameters,
             query=self.make_persons_query_by_params(parameters),
         )
+        body.update(
+            PERSON_LIST_PROJECTION
+            if parameters.get("with_films")
+            else PERSON_COMMON_PROJECTION
+        )
         return await self.search(index=index, body=body)
 
 
@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from core.config import settings
+
+
+class LocalCache:
+    """
+    Кэш первого уровня в памяти процесса: готовые pydantic-объекты без похода в Redis
+    и без повторного разбора JSON. Вытеснение LRU по числу записей, короткий TTL
+    ограничивает расхождение с Redis, если сообщение об инвалидации потерялось.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = min(self.ttl, expire) if expire else self.ttl
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+local_cache = LocalCache(
+    max_size=settings.local_cache_max_size, ttl=settings.local_cache_ttl
+)
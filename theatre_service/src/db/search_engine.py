@@ -11,6 +11,10 @@ class SearchEngine(ABC):
     async def get(self, index: str, id: str):
         pass
 
+    @abstractmethod
+    async def mget(self, index: str, ids: list[str]) -> list[dict]:
+        pass
+
     @abstractmethod
     def film_parameters_to_body(
         self, parameters: dict[str, Any], query: dict[str, Any]
@@ -49,6 +53,27 @@ class SearchEngine(ABC):
     ):
         pass
 
+    @abstractmethod
+    async def search_films_after(
+        self,
+        parameters: dict[str, Any],
+        index: str,
+        search_after: Optional[list[Any]],
+    ):
+        pass
+
+    @abstractmethod
+    def make_genre_films_body(
+        self, genre_id: str, parameters: dict[str, Any]
+    ) -> dict:
+        pass
+
+    @abstractmethod
+    async def search_genre_films(
+        self, genre_ids: list[str], parameters: dict[str, Any], index: str
+    ) -> list[dict]:
+        pass
+
     @abstractmethod
     async def search_genres_by_params(
         self, parameters: dict[str, Any], index: str
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """
+    Объединение одновременных промахов кэша в пределах процесса: пока для ключа
+    выполняется загрузка, остальные запросы ждут её результат и не идут в
+    поисковый движок сами.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def start(self, key: str, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Запускает загрузку, если для ключа она ещё не идёт, не дожидаясь её"""
+        task = self._calls.get(key)
+        if task is None:
+            # Загрузка идёт отдельной задачей, чтобы отмена первого запроса
+            # не обрывала её для остальных ожидающих
+            task = asyncio.create_task(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def do(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, load))
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._calls.pop(key, None)
+        if not task.cancelled() and task.exception():
+            # Для фоновых обновлений результат никто не ждёт
+            logging.warning(
+                f"Cache load failed for {key}: {task.exception()!r}"
+            )
+
+
+single_flight = SingleFlight()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -7,6 +8,7 @@ import sentry_sdk
 
 from api.v1 import films, genres, persons
 from core.config import settings
+from db.cache import listen_cache_invalidation
 from db.redis import init_redis
 from db import search_engine
 from db.elasticsearch_engine import init_elastic
@@ -20,7 +22,12 @@ async def lifespan(app: FastAPI):
         # Код, выполняемый при запуске приложения
         app.state.cache_engine = await init_redis()
         search_engine.engine = await init_elastic()
+        # Слушаем инвалидацию кэша процесса от других реплик
+        invalidation_listener = asyncio.create_task(
+            listen_cache_invalidation(app.state.cache_engine)
+        )
         yield
+        invalidation_listener.cancel()
     except Exception as e:
         logging.error(f"Lifespan error: {e}")
         raise
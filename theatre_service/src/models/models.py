@@ -50,8 +50,19 @@ class Film(FilmCommon):
     access: list[Access] = []
 
 
+class FilmRoles(BaseModel):
+    id: str = ""
+    roles: list[str] = []
+
+
+class PersonListItem(PersonCommon):
+    """Персона в списках: только роли в фильмах, без данных самих фильмов"""
+
+    films: list[FilmRoles] = []
+
+
 class PersonList(BaseModel):
-    persons: list[Person] = []
+    persons: list[PersonListItem] = []
 
 
 class GenreList(BaseModel):
@@ -1,17 +1,33 @@
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable
 from http import HTTPStatus
 import logging
 
 from fastapi import Depends, HTTPException
 
-from common.services_functions import make_cache_key, check_access
+from common.services_functions import (
+    make_cache_key,
+    register_cache_namespace,
+    check_access,
+    encode_cursor,
+    decode_cursor,
+    params_fingerprint,
+)
+from core.config import settings
 from db.search_engine import get_search_engine, SearchEngine
 from db.cache import get_cache_storage, CacheRules, CacheStorage
 from models.models import Film, FilmCommon, FilmList
 
-FILM_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
+# Фильм по id ETL сбрасывает по тегу, поэтому он живёт долго. Списки не
+# узнают о новых фильмах, им нужен короткий TTL
+FILM_CACHE_EXPIRE_IN_SECONDS = 60 * 60  # 1 час
+FILM_LIST_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
 FILM_ES_INDEX = "movies"
+# Индекс предрассчитанных похожих фильмов (etl_service/similar_films.py)
+SIMILAR_FILMS_ES_INDEX = "similar_movies"
+
+FILM_CACHE_NAMESPACE = register_cache_namespace(FILM_ES_INDEX)
+SIMILAR_FILMS_CACHE_NAMESPACE = register_cache_namespace(SIMILAR_FILMS_ES_INDEX)
 
 
 class FilmCacheService:
@@ -19,54 +35,96 @@ class FilmCacheService:
         self.cache = cache
         self.cache_rules = cache_rules
 
-    async def get_film_from_cache(self, film_id: str) -> Optional[Film]:
-        data = await self.cache.get(f"{FILM_ES_INDEX}?{film_id}")
-        if not data:
-            return None
-
-        film = Film.model_validate_json(data)
-        return film
-
-    async def put_film_to_cache(self, film: Film):
-        await self.cache.set(
-            key=f"{FILM_ES_INDEX}?{film.id}",
-            value=film.model_dump_json(),
+    async def get_film(
+        self, film_id: str, load: Callable[[], Awaitable[Optional[Film]]]
+    ) -> Optional[Film]:
+        """Получение фильма из кэша, при промахе — через `load`"""
+        return await self.cache.get_or_load(
+            key=make_cache_key(FILM_CACHE_NAMESPACE, item_id=film_id),
+            model=Film,
+            load=load,
             expire=FILM_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda film: [f"{FILM_ES_INDEX}:{film.id}"],
         )
 
-    async def get_film_list_from_cache(
-        self, parameters: Dict[str, Any]
-    ) -> list[Optional[FilmCommon]]:
-        """Получение списка фильмов по параметрам из кэша"""
-        if not self.cache_rules.need_cache(
-            parameters.get("page_number", None)
-        ):
-            return None
-
-        data = await self.cache.get(make_cache_key(FILM_ES_INDEX, parameters))
-        if not data:
-            return None
-
-        films = FilmList.model_validate_json(data)
-        return films.films
+    async def get_films(
+        self,
+        film_ids: list[str],
+        load: Callable[[list[str]], Awaitable[dict[str, Film]]],
+    ) -> dict[str, Film]:
+        """Получение фильмов по списку id из кэша,
+        промахи загружаются одним вызовом `load`"""
+        return await self.cache.get_many_or_load(
+            keys={
+                film_id: make_cache_key(FILM_CACHE_NAMESPACE, item_id=film_id)
+                for film_id in film_ids
+            },
+            model=Film,
+            load=load,
+            expire=FILM_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda film: [f"{FILM_ES_INDEX}:{film.id}"],
+        )
 
-    async def put_film_list_to_cache(
+    async def get_film_list(
         self,
-        film_list: list[Optional[FilmCommon]],
         parameters: Dict[str, Any],
-    ):
-        """Запись списка фильмов по параметрам в кэш"""
-
+        load: Callable[[], Awaitable[Optional[list[FilmCommon]]]],
+    ) -> Optional[list[FilmCommon]]:
+        """Получение списка фильмов по параметрам из кэша,
+        при промахе — через `load`"""
         if not self.cache_rules.need_cache(
             parameters.get("page_number", None)
         ):
-            return None
+            return await load()
+
+        async def load_list() -> Optional[FilmList]:
+            films = await load()
+            return FilmList(films=films) if films is not None else None
+
+        films = await self.cache.get_or_load(
+            key=make_cache_key(FILM_CACHE_NAMESPACE, parameters),
+            model=FilmList,
+            load=load_list,
+            expire=FILM_LIST_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda films: [
+                f"{FILM_ES_INDEX}:{film.id}" for film in films.films
+            ],
+        )
+        return films.films if films else None
 
-        await self.cache.set(
-            key=make_cache_key(FILM_ES_INDEX, parameters),
-            value=FilmList(films=film_list).model_dump_json(),
-            expire=FILM_CACHE_EXPIRE_IN_SECONDS,
+    async def get_similar_films(
+        self,
+        film_id: str,
+        load: Callable[[], Awaitable[Optional[list[FilmCommon]]]],
+    ) -> Optional[list[FilmCommon]]:
+        """Получение всего списка похожих фильмов из кэша,
+        при промахе — через `load`. Ключ свой у каждого фильма."""
+
+        async def load_list() -> Optional[FilmList]:
+            films = await load()
+            return FilmList(films=films) if films is not None else None
+
+        films = await self.cache.get_or_load(
+            key=make_cache_key(
+                SIMILAR_FILMS_CACHE_NAMESPACE, item_id=film_id
+            ),
+            model=FilmList,
+            load=load_list,
+            expire=FILM_LIST_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda films: [
+                f"{FILM_ES_INDEX}:{film_id}",
+                *(f"{FILM_ES_INDEX}:{film.id}" for film in films.films),
+            ],
         )
+        return films.films if films else None
+
+
+def film_from_hit(hit: dict[str, Any]) -> FilmCommon:
+    return FilmCommon(
+        id=hit["_id"],
+        title=hit["_source"].get("title"),
+        imdb_rating=hit["_source"].get("imdb_rating"),
+    )
 
 
 class FilmSearchEngineService:
@@ -79,75 +137,75 @@ class FilmSearchEngineService:
         if doc := await self.search_engine.get(
             index=FILM_ES_INDEX, id=film_id
         ):
-            result = {**doc["_source"]}
-            for x in ["directors", "writers", "actors"]:
-                result[x] = [
-                    {"id": person["id"], "full_name": person["name"]}
-                    for person in result[x]
-                ]
-            logging.debug(f" результат поиска фильма в эластике {result}")
-            film = Film(**result)
-            return film
+            return self._film_from_source(doc["_source"])
         return None
 
-    async def get_similar_films_from_search_engine(
-        self, film_id: str, parameters: dict[str, str]
-    ) -> list[Optional[FilmCommon]]:
-        try:
-            # Получаем информацию о фильме
-            film_response = await self.search_engine.get(
-                index=FILM_ES_INDEX, id=film_id
-            )
-            if not film_response:
-                raise HTTPException(
-                    status_code=HTTPStatus.NOT_FOUND, detail="Film not found"
-                )
-            film = Film(**film_response["_source"])
-            genres_id = [g.model_dump()["uuid"] for g in film.genres]
-            logging.debug(f"Genres id of film {film.title}: {genres_id}")
+    async def get_films_from_search_engine_by_ids(
+        self, film_ids: list[str]
+    ) -> dict[str, Film]:
+        docs = await self.search_engine.mget(index=FILM_ES_INDEX, ids=film_ids)
+        return {
+            doc["_id"]: self._film_from_source(doc["_source"]) for doc in docs
+        }
+
+    @staticmethod
+    def _film_from_source(source: dict[str, Any]) -> Film:
+        result = {**source}
+        for x in ["directors", "writers", "actors"]:
+            result[x] = [
+                {"id": person["id"], "full_name": person["name"]}
+                for person in result[x]
+            ]
+        logging.debug(f" результат поиска фильма в эластике {result}")
+        return Film(**result)
 
-            if not genres_id:
-                raise HTTPException(
-                    status_code=HTTPStatus.NOT_FOUND,
-                    detail="Film has no genres",
-                )
+    async def get_similar_films_from_search_engine(
+        self, film_id: str
+    ) -> Optional[list[FilmCommon]]:
+        """
+        Похожие фильмы, предрассчитанные офлайн, одним get по id фильма.
+        Для фильмов, до которых пересчёт ещё не дошёл, — запрос по жанрам.
+        None, если фильма нет.
+        """
+        if doc := await self.search_engine.get(
+            index=SIMILAR_FILMS_ES_INDEX, id=film_id
+        ):
+            return [FilmCommon(**film) for film in doc["_source"]["films"]]
+        return await self._get_similar_films_by_genres(film_id)
 
-            # Параметры запроса
-            page_size = int(parameters.get("page_size", 50))
-            page_number = int(parameters.get("page_number", 1))
+    async def _get_similar_films_by_genres(
+        self, film_id: str
+    ) -> Optional[list[FilmCommon]]:
+        # Получаем информацию о фильме
+        film_response = await self.search_engine.get(
+            index=FILM_ES_INDEX, id=film_id
+        )
+        if not film_response:
+            return None
+        film = Film(**film_response["_source"])
+        genres_id = [g.uuid for g in film.genres]
+        logging.debug(f"Genres id of film {film.title}: {genres_id}")
+        if not genres_id:
+            return []
 
+        try:
             response = await self.search_engine.search_similar_films(
                 parameters={
-                    "page_number": page_number,
-                    "page_size": page_size,
+                    "page_number": 1,
+                    "page_size": settings.similar_films_top_k,
                     "genres_id": genres_id,
                     "film_id": film_id,
                 },
                 index=FILM_ES_INDEX,
             )
-
-            if not response["hits"]["hits"]:
-                raise HTTPException(
-                    status_code=HTTPStatus.NOT_FOUND,
-                    detail="Similar films not found",
-                )
-
-            # Формируем список фильмов
-            films = [
-                FilmCommon(
-                    id=hit["_id"],
-                    title=hit["_source"].get("title"),
-                    imdb_rating=hit["_source"].get("imdb_rating"),
-                )
-                for hit in response["hits"]["hits"]
-            ]
-            return films
-
         except Exception as e:
             raise HTTPException(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e)
             )
 
+        # Формируем список фильмов
+        return [film_from_hit(hit) for hit in response["hits"]["hits"]]
+
     async def get_films_from_search_engine_by_params(
         self, parameters: dict[str, Any]
     ) -> list[Optional[FilmCommon]]:
@@ -164,16 +222,65 @@ class FilmSearchEngineService:
             return []
 
         # Формируем список фильмов
-        films = [
-            FilmCommon(
-                id=hit["_id"],
-                title=hit["_source"].get("title"),
-                imdb_rating=hit["_source"].get("imdb_rating"),
-            )
-            for hit in response["hits"]["hits"]
-        ]
+        films = [film_from_hit(hit) for hit in response["hits"]["hits"]]
         return films
 
+    async def get_films_page_from_search_engine(
+        self, parameters: dict[str, Any], cursor: str
+    ) -> tuple[list[FilmCommon], Optional[str]]:
+        """
+        Страница фильмов по курсору: пустой курсор — первая страница.
+        Возвращает фильмы и токен следующей страницы, если она есть.
+        """
+        # Курсор действителен только для тех же фильтров и сортировки
+        fingerprint = params_fingerprint(
+            {key: parameters.get(key) for key in ("genre_id", "query", "sort")}
+        )
+        search_after = None
+        if cursor:
+            try:
+                state = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST, detail="invalid cursor"
+                )
+            if state.get("q") != fingerprint:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST,
+                    detail="cursor does not match query parameters",
+                )
+            search_after = state.get("after")
+            # Значение сортировки по рейтингу и id
+            if not isinstance(search_after, list) or len(search_after) != 2:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST, detail="invalid cursor"
+                )
+
+        try:
+            response = await self.search_engine.search_films_after(
+                parameters=parameters,
+                index=FILM_ES_INDEX,
+                search_after=search_after,
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST, detail="invalid cursor"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e)
+            )
+
+        hits = response["hits"]["hits"]
+        films = [film_from_hit(hit) for hit in hits]
+        if len(hits) < parameters["page_size"]:
+            return films, None
+
+        next_cursor = encode_cursor(
+            {"after": hits[-1]["sort"], "q": fingerprint}
+        )
+        return films, next_cursor
+
 
 class FilmService:
     def __init__(
@@ -189,53 +296,76 @@ class FilmService:
     ) -> Optional[Film]:
         """Возвращает объект фильма.
         Он опционален, так как фильм может отсутствовать в базе"""
-        # Пытаемся получить данные из кеша, потому что оно работает быстрее
-        film = await self.cache_service.get_film_from_cache(film_id)
-        if not film:
-            # Если фильма нет в кеше, то ищем его в search_engine
-            film = (
-                await self.search_engine_service.get_film_from_search_engine(
-                    film_id
-                )
-            )
+        # Пытаемся получить данные из кеша, потому что оно работает быстрее,
+        # а при промахе ищем фильм в search_engine
+        film = await self.cache_service.get_film(
+            film_id,
+            lambda: self.search_engine_service.get_film_from_search_engine(
+                film_id
+            ),
+        )
+        # Доступ проверяется для каждого запроса: фильм в кеше общий
+        if not film or (
+            film.access and not await check_access(film.access, roles)
+        ):
+            return None
+
+        return film
+
+    async def get_by_ids(
+        self, film_ids: list[str], roles: list[str]
+    ) -> list[Film]:
+        """Возвращает найденные и доступные фильмы в порядке film_ids"""
+        films = await self.cache_service.get_films(
+            film_ids,
+            self.search_engine_service.get_films_from_search_engine_by_ids,
+        )
+        result = []
+        for film_id in film_ids:
+            film = films.get(film_id)
+            # Доступ проверяется для каждого фильма
             if not film or (
                 film.access and not await check_access(film.access, roles)
             ):
-                # Если он отсутствует в search_engine,
-                # значит, фильма вообще нет в базе
-                return None
-            # Сохраняем фильм в кеш
-            await self.cache_service.put_film_to_cache(film)
-
-        return film
+                continue
+            result.append(film)
+        return result
+
+    async def get_page_by_cursor(
+        self, parameters: dict[str, str], cursor: str
+    ) -> tuple[list[FilmCommon], Optional[str]]:
+        """Возвращает страницу фильмов и токен следующей страницы.
+        Курсорные страницы не кэшируются: каждая стоит один запрос
+        к search_engine независимо от глубины"""
+        return await self.search_engine_service.get_films_page_from_search_engine(
+            parameters, cursor
+        )
 
     async def get_similar_films_by_id(
         self, film_id: str, parameters: dict[str, str]
     ) -> Optional[list[Any]]:
-        """Возвращает список объектов фильмов похожих на фильм"""
-        films = await self.cache_service.get_film_list_from_cache(parameters)
+        """Возвращает страницу списка фильмов похожих на фильм"""
+        films = await self.cache_service.get_similar_films(
+            film_id,
+            lambda: self.search_engine_service.get_similar_films_from_search_engine(
+                film_id
+            ),
+        )
         if films is None:
-            films = await self.search_engine_service.get_similar_films_from_search_engine(
-                film_id, parameters
-            )
-            if films is None:
-                return None
-            await self.cache_service.put_film_list_to_cache(films, parameters)
-        return films
+            return None
+        from_ = (parameters["page_number"] - 1) * parameters["page_size"]
+        return films[from_ : from_ + parameters["page_size"]]
 
     async def get_by_parameters(
         self, parameters: dict[str, str]
     ) -> Optional[list[Any]]:
         """Возвращает список объектов фильма"""
-        films = await self.cache_service.get_film_list_from_cache(parameters)
-        if films is None:
-            films = await self.search_engine_service.get_films_from_search_engine_by_params(
+        return await self.cache_service.get_film_list(
+            parameters,
+            lambda: self.search_engine_service.get_films_from_search_engine_by_params(
                 parameters
-            )
-            if films is None:
-                return None
-            await self.cache_service.put_film_list_to_cache(films, parameters)
-        return films
+            ),
+        )
 
 
 @lru_cache()
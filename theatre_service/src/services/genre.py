@@ -1,16 +1,24 @@
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable
 from http import HTTPStatus
 
 from fastapi import Depends, HTTPException
 
-from common.services_functions import make_cache_key
+from common.services_functions import (
+    make_cache_key,
+    register_cache_namespace,
+)
+from services.film import FILM_ES_INDEX, film_from_hit
 from db.search_engine import get_search_engine, SearchEngine
 from db.cache import CacheRules, CacheStorage, get_cache_storage
-from models.models import Genre, GenreCommon, FilmCommon, GenreList
+from models.models import Genre, GenreCommon, GenreList
 
-GENRE_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
+# Страницу жанра ETL сбрасывает и при изменении его фильмов, список жанров
+# не узнаёт о новых жанрах
+GENRE_CACHE_EXPIRE_IN_SECONDS = 60 * 60  # 1 час
+GENRE_LIST_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
 GENRE_ES_INDEX = "genres"
+GENRE_CACHE_NAMESPACE = register_cache_namespace(GENRE_ES_INDEX)
 
 
 class GenreCacheService:
@@ -18,58 +26,75 @@ class GenreCacheService:
         self.cache = cache
         self.cache_rules = cache_rules
 
-    async def get_genre_list_from_cache(
-        self, parameters: Dict[str, Any]
-    ) -> list[Optional[Genre]]:
-        """Получение списка жанров по параметрам из кэша"""
-        if not self.cache_rules.need_cache(
-            parameters.get("page_number", None)
-        ):
-            return None
-
-        data = await self.cache.get(make_cache_key(GENRE_ES_INDEX, parameters))
-        if not data:
-            return None
-
-        genres = GenreList.model_validate_json(data)
-        return genres.genres
-
-    async def put_genre_list_to_cache(
+    async def get_genre_list(
         self,
-        genre_list: list[Optional[GenreCommon]],
         parameters: Dict[str, Any],
-    ):
-        """Запись списка жанров по параметрам в кэш"""
+        load: Callable[[], Awaitable[Optional[list[GenreCommon]]]],
+    ) -> Optional[list[GenreCommon]]:
+        """Получение списка жанров по параметрам из кэша,
+        при промахе — через `load`"""
         if not self.cache_rules.need_cache(
             parameters.get("page_number", None)
         ):
-            return None
-
-        await self.cache.set(
-            key=make_cache_key(GENRE_ES_INDEX, parameters),
-            value=GenreList(genres=genre_list).model_dump_json(),
-            expire=GENRE_CACHE_EXPIRE_IN_SECONDS,
+            return await load()
+
+        async def load_list() -> Optional[GenreList]:
+            genres = await load()
+            return GenreList(genres=genres) if genres is not None else None
+
+        genres = await self.cache.get_or_load(
+            key=make_cache_key(GENRE_CACHE_NAMESPACE, parameters),
+            model=GenreList,
+            load=load_list,
+            expire=GENRE_LIST_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda genres: [
+                f"{GENRE_ES_INDEX}:{genre.uuid}" for genre in genres.genres
+            ],
         )
+        return genres.genres if genres else None
 
-    async def get_genre_from_cache(
-        self, genre_id: str, parameters: Dict[str, Any]
+    async def get_genre(
+        self,
+        genre_id: str,
+        parameters: Dict[str, Any],
+        load: Callable[[], Awaitable[Optional[Genre]]],
     ) -> Optional[Genre]:
-        key = make_cache_key(f"{GENRE_ES_INDEX}?{genre_id}", parameters)
-        data = await self.cache.get(key)
-        if not data:
-            return None
-
-        genre = Genre.model_validate_json(data)
-        return genre
+        """Получение жанра из кэша, при промахе — через `load`"""
+        return await self.cache.get_or_load(
+            key=make_cache_key(
+                GENRE_CACHE_NAMESPACE, parameters, item_id=genre_id
+            ),
+            model=Genre,
+            load=load,
+            expire=GENRE_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda genre: [
+                f"{GENRE_ES_INDEX}:{genre.uuid}",
+                *(f"{FILM_ES_INDEX}:{film.id}" for film in genre.films),
+            ],
+        )
 
-    async def put_genre_to_cache(
-        self, genre: Genre, parameters: Dict[str, Any]
-    ):
-        key = make_cache_key(f"{GENRE_ES_INDEX}?{genre.uuid}", parameters)
-        await self.cache.set(
-            key,
-            genre.model_dump_json(),
-            GENRE_CACHE_EXPIRE_IN_SECONDS,
+    async def get_genres(
+        self,
+        genre_ids: list[str],
+        parameters: Dict[str, Any],
+        load: Callable[[list[str]], Awaitable[dict[str, Genre]]],
+    ) -> dict[str, Genre]:
+        """Получение жанров по списку id из кэша,
+        промахи загружаются одним вызовом `load`"""
+        return await self.cache.get_many_or_load(
+            keys={
+                genre_id: make_cache_key(
+                    GENRE_CACHE_NAMESPACE, parameters, item_id=genre_id
+                )
+                for genre_id in genre_ids
+            },
+            model=Genre,
+            load=load,
+            expire=GENRE_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda genre: [
+                f"{GENRE_ES_INDEX}:{genre.uuid}",
+                *(f"{FILM_ES_INDEX}:{film.id}" for film in genre.films),
+            ],
         )
 
 
@@ -105,42 +130,65 @@ class GenreSearchEngineService:
     async def get_genre_from_search_engine(
         self, genre_id: str, page_size: int, page_number: int, sort: str
     ) -> Optional[Genre]:
-        """Получаем жанр и связанные с ним фильмы из search_engine."""
+        """Получаем жанр и страницу его фильмов из search_engine."""
 
         doc = await self.search_engine.get(index=GENRE_ES_INDEX, id=genre_id)
         if not doc:
             return None
 
-        genre_data = doc["_source"]
+        genres = await self._genres_with_films(
+            [doc], page_size, page_number, sort
+        )
+        return genres[doc["_id"]]
 
-        # Пагинация и сортировка фильмов
-        films = genre_data.get("films", [])
+    async def get_genres_from_search_engine_by_ids(
+        self, genre_ids: list[str], page_size: int, page_number: int, sort: str
+    ) -> dict[str, Genre]:
+        docs = await self.search_engine.mget(
+            index=GENRE_ES_INDEX, ids=genre_ids
+        )
+        if not docs:
+            return {}
+        return await self._genres_with_films(
+            docs, page_size, page_number, sort
+        )
 
-        # Сортировка по полю imdb_rating
-        if sort == "-imdb_rating":
-            films = sorted(
-                films, key=lambda f: f.get("imdb_rating", 0), reverse=True
+    async def _genres_with_films(
+        self,
+        docs: list[dict[str, Any]],
+        page_size: int,
+        page_number: int,
+        sort: str,
+    ) -> dict[str, Genre]:
+        """Фильмы жанров запрашиваются из индекса фильмов: сортировка
+        и пагинация выполняются в эластике, а не по всему списку в Python"""
+        parameters = {
+            "page_size": page_size,
+            "page_number": page_number,
+            "sort": sort,
+        }
+        try:
+            responses = await self.search_engine.search_genre_films(
+                [doc["_id"] for doc in docs], parameters, FILM_ES_INDEX
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e)
             )
-        elif sort == "imdb_rating":
-            films = sorted(films, key=lambda f: f.get("imdb_rating", 0))
-
-        # Пагинация
-        from_ = (page_number - 1) * page_size
-        films = films[from_ : from_ + page_size]
-
-        # Возвращаем объект жанра с фильмами
-        return Genre(
-            uuid=genre_data.get("id"),
-            name=genre_data.get("name"),
-            films=[
-                FilmCommon(
-                    id=film.get("id"),
-                    title=film.get("title"),
-                    imdb_rating=film.get("imdb_rating"),
+
+        genres = {}
+        for doc, response in zip(docs, responses):
+            if "error" in response:
+                raise HTTPException(
+                    status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+                    detail=str(response["error"]),
                 )
-                for film in films
-            ],
-        )
+            genres[doc["_id"]] = Genre(
+                uuid=doc["_source"].get("id"),
+                name=doc["_source"].get("name"),
+                films=[film_from_hit(hit) for hit in response["hits"]["hits"]],
+            )
+        return genres
 
 
 class GenreService:
@@ -157,45 +205,43 @@ class GenreService:
     ) -> Optional[Genre]:
         """Возвращает жанр с фильмами, сортируя и применяя пагинацию."""
 
-        # Пытаемся получить данные жанра из кеша
-        genre = await self.cache_service.get_genre_from_cache(
-            genre_id, parameters
+        # Пытаемся получить данные жанра из кеша,
+        # а при промахе ищем его в search_engine
+        genre = await self.cache_service.get_genre(
+            genre_id,
+            parameters,
+            lambda: self.search_engine_service.get_genre_from_search_engine(
+                genre_id, **parameters
+            ),
         )
 
-        if not genre:
-            # Если жанра нет в кеше, ищем его в search_engine
-            genre = (
-                await self.search_engine_service.get_genre_from_search_engine(
-                    genre_id, **parameters
-                )
-            )
-
-            if not genre:
-                # Если жанр не найден в search_engine, возвращаем None
-                return None
-
-            # Если жанр найден, сохраняем его в кеш
-            await self.cache_service.put_genre_to_cache(genre, parameters)
-
         # Возвращаем жанр с фильмами
         return genre
 
+    async def get_by_ids(
+        self, genre_ids: list[str], parameters: dict[str, str]
+    ) -> list[Genre]:
+        """Возвращает найденные жанры в порядке genre_ids"""
+        genres = await self.cache_service.get_genres(
+            genre_ids,
+            parameters,
+            lambda ids: self.search_engine_service.get_genres_from_search_engine_by_ids(
+                ids, **parameters
+            ),
+        )
+        return [
+            genres[genre_id] for genre_id in genre_ids if genre_id in genres
+        ]
+
     async def get_by_parameters(
         self, parameters: dict[str, str]
     ) -> list[GenreCommon]:
-        genres = await self.cache_service.get_genre_list_from_cache(parameters)
-        if genres is None:
-            genres = (
-                await self.search_engine_service.get_genres_from_search_engine(
-                    parameters
-                )
-            )
-            if genres is None:
-                return None
-            await self.cache_service.put_genre_list_to_cache(
-                genres, parameters
-            )
-        return genres
+        return await self.cache_service.get_genre_list(
+            parameters,
+            lambda: self.search_engine_service.get_genres_from_search_engine(
+                parameters
+            ),
+        )
 
 
 @lru_cache()
@@ -1,20 +1,28 @@
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable
 from http import HTTPStatus
 
 from fastapi import Depends, HTTPException
 
-from common.services_functions import make_cache_key
+from common.services_functions import (
+    make_cache_key,
+    register_cache_namespace,
+)
+from services.film import FILM_ES_INDEX
 from db.cache import CacheRules, CacheStorage, get_cache_storage
 from db.search_engine import get_search_engine, SearchEngine
 from models.models import (
     Person,
-    FilmOfPerson,
+    FilmRoles,
     PersonList,
+    PersonListItem,
 )
 
-PERSON_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
+# Персона по id ETL сбрасывает по тегам, списки — только по найденным персонам
+PERSON_CACHE_EXPIRE_IN_SECONDS = 60 * 60  # 1 час
+PERSON_LIST_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 минут
 PERSON_ES_INDEX = "persons"
+PERSON_CACHE_NAMESPACE = register_cache_namespace(PERSON_ES_INDEX)
 
 
 class PersonCacheService:
@@ -22,54 +30,69 @@ class PersonCacheService:
         self.cache = cache
         self.cache_rules = cache_rules
 
-    async def get_person_list_from_cache(
-        self, parameters: Dict[str, Any]
-    ) -> list[Optional[Person]]:
-        """Получение списка персон по параметрам из кэша"""
-        if not self.cache_rules.need_cache(
-            parameters.get("page_number", None)
-        ):
-            return None
-
-        data = await self.cache.get(
-            make_cache_key(PERSON_ES_INDEX, parameters)
-        )
-        if not data:
-            return None
-
-        persons = PersonList.model_validate_json(data)
-        return persons.persons
-
-    async def put_person_list_to_cache(
+    async def get_person_list(
         self,
-        person_list: list[Optional[Person]],
         parameters: Dict[str, Any],
-    ):
-        """Запись списка персон по параметрам в кэш"""
+        load: Callable[[], Awaitable[Optional[list[PersonListItem]]]],
+    ) -> Optional[list[PersonListItem]]:
+        """Получение списка персон по параметрам из кэша,
+        при промахе — через `load`"""
         if not self.cache_rules.need_cache(
             parameters.get("page_number", None)
         ):
-            return None
+            return await load()
+
+        async def load_list() -> Optional[PersonList]:
+            persons = await load()
+            return PersonList(persons=persons) if persons is not None else None
+
+        persons = await self.cache.get_or_load(
+            key=make_cache_key(PERSON_CACHE_NAMESPACE, parameters),
+            model=PersonList,
+            load=load_list,
+            expire=PERSON_LIST_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda persons: [
+                f"{PERSON_ES_INDEX}:{person.id}" for person in persons.persons
+            ],
+        )
+        return persons.persons if persons else None
 
-        await self.cache.set(
-            key=make_cache_key(PERSON_ES_INDEX, parameters),
-            value=PersonList(persons=person_list).model_dump_json(),
+    async def get_person(
+        self, person_id: str, load: Callable[[], Awaitable[Optional[Person]]]
+    ) -> Optional[Person]:
+        """Получение персоны из кэша, при промахе — через `load`"""
+        return await self.cache.get_or_load(
+            key=make_cache_key(PERSON_CACHE_NAMESPACE, item_id=person_id),
+            model=Person,
+            load=load,
             expire=PERSON_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda person: [
+                f"{PERSON_ES_INDEX}:{person.id}",
+                *(f"{FILM_ES_INDEX}:{film.id}" for film in person.films),
+            ],
         )
 
-    async def get_person_from_cache(self, person_id: str) -> Optional[Person]:
-        data = await self.cache.get(f"{PERSON_ES_INDEX}?{person_id}")
-        if not data:
-            return None
-
-        person = Person.model_validate_json(data)
-        return person
-
-    async def put_person_to_cache(self, person: Person):
-        await self.cache.set(
-            key=f"{PERSON_ES_INDEX}?{person.id}",
-            value=person.model_dump_json(),
+    async def get_persons(
+        self,
+        person_ids: list[str],
+        load: Callable[[list[str]], Awaitable[dict[str, Person]]],
+    ) -> dict[str, Person]:
+        """Получение персон по списку id из кэша,
+        промахи загружаются одним вызовом `load`"""
+        return await self.cache.get_many_or_load(
+            keys={
+                person_id: make_cache_key(
+                    PERSON_CACHE_NAMESPACE, item_id=person_id
+                )
+                for person_id in person_ids
+            },
+            model=Person,
+            load=load,
             expire=PERSON_CACHE_EXPIRE_IN_SECONDS,
+            tags=lambda person: [
+                f"{PERSON_ES_INDEX}:{person.id}",
+                *(f"{FILM_ES_INDEX}:{film.id}" for film in person.films),
+            ],
         )
 
 
@@ -79,7 +102,7 @@ class PersonSearchEngineService:
 
     async def get_persons_from_search_engine(
         self, parameters: dict
-    ) -> list[Person]:
+    ) -> list[PersonListItem]:
         """Поиск по параметрам (например, имя, пагинация)."""
         try:
             response = await self.search_engine.search_persons_by_params(
@@ -95,13 +118,11 @@ class PersonSearchEngineService:
 
         # Формируем список персон с фильмами
         persons = [
-            Person(
+            PersonListItem(
                 id=hit["_id"],
                 full_name=hit["_source"].get("full_name"),
                 films=[
-                    FilmOfPerson(
-                        id=f["id"], roles=f["roles"]
-                    )  # Преобразуем в FilmOfPerson
+                    FilmRoles(id=f["id"], roles=f["roles"])
                     for f in hit["_source"].get("films", [])
                 ],
             )
@@ -117,6 +138,14 @@ class PersonSearchEngineService:
             return None
         return Person(**doc["_source"])
 
+    async def get_persons_from_search_engine_by_ids(
+        self, person_ids: list[str]
+    ) -> dict[str, Person]:
+        docs = await self.search_engine.mget(
+            index=PERSON_ES_INDEX, ids=person_ids
+        )
+        return {doc["_id"]: Person(**doc["_source"]) for doc in docs}
+
 
 class PersonService:
     def __init__(
@@ -130,41 +159,37 @@ class PersonService:
     async def get_by_id(self, person_id: str) -> Optional[Person]:
         """Возвращает объект персоны.
         Он опционален, так как персона может отсутствовать в базе"""
-        # Пытаемся получить данные из кеша, потому что оно работает быстрее
-        person = await self.cache_service.get_person_from_cache(person_id)
-        if not person:
-            # Если персоны нет в кеше, то ищем его в search_engine
-            person = (
-                await self.search_engine_service.get_person_from_search_engine(
-                    person_id
-                )
-            )
-            if not person:
-                # Если он отсутствует в search_engine,
-                # значит, персоны вообще нет в базе
-                return None
-            # Сохраняем персону в кеш
-            await self.cache_service.put_person_to_cache(person)
+        # Пытаемся получить данные из кеша, потому что оно работает быстрее,
+        # а при промахе ищем персону в search_engine
+        return await self.cache_service.get_person(
+            person_id,
+            lambda: self.search_engine_service.get_person_from_search_engine(
+                person_id
+            ),
+        )
 
-        return person
+    async def get_by_ids(self, person_ids: list[str]) -> list[Person]:
+        """Возвращает найденные персоны в порядке person_ids"""
+        persons = await self.cache_service.get_persons(
+            person_ids,
+            self.search_engine_service.get_persons_from_search_engine_by_ids,
+        )
+        return [
+            persons[person_id]
+            for person_id in person_ids
+            if person_id in persons
+        ]
 
     async def get_by_parameters(
         self, parameters: dict[str, str]
-    ) -> list[Optional[Person]]:
+    ) -> list[PersonListItem]:
         """Возвращает список объектов персон"""
-        persons = await self.cache_service.get_person_list_from_cache(
-            parameters
-        )
-        if persons is None:
-            persons = await self.search_engine_service.get_persons_from_search_engine(
+        return await self.cache_service.get_person_list(
+            parameters,
+            lambda: self.search_engine_service.get_persons_from_search_engine(
                 parameters
-            )
-            if persons is None:
-                return None
-            await self.cache_service.put_person_list_to_cache(
-                persons, parameters
-            )
-        return persons
+            ),
+        )
 
 
 @lru_cache()
@@ -5,10 +5,12 @@ import pytest
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 import pytest_asyncio
+from jose import jwt
 from redis.asyncio import Redis
 
 from tests.functional.settings import (
     TestSettings,
+    auth_settings,
     es_settings,
     redis_settings,
     service_settings,
@@ -88,15 +90,35 @@ def es_delete_data(es_client):
 
 @pytest_asyncio.fixture(name="make_get_request")
 def make_get_request():
-    async def inner(path: str, parameters: dict[str, Any] = {}):
+    async def inner(
+        path: str,
+        parameters: dict[str, Any] = {},
+        headers: dict[str, str] = {},
+    ):
         session = aiohttp.ClientSession()
         url = service_settings.get_host() + path
-        async with session.get(url, params=parameters, timeout=10) as response:
+        async with session.get(
+            url, params=parameters, headers=headers, timeout=10
+        ) as response:
             body = await response.json()
             status = response.status
+            headers = dict(response.headers)
 
         await session.close()
-        return {"body": body, "status": status}
+        return {"body": body, "status": status, "headers": headers}
+
+    return inner
+
+
+@pytest.fixture(name="auth_headers")
+def auth_headers():
+    def inner(roles: list[str] = []) -> dict[str, str]:
+        token = jwt.encode(
+            {"roles": [{"name": role} for role in roles]},
+            auth_settings.secret_key,
+            algorithm=auth_settings.algorithm,
+        )
+        return {"Authorization": f"Bearer {token}"}
 
     return inner
 
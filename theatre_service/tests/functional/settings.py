@@ -6,6 +6,7 @@ from tests.functional.testdata.es_mapping import (
     PERSONS_MAPPING,
 )
 from tests.functional.utils.helpers import (
+    AuthSettings,
     RedisSettings,
     ElasticsearchSettings,
     ServiceSettings,
@@ -15,6 +16,7 @@ from tests.functional.utils.helpers import (
 es_settings = ElasticsearchSettings()
 redis_settings = RedisSettings()
 service_settings = ServiceSettings()
+auth_settings = AuthSettings()
 
 
 class TestSettings(BaseSettings):
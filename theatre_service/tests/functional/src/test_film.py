@@ -111,3 +111,44 @@ async def test_cache_all_film(
     if expected_answer["status"] == HTTPStatus.NOT_FOUND:
         return
     assert len(response["body"]) == expected_answer["length"]
+
+
+# пакетный запрос: порядок запроса, отсутствующие и недоступные пропускаются
+@pytest.mark.asyncio
+async def test_films_batch(
+    make_get_request,
+    es_bulk_query,
+    es_write_data,
+    redis_clear,
+    auth_headers,
+):
+    movies = [generate_one_movie_data() for _ in range(3)]
+    restricted = generate_one_movie_data()
+    restricted["access"] = [{"privilege": "premium"}]
+    await es_write_data(
+        es_bulk_query(
+            es_data=[*movies, restricted], es_index=test_film_settings.es_index
+        ),
+        test_film_settings,
+    )
+    missing_id = "aaefd58e-4f58-43b6-89ed-e639580bbf78"
+    ids = [
+        movies[2]["id"],
+        missing_id,
+        restricted["id"],
+        movies[0]["id"],
+        movies[1]["id"],
+    ]
+
+    response = await make_get_request(
+        "/api/v1/films/batch",
+        [("ids", id_) for id_ in ids],
+        headers=auth_headers(roles=["subscriber"]),
+    )
+
+    assert response["status"] == HTTPStatus.OK
+    assert [film["uuid"] for film in response["body"]] == [
+        movies[2]["id"],
+        movies[0]["id"],
+        movies[1]["id"],
+    ]
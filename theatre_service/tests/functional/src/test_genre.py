@@ -2,11 +2,12 @@ from http import HTTPStatus
 
 import pytest
 
-from tests.functional.settings import test_genre_settings
+from tests.functional.settings import test_film_settings, test_genre_settings
 from tests.functional.testdata.genre_data import (
     generate_genres_data,
     generate_one_genre_data,
 )
+from tests.functional.testdata.movie_data import generate_one_movie_data
 
 
 # вывести все жанры
@@ -336,3 +337,49 @@ class TestOneGenreParametrized:
         response = await make_get_request(f"/api/v1/genres/{genre_id}")
 
         assert response["status"] == expected_answer["status"]
+
+
+# фильмы жанра сортируются и разбиваются на страницы в индексе фильмов
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "param_data, expected_ratings",
+    [
+        ({"page_size": 2}, [9.0, 8.0]),
+        ({"page_size": 2, "page_number": 2}, [7.0, 6.0]),
+        ({"page_size": 2, "sort": "imdb_rating"}, [1.0, 2.0]),
+        ({"page_size": 5, "page_number": 3}, []),
+    ],
+)
+async def test_genre_films_pages(
+    make_get_request,
+    es_write_data,
+    redis_clear,
+    es_bulk_query,
+    param_data,
+    expected_ratings,
+):
+    genre_id = "3e5351d6-4e4a-486b-8529-977672177a07"
+    genre = generate_one_genre_data(genre_id=genre_id)
+    movies = [
+        generate_one_movie_data(imdb_rating=float(rating))
+        for rating in range(1, 10)
+    ]
+    for movie in movies:
+        movie["genres"] = [{"uuid": genre_id, "name": genre["name"]}]
+    # фильм другого жанра в выдачу не попадает
+    movies.append(generate_one_movie_data(imdb_rating=10.0))
+
+    await es_write_data(
+        es_bulk_query(es_data=[genre], es_index=test_genre_settings.es_index),
+        test_genre_settings,
+    )
+    await es_write_data(
+        es_bulk_query(es_data=movies, es_index=test_film_settings.es_index),
+        test_film_settings,
+    )
+    response = await make_get_request(f"/api/v1/genres/{genre_id}", param_data)
+
+    assert response["status"] == HTTPStatus.OK
+    assert [
+        film["imdb_rating"] for film in response["body"]["films"]
+    ] == expected_ratings
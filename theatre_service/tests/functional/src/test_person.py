@@ -41,6 +41,8 @@ async def test_many_persons(
     if expected_answer["status"] == HTTPStatus.NOT_FOUND:
         return
     assert len(response["body"]) == expected_answer["length"]
+    # Список отдаёт только имена, фильмы персон — в /persons/search
+    assert all("films" not in person for person in response["body"])
 
 
 # поиск конкретного человека
@@ -78,6 +80,30 @@ async def test_one_person(
     assert response["status"] == expected_answer["status"]
 
 
+# пакетное получение людей: порядок запроса, отсутствующие пропускаются
+@pytest.mark.asyncio
+async def test_persons_batch(
+    make_get_request,
+    es_write_data,
+    es_bulk_query,
+):
+    es_data = generate_persons_data(persons_len=3)
+    bulk_query = es_bulk_query(
+        es_data=es_data, es_index=test_person_settings.es_index
+    )
+    ids = [row["id"] for row in reversed(es_data)]
+    missing_id = "aaefd58e-4f58-43b6-89ed-e639580bbf78"
+
+    await es_write_data(bulk_query, test_person_settings)
+    parameters = [("ids", person_id) for person_id in [*ids, missing_id]]
+    # Второй запрос обслуживается из кеша
+    for _ in range(2):
+        response = await make_get_request("/api/v1/persons/batch", parameters)
+
+        assert response["status"] == HTTPStatus.OK
+        assert [person["uuid"] for person in response["body"]] == ids
+
+
 # поиск фильмов с участием человека
 @pytest.mark.parametrize(
     "person_id, films_len, expected_answer",
@@ -52,6 +52,39 @@ async def test_search_many_movies(
     assert len(response["body"]) == expected_answer["length"]
 
 
+# курсорная пагинация: все фильмы ровно один раз, без пропусков
+@pytest.mark.asyncio
+async def test_search_movies_cursor(
+    make_get_request,
+    es_write_data,
+    redis_clear,
+    es_bulk_query,
+):
+    es_data = generate_movies_data(movies_len=45)
+    bulk_query = es_bulk_query(
+        es_data=es_data, es_index=test_film_settings.es_index
+    )
+
+    await es_write_data(bulk_query, test_film_settings)
+    seen, cursor, pages = [], "", 0
+    while cursor is not None:
+        response = await make_get_request(
+            "/api/v1/films/search", {"page_size": 20, "cursor": cursor}
+        )
+        assert response["status"] == HTTPStatus.OK
+        seen += [film["uuid"] for film in response["body"]]
+        cursor = response["headers"].get("X-Next-Cursor")
+        pages += 1
+
+    assert pages == 3
+    assert sorted(seen) == sorted(row["id"] for row in es_data)
+
+    response = await make_get_request(
+        "/api/v1/films/search", {"cursor": "broken"}
+    )
+    assert response["status"] == HTTPStatus.BAD_REQUEST
+
+
 # Тест на поиск конкретного фильма
 @pytest.mark.parametrize(
     "param_data, expected_answer",
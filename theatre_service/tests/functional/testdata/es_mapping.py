@@ -129,15 +129,6 @@ GENRES_MAPPING = {
         "dynamic": "strict",
         "properties": {
             "description": {"type": "text", "analyzer": "ru_en"},
-            "films": {
-                "type": "nested",
-                "dynamic": "strict",
-                "properties": {
-                    "id": {"type": "keyword"},
-                    "imdb_rating": {"type": "float"},
-                    "title": {"type": "text", "analyzer": "ru_en"},
-                },
-            },
             "id": {"type": "keyword"},
             "last_change_date": {"type": "keyword", "index": False},
             "name": {
@@ -21,3 +21,8 @@ class ElasticsearchSettings(CommonSettings):
 
 class ServiceSettings(CommonSettings):
     model_config = SettingsConfigDict(env_prefix="THEATRE_SERVICE_")
+
+
+class AuthSettings(BaseSettings):
+    secret_key: str = Field(..., alias="AUTH_SECRET_KEY")
+    algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
@@ -0,0 +1,8 @@
+import os
+
+# Обязательные настройки читаются при импорте core.config; внешние
+# сервисы модульным тестам не нужны
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("ES_HOST", "localhost")
+os.environ.setdefault("AUTH_SECRET_KEY", "secret")
+os.environ.setdefault("SENTRY_DSN_THEATRE", "")
@@ -0,0 +1,192 @@
+"""модульные тесты кэша с мягким истечением"""
+
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from pydantic import BaseModel
+
+from db import cache as cache_module
+from db.cache import CacheEntry, RedisCacheStorage
+from db.local_cache import local_cache
+
+
+class Item(BaseModel):
+    name: str
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    local_cache.clear()
+    yield
+    local_cache.clear()
+
+
+@pytest.mark.parametrize(
+    "soft_expire_in, expected",
+    [(-0.001, True), (0.0, True), (1.0, False)],
+    ids=["expired", "boundary", "fresh"],
+)
+def test_needs_refresh_without_jitter(monkeypatch, soft_expire_in, expected):
+    now = 1000.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    # random() == 0 даёт нулевой разброс XFetch
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.0)
+    entry = CacheEntry[Item](
+        value=Item(name="a"), soft_expire=now + soft_expire_in, delta=10.0
+    )
+    assert entry.needs_refresh() is expected
+
+
+def test_needs_refresh_early_for_slow_loads(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    # -ln(1 - 0.9) ≈ 2.3: разброс delta * beta * 2.3
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.9)
+    monkeypatch.setattr(cache_module.settings, "cache_xfetch_beta", 1.0)
+
+    def entry(delta: float) -> CacheEntry[Item]:
+        return CacheEntry[Item](
+            value=Item(name="a"), soft_expire=now + 2.0, delta=delta
+        )
+
+    assert entry(delta=1.0).needs_refresh() is True
+    assert entry(delta=0.5).needs_refresh() is False
+
+
+@pytest.mark.asyncio
+async def test_local_cache_serves_validated_entry():
+    storage = RedisCacheStorage(FakeAsyncRedis())
+    await storage.set_object("key", Item(name="a"), expire=60)
+    await storage.redis.flushall()
+
+    entry = await storage.get_entry("key", Item)
+
+    assert isinstance(entry, CacheEntry[Item])
+    assert entry.value == Item(name="a")
+
+
+@pytest.mark.asyncio
+async def test_miss_during_refresh_gets_loaded_value():
+    storage = RedisCacheStorage(FakeAsyncRedis())
+    stale = CacheEntry[Item](value=Item(name="old"), soft_expire=time.time() - 1)
+    await storage.set("key", stale.model_dump_json(), 60)
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return Item(name="new")
+
+    # Устаревшее значение отдаётся сразу, обновление идёт в фоне
+    first = await storage.get_or_load("key", Item, load, expire=60)
+    assert first == Item(name="old")
+
+    # Пока идёт обновление, ключ сбрасывают (ETL или истечение в Redis)
+    await storage.invalidate("key")
+    miss = asyncio.create_task(storage.get_or_load("key", Item, load, expire=60))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await miss == Item(name="new")
+
+
+@pytest.mark.asyncio
+async def test_tag_set_is_capped(monkeypatch):
+    monkeypatch.setattr(cache_module.settings, "cache_tag_max_members", 4)
+    storage = RedisCacheStorage(FakeAsyncRedis())
+
+    async def load():
+        return Item(name="hot")
+
+    for number in range(3):
+        await storage.get_or_load(
+            f"list:{number}", Item, load, 60, tags=lambda _: ["movies:1"]
+        )
+    # Истёкшие ключи очищаются первыми
+    await storage.redis.delete("list:0", "list:1")
+    for number in range(3, 6):
+        await storage.get_or_load(
+            f"list:{number}", Item, load, 60, tags=lambda _: ["movies:1"]
+        )
+
+    members = await storage.redis.smembers("tag:movies:1")
+    assert len(members) <= 4
+    assert b"list:0" not in members and b"list:1" not in members
+    # Живой ключ, не оставшийся в теге, сброшен из кэша
+    for number in range(2, 6):
+        key = f"list:{number}".encode()
+        assert (key in members) == bool(await storage.redis.exists(key))
+
+
+@pytest.mark.asyncio
+async def test_listener_survives_malformed_messages():
+    redis = FakeAsyncRedis()
+    listener = asyncio.create_task(
+        cache_module.listen_cache_invalidation(redis)
+    )
+    await asyncio.sleep(0.1)
+    entry = CacheEntry[Item](value=Item(name="a"), soft_expire=0)
+    local_cache.set("movies?1", entry)
+
+    channel = cache_module.settings.cache_invalidation_channel
+    for message in ("not json", "[]", '{"keys": 1}'):
+        await redis.publish(channel, message)
+    # Ключи в Redis ETL сбрасывает сам, репликам остаётся кэш процесса
+    await redis.publish(channel, '{"origin": "etl", "keys": ["movies?1"]}')
+    for _ in range(50):
+        if local_cache.get("movies?1") is None:
+            break
+        await asyncio.sleep(0.02)
+
+    assert not listener.done()
+    assert local_cache.get("movies?1") is None
+    listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_change_during_load_is_not_cached():
+    storage = RedisCacheStorage(FakeAsyncRedis())
+    loads = []
+
+    async def load():
+        loads.append(1)
+        if len(loads) == 1:
+            # ETL меняет документ, пока значение читается из поиска
+            await storage.invalidate_tags("movies:1")
+        return Item(name=f"load {len(loads)}")
+
+    first = await storage.get_or_load(
+        "movies:v1:1", Item, load, 60, tags=lambda _: ["movies:1"]
+    )
+    assert first == Item(name="load 1")
+    assert not await storage.redis.exists("movies:v1:1")
+    assert local_cache.get("movies:v1:1") is None
+
+    # Следующая загрузка кэшируется и сбрасывается по тегу
+    second = await storage.get_or_load(
+        "movies:v1:1", Item, load, 60, tags=lambda _: ["movies:1"]
+    )
+    assert second == Item(name="load 2")
+    assert await storage.redis.exists("movies:v1:1")
+    await storage.invalidate_tags("movies:1")
+    assert not await storage.redis.exists("movies:v1:1")
+
+
+@pytest.mark.asyncio
+async def test_batch_change_during_load_drops_only_changed_keys():
+    storage = RedisCacheStorage(FakeAsyncRedis())
+    keys = {"1": "movies:v1:1", "2": "movies:v1:2"}
+
+    async def load(ids):
+        await storage.invalidate_tags("movies:2")
+        return {id_: Item(name=id_) for id_ in ids}
+
+    result = await storage.get_many_or_load(
+        keys, Item, load, 60, tags=lambda item: [f"movies:{item.name}"]
+    )
+
+    assert result == {"1": Item(name="1"), "2": Item(name="2")}
+    assert await storage.redis.exists("movies:v1:1")
+    assert not await storage.redis.exists("movies:v1:2")
+    assert await storage.redis.smembers("tag:movies:1") == {b"movies:v1:1"}
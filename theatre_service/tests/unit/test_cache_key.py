@@ -0,0 +1,77 @@
+"""модульные тесты канонических ключей кэша"""
+
+import hashlib
+
+import pytest
+
+from common import services_functions
+from common.services_functions import (
+    CACHE_KEY_PARAMS_MAX_LENGTH,
+    make_cache_key,
+    register_cache_namespace,
+)
+from core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def namespaces(monkeypatch):
+    """Пустой реестр пространств имён и версии по умолчанию"""
+    monkeypatch.setattr(services_functions, "cache_namespaces", set())
+    monkeypatch.setattr(settings, "cache_key_version", 1)
+    monkeypatch.setattr(settings, "cache_namespace_versions", {})
+    register_cache_namespace("movies")
+
+
+def test_params_order_does_not_matter():
+    assert make_cache_key(
+        "movies", {"sort": "-imdb_rating", "page_size": 10, "genre_id": "g"}
+    ) == make_cache_key(
+        "movies", {"genre_id": "g", "page_size": 10, "sort": "-imdb_rating"}
+    )
+    assert (
+        make_cache_key("movies", {"b": 2, "a": 1}) == "v1:movies:v1?a=1&b=2"
+    )
+
+
+def test_none_params_are_dropped():
+    assert make_cache_key(
+        "movies", {"query": None, "page_size": 10}
+    ) == make_cache_key("movies", {"page_size": 10})
+    assert make_cache_key("movies", {"query": None}) == "v1:movies:v1"
+
+
+def test_item_id_and_empty_params():
+    assert make_cache_key("movies", item_id="f1") == "v1:movies:v1:f1"
+    assert make_cache_key("movies", {}, item_id="f1") == "v1:movies:v1:f1"
+
+
+def test_long_params_are_hashed():
+    short = {"q": "x" * (CACHE_KEY_PARAMS_MAX_LENGTH - 2)}
+    long = {"q": "x" * (CACHE_KEY_PARAMS_MAX_LENGTH - 1)}
+
+    assert make_cache_key("movies", short) == f"v1:movies:v1?q={short['q']}"
+    digest = hashlib.sha1(f"q={long['q']}".encode()).hexdigest()
+    assert make_cache_key("movies", long) == f"v1:movies:v1#{digest}"
+    assert make_cache_key("movies", long) != make_cache_key(
+        "movies", {"q": "y" * (CACHE_KEY_PARAMS_MAX_LENGTH - 1)}
+    )
+
+
+def test_version_prefixes(monkeypatch):
+    register_cache_namespace("genres")
+    monkeypatch.setattr(settings, "cache_key_version", 3)
+    monkeypatch.setattr(settings, "cache_namespace_versions", {"movies": 2})
+
+    assert make_cache_key("movies", item_id="f1") == "v3:movies:v2:f1"
+    # Версия другого индекса не меняется
+    assert make_cache_key("genres", item_id="g1") == "v3:genres:v1:g1"
+
+
+def test_unregistered_namespace():
+    with pytest.raises(ValueError):
+        make_cache_key("unknown", item_id="x")
+
+
+def test_namespace_registered_once():
+    with pytest.raises(ValueError):
+        register_cache_namespace("movies")
@@ -0,0 +1,62 @@
+"""модульные тесты кэша первого уровня"""
+
+from db import local_cache as local_cache_module
+from db.local_cache import LocalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction():
+    cache = LocalCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # чтение делает "a" свежей, вытесняется "b"
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(local_cache_module.time, "monotonic", clock)
+    cache = LocalCache(max_size=10, ttl=10)
+    cache.set("long", 1)
+    # срок записи ограничен меньшим из ttl кэша и expire ключа
+    cache.set("short", 2, expire=3)
+
+    clock.now += 5
+    assert cache.get("short") is None
+    assert cache.get("long") == 1
+
+    clock.now += 5
+    assert cache.get("long") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = LocalCache(max_size=0, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_delete_and_clear():
+    cache = LocalCache(max_size=10, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    cache.delete("a", "missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.get("c") is None
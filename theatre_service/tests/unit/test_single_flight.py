@@ -0,0 +1,103 @@
+"""модульные тесты объединения одновременных загрузок"""
+
+import asyncio
+
+import pytest
+
+from db.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    single_flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    waiters = [
+        asyncio.create_task(single_flight.do("key", load)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_next_call_after_completion_loads_again():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await single_flight.do("key", load) == 1
+    assert await single_flight.do("key", load) == 2
+
+
+@pytest.mark.asyncio
+async def test_different_keys_load_separately():
+    single_flight = SingleFlight()
+
+    async def load_a():
+        return "a"
+
+    async def load_b():
+        return "b"
+
+    assert await asyncio.gather(
+        single_flight.do("a", load_a), single_flight.do("b", load_b)
+    ) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_load():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(single_flight.do("key", load))
+    second = asyncio.create_task(single_flight.do("key", load))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "value"
+
+
+@pytest.mark.asyncio
+async def test_error_is_shared_and_not_cached():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing_load():
+        await release.wait()
+        raise RuntimeError("search engine is down")
+
+    waiters = [
+        asyncio.create_task(single_flight.do("key", failing_load))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def load():
+        return "value"
+
+    assert await single_flight.do("key", load) == "value"
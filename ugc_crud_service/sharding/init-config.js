@@ -0,0 +1,10 @@
+// Replica set config-сервера
+try {
+    rs.status();
+} catch (e) {
+    rs.initiate({
+        _id: "ugc-config",
+        configsvr: true,
+        members: [{ _id: 0, host: "ugc-mongo-config:27017" }],
+    });
+}
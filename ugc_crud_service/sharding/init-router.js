@@ -0,0 +1,17 @@
+// Регистрация шардов и ключи шардирования коллекций UGC.
+// Ключи должны совпадать с UGC_CRUD_MONGO_SHARD_KEYS сервиса:
+// запросы с ключом шардирования в фильтре уходят на один шард.
+sh.addShard("ugc-shard1/ugc-mongo-shard1:27017");
+sh.addShard("ugc-shard2/ugc-mongo-shard2:27017");
+
+// Имя базы то же, что у сервиса (MONGO_DB_NAME)
+const dbName = process.env.MONGO_DB_NAME || "ugc";
+sh.enableSharding(dbName);
+
+// Лайки и закладки читаются по пользователю, а уникальный индекс (user_id, content_id)
+// допустим только с ключом шардирования в префиксе — поэтому диапазонный user_id.
+sh.shardCollection(`${dbName}.Like`, { user_id: 1 });
+sh.shardCollection(`${dbName}.Bookmark`, { user_id: 1 });
+
+// Комментарии читаются по фильму; hashed равномерно распределяет популярные фильмы.
+sh.shardCollection(`${dbName}.Comment`, { content_id: "hashed" });
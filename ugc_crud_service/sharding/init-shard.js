@@ -0,0 +1,11 @@
+// Replica set шарда; имя передаётся через --eval 'var shardName = "..."'
+const hosts = {
+    "ugc-shard1": "ugc-mongo-shard1:27017",
+    "ugc-shard2": "ugc-mongo-shard2:27017",
+};
+
+try {
+    rs.status();
+} catch (e) {
+    rs.initiate({ _id: shardName, members: [{ _id: 0, host: hosts[shardName] }] });
+}
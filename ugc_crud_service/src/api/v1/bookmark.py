@@ -2,13 +2,16 @@ from uuid import UUID
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
 from models.entity import Bookmark
-from schemas.model import EntityPostDTO, EntityUpdateDTO
-from services.models import UpdateModel
+from schemas.model import EntityPostDTO, EntityUpdateDTO, EntityUpsertDTO
+from services.models import UpdateModel, BulkItemResult
 from services.mongo.bookmark import BookmarkServiceABC, get_bookmark_service
 from services.bearer import security_jwt
+from core.config import settings
+from api.v1.pagination import CursorParams, set_next_cursor
 
 
 router = APIRouter(prefix="/api/v1/bookmarks")
@@ -28,29 +31,52 @@ async def post_bookmarks(
 @router.get("/user/{user_id}")
 async def get_user_bookmarks(
     user_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Bookmark]:
-    return await service.get_by_user(user_id)
+    bookmarks = await service.get_by_user(user_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, bookmarks, pagination.page_size)
+    return bookmarks
 
 
 @router.get("/content/{content_id}")
 async def get_content_bookmarks(
     content_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Bookmark]:
-    return await service.get_by_content_id(content_id)
+    bookmarks = await service.get_by_content_id(content_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, bookmarks, pagination.page_size)
+    return bookmarks
 
 
 @router.get("/timerange/{start}/{end}")
 async def get_timerange_bookmarks(
     start: datetime,
     end: datetime,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Bookmark]:
-    return await service.get_by_timerange(start, end)
+    bookmarks = await service.get_by_timerange(start, end, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, bookmarks, pagination.page_size)
+    return bookmarks
+
+
+
+@router.get("/timerange/{start}/{end}/stream", response_class=StreamingResponse)
+async def stream_timerange_bookmarks(
+    start: datetime,
+    end: datetime,
+    service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> StreamingResponse:
+    return StreamingResponse(service.stream_by_timerange(start, end), media_type="application/x-ndjson")
 
 
 @router.delete("/remove")
@@ -76,3 +102,32 @@ async def update_bookmark(
         raise HTTPException(status_code=403, detail="Forbidden")
     update_mapping = request.model_dump(exclude_none=True, exclude_unset=True)
     return await service.update(UpdateModel(**update_mapping))
+
+
+@router.put("/bulk/update")
+async def bulk_update_bookmarks(
+    request: Annotated[list[EntityUpdateDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    updates = [UpdateModel(**raw.model_dump(exclude_none=True, exclude_unset=True)) for raw in request]
+    return await service.bulk_update(UUID(user.get("user_id")), updates)
+
+
+@router.put("/bulk/upsert")
+async def bulk_upsert_bookmarks(
+    request: Annotated[list[EntityUpsertDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    bookmarks = [Bookmark(**raw.model_dump()) for raw in request]
+    return await service.bulk_upsert(UUID(user.get("user_id")), bookmarks)
+
+
+@router.delete("/bulk/remove")
+async def bulk_delete_bookmarks(
+    ids: Annotated[list[UUID], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[BookmarkServiceABC, Depends(get_bookmark_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    return await service.bulk_delete(UUID(user.get("user_id")), ids)
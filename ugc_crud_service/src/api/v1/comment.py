@@ -2,13 +2,16 @@ from uuid import UUID
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-from models.entity import Comment
-from schemas.model import CommentPostDTO, CommentUpdateDTO
-from services.models import CommentUpdateModel
+from models.entity import Comment, CommentThread
+from schemas.model import CommentPostDTO, CommentUpdateDTO, CommentUpsertDTO
+from services.models import CommentUpdateModel, BulkItemResult, SearchLanguage
 from services.mongo.comment import CommentServiceABC, get_comment_service
 from services.bearer import security_jwt
+from core.config import settings
+from api.v1.pagination import CursorParams, set_next_cursor
 
 router = APIRouter(prefix="/api/v1/comments")
 
@@ -27,29 +30,82 @@ async def post_comments(
 @router.get("/user/{user_id}")
 async def get_user_comments(
     user_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[CommentServiceABC, Depends(get_comment_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Comment]:
-    return await service.get_by_user(user_id)
+    comments = await service.get_by_user(user_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, comments, pagination.page_size)
+    return comments
 
 
 @router.get("/content/{content_id}")
 async def get_content_comments(
     content_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[CommentServiceABC, Depends(get_comment_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Comment]:
-    return await service.get_by_content_id(content_id)
+    comments = await service.get_by_content_id(content_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, comments, pagination.page_size)
+    return comments
+
+
+@router.get("/content/{content_id}/threads")
+async def get_content_comment_threads(
+    content_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)],
+    replies: Annotated[int, Query(ge=0, le=settings.comment_thread_replies_max,
+                                  description="Число первых ответов на каждый корневой комментарий")] = 3,
+) -> list[CommentThread]:
+    threads = await service.get_content_threads(content_id, pagination.page_size, pagination.cursor, replies)
+    set_next_cursor(response, [thread.comment for thread in threads], pagination.page_size)
+    return threads
+
+
+@router.get("/thread/{comment_id}")
+async def get_comment_thread(
+    comment_id: UUID,
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)],
+    max_depth: Annotated[int, Query(ge=0, le=settings.comment_thread_max_depth,
+                                    description="Глубина ответов относительно комментария")] = (
+        settings.comment_thread_max_depth),
+    limit: Annotated[int, Query(ge=1, le=settings.comment_thread_max_size,
+                                description="Максимальное число комментариев в ответе")] = (
+        settings.comment_thread_max_size),
+) -> list[Comment]:
+    return await service.get_thread(comment_id, max_depth, limit)
 
 
 @router.get("/timerange/{start}/{end}")
 async def get_timerange_comments(
     start: datetime,
     end: datetime,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[CommentServiceABC, Depends(get_comment_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Comment]:
-    return await service.get_by_timerange(start, end)
+    comments = await service.get_by_timerange(start, end, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, comments, pagination.page_size)
+    return comments
+
+
+
+@router.get("/timerange/{start}/{end}/stream", response_class=StreamingResponse)
+async def stream_timerange_comments(
+    start: datetime,
+    end: datetime,
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> StreamingResponse:
+    return StreamingResponse(service.stream_by_timerange(start, end), media_type="application/x-ndjson")
 
 
 @router.delete("/remove")
@@ -80,7 +136,45 @@ async def update_comment(
 @router.get("/search/{term}")
 async def search(
     term: str,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[CommentServiceABC, Depends(get_comment_service)],
-    user: Annotated[dict, Depends(security_jwt)]
+    user: Annotated[dict, Depends(security_jwt)],
+    content_id: Annotated[UUID | None, Query(description="Искать только в комментариях к фильму")] = None,
+    language: Annotated[SearchLanguage | None, Query(description="Язык анализа запроса")] = None,
 ) -> list[Comment]:
-    return await service.search_by_text(term)
+    comments, next_cursor = await service.search_by_text(
+        term, pagination.page_size, pagination.cursor, content_id, language
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return comments
+
+
+@router.put("/bulk/update")
+async def bulk_update_comments(
+    request: Annotated[list[CommentUpdateDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    updates = [CommentUpdateModel(**raw.model_dump(exclude_none=True, exclude_unset=True)) for raw in request]
+    return await service.bulk_update(UUID(user.get("user_id")), updates)
+
+
+@router.put("/bulk/upsert")
+async def bulk_upsert_comments(
+    request: Annotated[list[CommentUpsertDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    comments = [Comment(**raw.model_dump()) for raw in request]
+    return await service.bulk_upsert(UUID(user.get("user_id")), comments)
+
+
+@router.delete("/bulk/remove")
+async def bulk_delete_comments(
+    ids: Annotated[list[UUID], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[CommentServiceABC, Depends(get_comment_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    return await service.bulk_delete(UUID(user.get("user_id")), ids)
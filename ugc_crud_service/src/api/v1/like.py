@@ -2,13 +2,16 @@ from uuid import UUID
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
-from models.entity import Like
-from schemas.model import LikePostDTO, LikeUpdateDTO
-from services.models import LikeUpdateModel
+from models.entity import Like, ContentRating
+from schemas.model import LikePostDTO, LikeUpdateDTO, LikeUpsertDTO
+from services.models import LikeUpdateModel, BulkItemResult
 from services.mongo.like import LikeServiceABC, get_like_service
 from services.bearer import security_jwt
+from core.config import settings
+from api.v1.pagination import CursorParams, set_next_cursor
 
 router = APIRouter(prefix="/api/v1/likes")
 
@@ -27,29 +30,52 @@ async def post_likes(
 @router.get("/user/{user_id}")
 async def get_user_likes(
     user_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[LikeServiceABC, Depends(get_like_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Like]:
-    return await service.get_by_user(user_id)
+    likes = await service.get_by_user(user_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, likes, pagination.page_size)
+    return likes
 
 
 @router.get("/content/{content_id}")
 async def get_content_likes(
     content_id: UUID,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[LikeServiceABC, Depends(get_like_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Like]:
-    return await service.get_by_content_id(content_id)
+    likes = await service.get_by_content_id(content_id, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, likes, pagination.page_size)
+    return likes
 
 
 @router.get("/timerange/{start}/{end}")
 async def get_timerange_likes(
     start: datetime,
     end: datetime,
+    response: Response,
+    pagination: Annotated[CursorParams, Depends()],
     service: Annotated[LikeServiceABC, Depends(get_like_service)],
     user: Annotated[dict, Depends(security_jwt)]
 ) -> list[Like]:
-    return await service.get_by_timerange(start, end)
+    likes = await service.get_by_timerange(start, end, pagination.page_size, pagination.cursor)
+    set_next_cursor(response, likes, pagination.page_size)
+    return likes
+
+
+
+@router.get("/timerange/{start}/{end}/stream", response_class=StreamingResponse)
+async def stream_timerange_likes(
+    start: datetime,
+    end: datetime,
+    service: Annotated[LikeServiceABC, Depends(get_like_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> StreamingResponse:
+    return StreamingResponse(service.stream_by_timerange(start, end), media_type="application/x-ndjson")
 
 
 @router.delete("/remove")
@@ -84,3 +110,40 @@ async def get_avg_content_rate(
 ) -> float:
     avg_rate = await service.get_avg_content_rate(content_id)
     return round(avg_rate, 2)
+
+
+@router.get("/rating/{content_id}")
+async def get_content_rating(
+    content_id: UUID,
+    service: Annotated[LikeServiceABC, Depends(get_like_service)]
+) -> ContentRating:
+    return await service.get_content_rating(content_id)
+
+
+@router.put("/bulk/update")
+async def bulk_update_likes(
+    request: Annotated[list[LikeUpdateDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[LikeServiceABC, Depends(get_like_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    updates = [LikeUpdateModel(**raw.model_dump(exclude_none=True, exclude_unset=True)) for raw in request]
+    return await service.bulk_update(UUID(user.get("user_id")), updates)
+
+
+@router.put("/bulk/upsert")
+async def bulk_upsert_likes(
+    request: Annotated[list[LikeUpsertDTO], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[LikeServiceABC, Depends(get_like_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    likes = [Like(**raw.model_dump()) for raw in request]
+    return await service.bulk_upsert(UUID(user.get("user_id")), likes)
+
+
+@router.delete("/bulk/remove")
+async def bulk_delete_likes(
+    ids: Annotated[list[UUID], Body(max_length=settings.bulk_max_items)],
+    service: Annotated[LikeServiceABC, Depends(get_like_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> list[BulkItemResult]:
+    return await service.bulk_delete(UUID(user.get("user_id")), ids)
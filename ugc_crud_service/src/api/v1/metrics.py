@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from db.mongo import pool_metrics
+from services.bearer import auth_metrics, security_jwt
+
+# Метрики раскрывают адреса узлов MongoDB и нагрузку на сервис: только для авторизованных запросов
+router = APIRouter(prefix="/api/v1/metrics", dependencies=[Depends(security_jwt)])
+
+
+@router.get("/mongo_pool")
+async def get_mongo_pool_metrics() -> dict[str, dict]:
+    return pool_metrics.snapshot()
+
+
+@router.get("/auth")
+async def get_auth_metrics() -> dict[str, float | str]:
+    return auth_metrics.snapshot()
@@ -0,0 +1,24 @@
+from fastapi import Query, Response
+
+from core.config import settings
+from models.entity import Entity
+from services.cursor import encode_cursor
+
+
+class CursorParams:
+    def __init__(
+        self,
+        page_size: int = Query(
+            settings.page_size_default, ge=1, le=settings.page_size_max, description="Количество записей на странице"
+        ),
+        cursor: str | None = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
+    ):
+        self.page_size = page_size
+        self.cursor = cursor
+
+
+def set_next_cursor(response: Response, entities: list[Entity], page_size: int) -> None:
+    """Полная страница означает, что записи могут продолжаться: отдаём курсор в заголовке"""
+    if len(entities) == page_size:
+        last = entities[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
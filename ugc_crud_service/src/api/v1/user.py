@@ -0,0 +1,20 @@
+from uuid import UUID
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from models.entity import UserSummary
+from services.base import UserSummaryServiceABC
+from services.mongo.summary import get_user_summary_service
+from services.bearer import security_jwt
+
+router = APIRouter(prefix="/api/v1/users")
+
+
+@router.get("/{user_id}/summary")
+async def get_user_summary(
+    user_id: UUID,
+    service: Annotated[UserSummaryServiceABC, Depends(get_user_summary_service)],
+    user: Annotated[dict, Depends(security_jwt)]
+) -> UserSummary:
+    return await service.get(user_id)
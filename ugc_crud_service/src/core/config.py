@@ -1,9 +1,16 @@
 from datetime import datetime, timezone
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class CollectionOptions(BaseModel):
+    # Имя режима в формате строки подключения: primary, primaryPreferred, secondary, ...
+    read_preference: str | None = None
+    write_concern_w: int | str | None = None
+    write_concern_j: bool | None = None
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -15,11 +22,81 @@ class Settings(BaseSettings):
     mongo_root_username: str = Field(..., alias="MONGO_ROOT_USERNAME")
     mongo_root_password: str = Field(..., alias="MONGO_ROOT_PASSWORD")
     mongo_db_name: str = Field(..., alias="MONGO_DB_NAME")
+    # Полная строка подключения (например, к mongos шардированного кластера) вместо host/port/логина
+    mongo_uri: str | None = Field(None, alias="UGC_CRUD_MONGO_URI")
+
+    # Пул соединений Motor
+    mongo_max_pool_size: int = Field(100, alias="UGC_CRUD_MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int = Field(10, alias="UGC_CRUD_MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: int = Field(60000, alias="UGC_CRUD_MONGO_MAX_IDLE_TIME_MS")
+    mongo_wait_queue_timeout_ms: int = Field(5000, alias="UGC_CRUD_MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    # Настройки коллекций по имени модели: {"Like": {"read_preference": "secondaryPreferred", "write_concern_w": 1}}
+    mongo_collection_options: dict[str, CollectionOptions] = Field(
+        default_factory=dict, alias="UGC_CRUD_MONGO_COLLECTION_OPTIONS"
+    )
+
+    # Шардирование коллекций при старте (через mongos) и ключи по имени модели
+    mongo_sharding_enabled: bool = Field(False, alias="UGC_CRUD_MONGO_SHARDING_ENABLED")
+    mongo_shard_keys: dict[str, dict[str, int | str]] = Field(
+        default_factory=lambda: {
+            "Like": {"user_id": 1},
+            "Bookmark": {"user_id": 1},
+            "Comment": {"content_id": "hashed"},
+        },
+        alias="UGC_CRUD_MONGO_SHARD_KEYS",
+    )
+
+    cache_redis_host: str = Field("ugc-crud-cache", alias="UGC_CRUD_REDIS_HOST")
+    cache_redis_port: int = Field(6379, alias="UGC_CRUD_REDIS_PORT")
+    # TTL горячих чтений и максимальная случайная добавка к нему, сек.
+    cache_ttl_sec: int = Field(60, alias="UGC_CRUD_CACHE_TTL_SEC")
+    cache_ttl_jitter_sec: int = Field(15, alias="UGC_CRUD_CACHE_TTL_JITTER_SEC")
 
     jwt_secret_key: str = Field(..., alias="AUTH_SECRET_KEY")
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
+    # Библиотека проверки подписи: jose или pyjwt (если установлен пакет PyJWT)
+    jwt_backend: str = Field("jose", alias="UGC_CRUD_JWT_BACKEND")
+    # Кэш проверенных токенов: не больше jwt_cache_size записей, каждая живёт до exp, но не дольше TTL
+    jwt_cache_size: int = Field(10000, alias="UGC_CRUD_JWT_CACHE_SIZE")
+    jwt_cache_ttl_sec: int = Field(60, alias="UGC_CRUD_JWT_CACHE_TTL_SEC")
+
+    # Размер страницы списочных запросов
+    page_size_default: int = Field(50, alias="UGC_CRUD_PAGE_SIZE_DEFAULT")
+    page_size_max: int = Field(500, alias="UGC_CRUD_PAGE_SIZE_MAX")
+
+    # Размер пачки курсора при потоковой выгрузке
+    stream_batch_size: int = Field(1000, alias="UGC_CRUD_STREAM_BATCH_SIZE")
+
+    # Период пересчёта агрегатов оценок, сек.
+    rating_reconcile_interval_sec: int = Field(3600, alias="UGC_CRUD_RATING_RECONCILE_INTERVAL_SEC")
+
+    # Сколько последних записей каждого типа хранить в сводке пользователя
+    user_summary_recent_size: int = Field(10, alias="UGC_CRUD_USER_SUMMARY_RECENT_SIZE")
+
+    # Максимальное число элементов в одном массовом запросе
+    bulk_max_items: int = Field(1000, alias="UGC_CRUD_BULK_MAX_ITEMS")
+
+    # Язык текстового индекса комментариев: стемминг и стоп-слова при индексации
+    comment_text_language: str = Field("english", alias="UGC_CRUD_COMMENT_TEXT_LANGUAGE")
+    # Ветки комментариев: предельная глубина ответов и число комментариев в одном ответе API
+    comment_thread_max_depth: int = Field(8, alias="UGC_CRUD_COMMENT_THREAD_MAX_DEPTH")
+    comment_thread_max_size: int = Field(500, alias="UGC_CRUD_COMMENT_THREAD_MAX_SIZE")
+    comment_thread_replies_max: int = Field(20, alias="UGC_CRUD_COMMENT_THREAD_REPLIES_MAX")
+
+    # Ограничение времени полнотекстового поиска на стороне MongoDB, мс
+    search_max_time_ms: int = Field(2000, alias="UGC_CRUD_SEARCH_MAX_TIME_MS")
+
+    # Публикация изменений коллекций в Kafka (publisher.py, нужен replica set или шардированный кластер)
+    kafka_bootstrap_servers: str = Field("", alias="KAFKA_BOOTSTRAP_SERVER")
+    changes_topic: str = Field("event", alias="UGC_CRUD_CHANGES_TOPIC")
+    # Сохранять позицию change stream после каждых N опубликованных событий
+    changes_checkpoint_every: int = Field(100, alias="UGC_CRUD_CHANGES_CHECKPOINT_EVERY")
+    # Pre- и post-images (MongoDB 6.0+): без них изменения и удаления не попадают в дневные счётчики
+    changes_pre_images: bool = Field(True, alias="UGC_CRUD_CHANGES_PRE_IMAGES")
 
     def get_mongodb_connection_string(self):
+        if self.mongo_uri:
+            return self.mongo_uri
         username = self.mongo_root_username
         password = self.mongo_root_password
         host = self.mongo_host
@@ -0,0 +1,102 @@
+import logging
+from typing import Optional, Protocol
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+from core.config import settings
+
+
+class CacheStorage(Protocol):
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    async def set(self, key: str, value: bytes, expire: int) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def set_if_generation(
+        self, key: str, value: bytes, expire: int, generation_key: str, generation: Optional[bytes]
+    ) -> None:
+        pass
+
+    async def invalidate(self, keys: list[str], generation_keys: list[str], expire: int) -> None:
+        pass
+
+
+class RedisCacheStorage(CacheStorage):
+    """
+    Кэш не должен ронять запросы: при недоступности Redis
+    чтение и запись идут мимо кэша, напрямую в Mongo.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.redis.get(key)
+        except RedisError as e:
+            logging.warning("Cache get failed for %s: %s", key, e)
+            return None
+
+    async def set(self, key: str, value: bytes, expire: int) -> None:
+        try:
+            await self.redis.set(key, value, ex=expire)
+        except RedisError as e:
+            logging.warning("Cache set failed for %s: %s", key, e)
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*keys)
+        except RedisError as e:
+            logging.warning("Cache delete failed for %s: %s", keys, e)
+
+
+    async def set_if_generation(
+        self, key: str, value: bytes, expire: int, generation_key: str, generation: Optional[bytes]
+    ) -> None:
+        """Запись, если поколение ключа не менялось с начала загрузки значения"""
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(generation_key)
+                if await pipe.get(generation_key) != generation:
+                    return
+                pipe.multi()
+                pipe.set(key, value, ex=expire)
+                await pipe.execute()
+        except WatchError:
+            # Ключ сбросили во время записи: значение уже устарело
+            return
+        except RedisError as e:
+            logging.warning("Cache set failed for %s: %s", key, e)
+
+    async def invalidate(self, keys: list[str], generation_keys: list[str], expire: int) -> None:
+        """Удаляет ключи и увеличивает их поколения одной транзакцией"""
+        if not keys:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for generation_key in generation_keys:
+                    pipe.incr(generation_key)
+                    pipe.expire(generation_key, expire)
+                pipe.delete(*keys)
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning("Cache invalidate failed for %s: %s", keys, e)
+
+async def init_redis() -> Redis:
+    redis = Redis(host=settings.cache_redis_host, port=settings.cache_redis_port)
+    await redis.ping()
+    return redis
+
+
+def get_cache_storage() -> Optional[CacheStorage]:
+    return storage
+
+
+storage: Optional[CacheStorage] = None
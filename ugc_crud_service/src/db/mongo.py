@@ -0,0 +1,131 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Type
+
+from beanie import Document
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern, monitoring
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+from core.config import settings
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Счётчики пулов соединений по адресам серверов.
+    События приходят из потоков pymongo, поэтому обновления идут под блокировкой.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: defaultdict[str, Counter] = defaultdict(Counter)
+
+    def _inc(self, event, field: str, value: int = 1):
+        with self._lock:
+            self._pools[f"{event.address[0]}:{event.address[1]}"][field] += value
+
+    def pool_created(self, event):
+        self._inc(event, "pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc(event, "pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc(event, "open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc(event, "open", -1)
+
+    def connection_check_out_started(self, event):
+        self._inc(event, "waiting")
+
+    def connection_check_out_failed(self, event):
+        self._inc(event, "waiting", -1)
+        self._inc(event, "checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._inc(event, "waiting", -1)
+        self._inc(event, "checked_out")
+        self._inc(event, "checkouts")
+
+    def connection_checked_in(self, event):
+        self._inc(event, "checked_out", -1)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            pools = {address: dict(counters) for address, counters in self._pools.items()}
+        max_pool_size = settings.mongo_max_pool_size
+        for counters in pools.values():
+            counters["max_pool_size"] = max_pool_size
+            # maxPoolSize=0 — пул без ограничения, доля занятых соединений не определена
+            counters["utilisation"] = (
+                round(counters.get("checked_out", 0) / max_pool_size, 3) if max_pool_size else None
+            )
+        return pools
+
+
+pool_metrics = PoolMetricsListener()
+
+
+def init_mongo() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        settings.get_mongodb_connection_string(),
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+        waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+        event_listeners=[pool_metrics],
+    )
+
+
+def apply_collection_options(document_models: list[Type[Document]]) -> None:
+    """
+    Подменяет коллекции моделей Beanie копиями с заданными
+    read preference и write concern (настройка UGC_CRUD_MONGO_COLLECTION_OPTIONS)
+    """
+    for model in document_models:
+        options = settings.mongo_collection_options.get(model.__name__)
+        if options is None:
+            continue
+        collection_options = {}
+        if options.read_preference:
+            collection_options["read_preference"] = make_read_preference(
+                read_pref_mode_from_name(options.read_preference), None
+            )
+        if options.write_concern_w is not None or options.write_concern_j is not None:
+            collection_options["write_concern"] = WriteConcern(w=options.write_concern_w, j=options.write_concern_j)
+        model_settings = model.get_settings()
+        model_settings.motor_collection = model_settings.motor_collection.with_options(**collection_options)
+
+
+async def ensure_sharding(client: AsyncIOMotorClient, document_models: list[Type[Document]]) -> None:
+    """
+    Включает шардирование базы и коллекций с ключами из UGC_CRUD_MONGO_SHARD_KEYS.
+    Выполняется до init_beanie: для пустой коллекции индекс по ключу создаётся автоматически.
+    Повторный вызов с тем же ключом безопасен.
+    """
+    if not settings.mongo_sharding_enabled:
+        return
+    admin = client.admin
+    await admin.command("enableSharding", settings.mongo_db_name)
+    for model in document_models:
+        shard_key = settings.mongo_shard_keys.get(model.__name__)
+        if not shard_key:
+            continue
+        namespace = f"{settings.mongo_db_name}.{model.__name__}"
+        try:
+            await admin.command("shardCollection", namespace, key=shard_key)
+        except OperationFailure as e:
+            logging.error("Failed to shard %s by %s: %s", namespace, shard_key, e)
+            raise
@@ -13,3 +13,36 @@ class NotFoundKeyError(Exception):
         key_str = ','.join([str(key) for key in not_found_keys])
         super().__init__(f"The following keys were not found: {key_str}")
         self.not_found_keys = not_found_keys
+
+
+class InvalidCursorError(Exception):
+    def __init__(self, cursor: str):
+        super().__init__(f"Invalid pagination cursor: {cursor}")
+        self.cursor = cursor
+
+
+class SearchTimeoutError(Exception):
+    def __init__(self, term: str):
+        super().__init__(f"Search took too long, refine the query: {term}")
+        self.term = term
+
+
+class InvalidParentError(Exception):
+    def __init__(self, parent_id: UUID, reason: str):
+        super().__init__(f"Invalid parent comment {parent_id}: {reason}")
+        self.parent_id = parent_id
+
+
+class ImmutableFieldError(Exception):
+    def __init__(self, field: str, ids: Iterable[UUID]):
+        ids_str = ','.join([str(id_) for id_ in ids])
+        super().__init__(f"Field {field} cannot be changed after creation: {ids_str}")
+        self.field = field
+        self.ids = ids
+
+
+class DeleteConflictError(Exception):
+    def __init__(self, ids: Iterable[UUID]):
+        ids_str = ','.join([str(id_) for id_ in ids])
+        super().__init__(f"The following documents are still referenced and cannot be deleted: {ids_str}")
+        self.ids = ids
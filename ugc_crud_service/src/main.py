@@ -1,30 +1,61 @@
+import asyncio
+import logging
 from http import client
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from beanie import init_beanie
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from models import entity
+from db import cache
+from db.mongo import init_mongo, apply_collection_options, ensure_sharding
 from core.config import settings
 from api.v1.like import router as like_router
 from api.v1.bookmark import router as bookmark_router
 from api.v1.comment import router as comment_router
-from exceptions.services import DuplicateError, NotFoundKeyError
+from api.v1.metrics import router as metrics_router
+from api.v1.user import router as user_router
+from services.mongo.like import get_like_service
+from services.mongo.summary import get_user_summary_service
+from exceptions.services import (
+    DuplicateError, NotFoundKeyError, InvalidCursorError, SearchTimeoutError, InvalidParentError,
+    ImmutableFieldError, DeleteConflictError,
+)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    client = AsyncIOMotorClient(settings.get_mongodb_connection_string())
-    await init_beanie(
-        database=client[settings.mongo_db_name],
-        document_models=[entity.Like, entity.Bookmark, entity.Comment]
-    )
+    redis = await cache.init_redis()
+    cache.storage = cache.RedisCacheStorage(redis)
+    client = init_mongo()
+    document_models = [entity.Like, entity.Bookmark, entity.Comment, entity.ContentRating, entity.UserSummary]
+    await ensure_sharding(client, document_models)
+    await init_beanie(database=client[settings.mongo_db_name], document_models=document_models)
+    apply_collection_options(document_models)
+    if await entity.ContentRating.find_one({}) is None:
+        await get_like_service().reconcile_ratings()
+    if await entity.UserSummary.find_one({}) is None:
+        await get_user_summary_service().rebuild()
+    reconcile_task = asyncio.create_task(reconcile_ratings_periodically())
     
     yield
     
+    reconcile_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await reconcile_task
     client.close()
+    await redis.close()
+
+
+async def reconcile_ratings_periodically():
+    """Периодически пересчитывает агрегаты оценок, исправляя накопившийся дрейф"""
+    while True:
+        await asyncio.sleep(settings.rating_reconcile_interval_sec)
+        try:
+            await get_like_service().reconcile_ratings()
+        except Exception:
+            logging.exception("Content ratings reconciliation failed")
 
     
 app = FastAPI(
@@ -36,6 +67,8 @@ app = FastAPI(
 app.include_router(router=like_router)
 app.include_router(router=bookmark_router)
 app.include_router(router=comment_router)
+app.include_router(router=metrics_router)
+app.include_router(router=user_router)
 
 
 @app.exception_handler(DuplicateError)
@@ -46,3 +79,28 @@ async def duplicate_key_handler(_, exception: DuplicateError):
 @app.exception_handler(NotFoundKeyError)
 async def not_found_key_handler(_, exception: NotFoundKeyError):
     return JSONResponse(content=str(exception), status_code=client.NOT_FOUND)
+
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(_, exception: InvalidCursorError):
+    return JSONResponse(content=str(exception), status_code=client.BAD_REQUEST)
+
+
+@app.exception_handler(SearchTimeoutError)
+async def search_timeout_handler(_, exception: SearchTimeoutError):
+    return JSONResponse(content=str(exception), status_code=client.SERVICE_UNAVAILABLE)
+
+
+@app.exception_handler(InvalidParentError)
+async def invalid_parent_handler(_, exception: InvalidParentError):
+    return JSONResponse(content=str(exception), status_code=client.BAD_REQUEST)
+
+
+@app.exception_handler(ImmutableFieldError)
+async def immutable_field_handler(_, exception: ImmutableFieldError):
+    return JSONResponse(content=str(exception), status_code=client.BAD_REQUEST)
+
+
+@app.exception_handler(DeleteConflictError)
+async def delete_conflict_handler(_, exception: DeleteConflictError):
+    return JSONResponse(content=str(exception), status_code=client.CONFLICT)
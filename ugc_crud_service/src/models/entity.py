@@ -2,8 +2,10 @@ from uuid import UUID, uuid4
 from datetime import datetime
 
 from beanie import Document
-from pymongo import IndexModel, TEXT
-from pydantic import Field
+from pymongo import IndexModel, TEXT, ASCENDING, DESCENDING
+from pydantic import BaseModel, Field
+
+from core.config import settings
 
 
 class Entity(Document):
@@ -13,20 +15,72 @@ class Entity(Document):
     created_at: datetime
 
 
+# Индексы под keyset-пагинацию по (created_at, _id) в MongoReadMixin
+PAGINATION_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("content_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)]),
+]
+
+
 class Like(Entity):
     rate: int = Field(ge=0, le=10)
 
     class Settings:
-        indexes = [IndexModel([("user_id"), ("content_id")], unique=True)]
+        indexes = [IndexModel([("user_id"), ("content_id")], unique=True), *PAGINATION_INDEXES]
 
 
 class Bookmark(Entity):
     class Settings:
-        indexes = [IndexModel([("user_id"), ("content_id")], unique=True)]
+        indexes = [IndexModel([("user_id"), ("content_id")], unique=True), *PAGINATION_INDEXES]
 
 
 class Comment(Entity):
     text: str
+    # Ветка хранится массивом предков от корня до родителя: поддерево — один запрос по индексу ancestors
+    parent_id: UUID | None = None
+    ancestors: list[UUID] = Field(default_factory=list)
+    depth: int = 0
 
     class Settings:
-        indexes = [IndexModel([("text", TEXT)])]
+        indexes = [
+            IndexModel([("text", TEXT)], default_language=settings.comment_text_language),
+            IndexModel([("ancestors", ASCENDING), ("depth", ASCENDING), ("created_at", ASCENDING)]),
+            *PAGINATION_INDEXES,
+        ]
+
+
+class CommentThread(BaseModel):
+    comment: Comment
+    replies: list[Comment]
+
+
+class ContentRating(Document):
+    """Агрегат оценок фильма, поддерживаемый при записи лайков"""
+
+    id: UUID
+    rate_sum: int = 0
+    rate_count: int = 0
+    # Количество оценок по значениям "0".."10"
+    histogram: dict[str, int] = Field(default_factory=dict)
+    reconciled_at: datetime | None = None
+
+
+class RecentItem(BaseModel):
+    id: UUID
+    created_at: datetime
+
+
+class SummarySection(BaseModel):
+    count: int = 0
+    # Последние записи по убыванию created_at
+    recent: list[RecentItem] = Field(default_factory=list)
+
+
+class UserSummary(Document):
+    """Сводка пользователя для страницы профиля, поддерживаемая при записи"""
+
+    id: UUID
+    likes: SummarySection = Field(default_factory=SummarySection)
+    bookmarks: SummarySection = Field(default_factory=SummarySection)
+    comments: SummarySection = Field(default_factory=SummarySection)
@@ -0,0 +1,125 @@
+"""
+Публикация изменений лайков, закладок и комментариев в Kafka.
+
+Процесс читает change stream базы UGC и отправляет каждую вставку, изменение и удаление
+компактным событием `ugc_change`, которое kafka_clickhouse_etl пишет в таблицу ugc_changes.
+Позиция потока (resume token) сохраняется в MongoDB после подтверждения отправки, поэтому
+после перезапуска события не теряются, но могут повториться. Повторы отбрасываются по
+`change_id` — resume token события, который при повторной доставке не меняется.
+
+    python publisher.py
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+
+from kafka import KafkaProducer
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from core.config import settings
+from models.entity import Like, Bookmark, Comment
+
+
+ENTITY_NAMES = {Like.__name__: "like", Bookmark.__name__: "bookmark", Comment.__name__: "comment"}
+OPERATIONS = {"insert": "insert", "update": "update", "replace": "update", "delete": "delete"}
+CHECKPOINT_COLLECTION = "change_stream_checkpoints"
+CHECKPOINT_ID = "ugc_publisher"
+EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def to_event(change: dict) -> dict:
+    """Компактное событие: без текста комментария и служебных полей Beanie.
+
+    `previous` — состояние записи до изменения или удаления, оно есть только при включённых
+    pre-images; по нему ClickHouse вычитает старую запись из дневных счётчиков."""
+    operation = OPERATIONS[change["operationType"]]
+    previous = _state(change.get("fullDocumentBeforeChange"))
+    state = _state(change.get("fullDocument")) if operation != "delete" else None
+    document = state or previous or {}
+    return {
+        "event_type": "ugc_change",
+        "change_id": change["_id"]["_data"],
+        "entity": ENTITY_NAMES[change["ns"]["coll"]],
+        "operation": operation,
+        "id": _str_or_none(change["documentKey"]["_id"]),
+        "user_id": document.get("user_id"),
+        "content_id": document.get("content_id"),
+        "rate": state["rate"] if state else None,
+        "previous": previous,
+        # Время операции в oplog: при повторной доставке то же, что и в первый раз
+        "timestamp": change["clusterTime"].as_datetime().strftime(EVENT_TIME_FORMAT),
+    }
+
+
+def _state(document: dict | None) -> dict | None:
+    if not document:
+        return None
+    return {
+        "user_id": _str_or_none(document.get("user_id")),
+        "content_id": _str_or_none(document.get("content_id")),
+        "rate": document.get("rate"),
+    }
+
+
+def _str_or_none(value: UUID | None) -> str | None:
+    return str(value) if value is not None else None
+
+
+def enable_pre_images(database: Database) -> None:
+    for collection in ENTITY_NAMES:
+        database.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+
+
+def load_resume_token(database: Database) -> dict | None:
+    checkpoint = database[CHECKPOINT_COLLECTION].find_one({"_id": CHECKPOINT_ID})
+    return checkpoint["token"] if checkpoint else None
+
+
+def save_resume_token(database: Database, token: dict) -> None:
+    database[CHECKPOINT_COLLECTION].update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"token": token, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+def run() -> None:
+    client = MongoClient(settings.get_mongodb_connection_string(), uuidRepresentation="standard")
+    database = client[settings.mongo_db_name]
+    producer = KafkaProducer(
+        bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
+        key_serializer=lambda key: key.encode("utf-8"),
+        value_serializer=lambda value: json.dumps(value).encode("utf-8"),
+        acks="all",
+        retries=5,
+        linger_ms=50,
+    )
+    watch_options = {"full_document": "updateLookup"}
+    if settings.changes_pre_images:
+        enable_pre_images(database)
+        # Состояния до и после именно этого изменения, а не текущий документ на момент чтения:
+        # иначе разница для счётчиков посчитается между несоседними версиями записи
+        watch_options = {"full_document": "whenAvailable", "full_document_before_change": "whenAvailable"}
+
+    pipeline = [
+        {"$match": {"ns.coll": {"$in": list(ENTITY_NAMES)}, "operationType": {"$in": list(OPERATIONS)}}},
+    ]
+    resume_token = load_resume_token(database)
+    logging.info("Starting change stream publisher, resume token: %s", resume_token)
+    published = 0
+    with database.watch(pipeline, resume_after=resume_token, **watch_options) as stream:
+        for change in stream:
+            event = to_event(change)
+            # Ключ — id документа: все изменения одной записи попадают в одну партицию по порядку
+            producer.send(settings.changes_topic, key=event["id"], value=event)
+            published += 1
+            if published % settings.changes_checkpoint_every == 0:
+                producer.flush()
+                save_resume_token(database, stream.resume_token)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()
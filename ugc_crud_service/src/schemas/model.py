@@ -19,8 +19,18 @@ class EntityUpdateDTO(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class EntityUpsertDTO(EntityPostDTO):
+    id: UUID
+
+
 class CommentPostDTO(EntityPostDTO):
     text: str
+    parent_id: UUID | None = None
+
+
+class CommentUpsertDTO(EntityUpsertDTO):
+    text: str
+    parent_id: UUID | None = None
 
 
 class CommentUpdateDTO(EntityUpdateDTO):
@@ -31,5 +41,9 @@ class LikePostDTO(EntityPostDTO):
     rate: int = Field(..., ge=0, le=10)
 
 
+class LikeUpsertDTO(EntityUpsertDTO):
+    rate: int = Field(..., ge=0, le=10)
+
+
 class LikeUpdateDTO(EntityUpdateDTO):
     rate: int | None = Field(None, ge=0, le=10)
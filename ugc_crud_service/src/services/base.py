@@ -1,10 +1,10 @@
 from uuid import UUID
-from typing import TypeVar, Generic
+from typing import AsyncIterator, TypeVar, Generic
 from abc import ABC, abstractmethod
 from datetime import datetime
 
-from .models import UpdateModel, CommentUpdateModel, LikeUpdateModel
-from models.entity import Entity, Bookmark, Like, Comment
+from .models import UpdateModel, CommentUpdateModel, LikeUpdateModel, BulkItemResult, SearchLanguage
+from models.entity import Entity, Bookmark, Like, Comment, CommentThread, ContentRating, UserSummary
 
 
 TDocument = TypeVar("TDocument", bound=Entity)
@@ -24,6 +24,18 @@ class CUDServiceABC(ABC, Generic[TDocument, TUpdateModel]):
     async def delete(self, ids: list[UUID]) -> list[UUID]:
         pass
 
+    @abstractmethod
+    async def bulk_update(self, owner_id: UUID, entity_updates: list[TUpdateModel]) -> list[BulkItemResult]:
+        pass
+
+    @abstractmethod
+    async def bulk_upsert(self, owner_id: UUID, entities: list[TDocument]) -> list[BulkItemResult]:
+        pass
+
+    @abstractmethod
+    async def bulk_delete(self, owner_id: UUID, ids: list[UUID]) -> list[BulkItemResult]:
+        pass
+
 
 class ReadServiceABC(ABC, Generic[TDocument]):
     @abstractmethod
@@ -31,15 +43,21 @@ class ReadServiceABC(ABC, Generic[TDocument]):
         pass
 
     @abstractmethod
-    async def get_by_user(self, user_id: UUID) -> list[TDocument]:
+    async def get_by_user(self, user_id: UUID, page_size: int, cursor: str | None = None) -> list[TDocument]:
+        pass
+
+    @abstractmethod
+    async def get_by_timerange(
+        self, start: datetime, end: datetime, page_size: int, cursor: str | None = None
+    ) -> list[TDocument]:
         pass
 
     @abstractmethod
-    async def get_by_timerange(self, start: datetime, end: datetime) -> list[TDocument]:
+    def stream_by_timerange(self, start: datetime, end: datetime) -> AsyncIterator[bytes]:
         pass
 
     @abstractmethod
-    async def get_by_content_id(self, content_id: UUID) -> list[TDocument]:
+    async def get_by_content_id(self, content_id: UUID, page_size: int, cursor: str | None = None) -> list[TDocument]:
         pass
 
 
@@ -52,8 +70,43 @@ class LikeServiceABC(CUDServiceABC[Like, LikeUpdateModel], ReadServiceABC[Like])
     async def get_avg_content_rate(self, content_id: UUID) -> float:
         pass
 
+    @abstractmethod
+    async def get_content_rating(self, content_id: UUID) -> ContentRating:
+        pass
+
+    @abstractmethod
+    async def reconcile_ratings(self) -> None:
+        pass
+
 
 class CommentServiceABC(CUDServiceABC[Comment, CommentUpdateModel], ReadServiceABC[Comment]):
     @abstractmethod
-    async def search_by_text(self, term: str) -> list[Comment]:
+    async def search_by_text(
+        self,
+        term: str,
+        page_size: int,
+        cursor: str | None = None,
+        content_id: UUID | None = None,
+        language: SearchLanguage | None = None,
+    ) -> tuple[list[Comment], str | None]:
+        pass
+
+    @abstractmethod
+    async def get_thread(self, comment_id: UUID, max_depth: int, limit: int) -> list[Comment]:
+        pass
+
+    @abstractmethod
+    async def get_content_threads(
+        self, content_id: UUID, page_size: int, cursor: str | None = None, replies: int = 3
+    ) -> list[CommentThread]:
+        pass
+
+
+class UserSummaryServiceABC(ABC):
+    @abstractmethod
+    async def get(self, user_id: UUID) -> UserSummary:
+        pass
+
+    @abstractmethod
+    async def rebuild(self) -> None:
         pass
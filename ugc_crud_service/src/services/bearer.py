@@ -1,29 +1,135 @@
 import http
-from typing import Optional
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
 
-from jose import jwt
+from jose import jwt, JWTError
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from core.config import settings
 
 
+def _decode_jose(token: str) -> dict:
+    return jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+
+
+def _select_decoder() -> tuple[str, Callable[[str], dict], tuple[type[Exception], ...]]:
+    """Имя библиотеки, функция проверки подписи и исключения, означающие невалидный токен"""
+    if settings.jwt_backend == "pyjwt":
+        try:
+            import jwt as pyjwt
+        except ImportError:
+            logging.warning("PyJWT is not installed, falling back to python-jose")
+        else:
+            def decode_pyjwt(token: str) -> dict:
+                return pyjwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+
+            return "pyjwt", decode_pyjwt, (pyjwt.InvalidTokenError, JWTError)
+    return "jose", _decode_jose, (JWTError,)
+
+
+jwt_backend, _decode, _invalid_token_errors = _select_decoder()
+
+
+class AuthMetrics:
+    """Счётчики кэша токенов и время проверки подписи"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.verify_time_total = 0.0
+        self.verify_time_max = 0.0
+
+    def observe_verification(self, elapsed: float) -> None:
+        self.verify_time_total += elapsed
+        self.verify_time_max = max(self.verify_time_max, elapsed)
+
+    def snapshot(self) -> dict[str, float | str]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "verify_time_avg_ms": round(self.verify_time_total / self.misses * 1000, 3) if self.misses else 0.0,
+            "verify_time_max_ms": round(self.verify_time_max * 1000, 3),
+            "backend": jwt_backend,
+        }
+
+
+auth_metrics = AuthMetrics()
+
+
+class ClaimsCache:
+    """
+    LRU-кэш содержимого проверенных токенов.
+    Ключ — SHA-256 токена, чтобы не держать в памяти сами токены.
+    Запись живёт до exp токена, но не дольше ttl.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, claims = item
+        if expires_at <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return claims
+
+    def set(self, key: bytes, claims: dict) -> None:
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        self._items[key] = (expires_at, claims)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
+claims_cache = ClaimsCache(settings.jwt_cache_size, settings.jwt_cache_ttl_sec)
+
+
 def decode_token(token: str) -> Optional[dict]:
     """
     Функция декодирует токен, используя секретный ключ,
     сохранённый в объекте settings в поле jwt_secret_key.
     Возвращает содержимое токена в виде словаря или None,
-    если токен невалиден или при декодировании
-    было выброшено исключение.
+    если токен невалиден.
+    Проверенные токены кэшируются, невалидные — нет,
+    чтобы поток мусорных токенов не вытеснял рабочие.
     """
+    key = claims_cache.key(token)
+    claims = claims_cache.get(key)
+    if claims is not None:
+        auth_metrics.hits += 1
+        return claims
+
+    auth_metrics.misses += 1
+    started = time.perf_counter()
     try:
-        return jwt.decode(
-            token,
-            settings.jwt_secret_key,
-            algorithms=[settings.jwt_algorithm],
-        )
-    except Exception:
+        claims = _decode(token)
+    except _invalid_token_errors:
+        auth_metrics.failures += 1
         return None
+    finally:
+        auth_metrics.observe_verification(time.perf_counter() - started)
+    claims_cache.set(key, claims)
+    return claims
 
 
 class JWTBearer(HTTPBearer):
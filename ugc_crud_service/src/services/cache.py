@@ -0,0 +1,88 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from pydantic import TypeAdapter
+
+from core.config import settings
+from db.cache import get_cache_storage
+
+
+T = TypeVar("T")
+
+CACHE_KEY_PREFIX = "ugc"
+
+
+def content_page_key(model_name: str, content_id: Any) -> str:
+    """Ключ первой страницы записей фильма (размер страницы по умолчанию)"""
+    return f"{CACHE_KEY_PREFIX}:{model_name}:content:{content_id}"
+
+
+def content_rating_key(content_id: Any) -> str:
+    return f"{CACHE_KEY_PREFIX}:ContentRating:{content_id}"
+
+
+def generation_key(key: str) -> str:
+    return f"{key}:generation"
+
+
+class ReadThroughCache:
+    """
+    Read-through кэш поверх CacheStorage.
+    Одновременные промахи по одному ключу внутри процесса ждут одну загрузку из Mongo,
+    а к TTL добавляется случайный разброс, чтобы ключи не истекали одновременно.
+    Сброс ключа увеличивает его поколение: загрузка, начатая до сброса (в том числе
+    в другой реплике), не запишет в кэш устаревшее значение.
+    """
+
+    def __init__(self, ttl: int, jitter: int):
+        self.ttl = ttl
+        self.jitter = jitter
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[T]], adapter: TypeAdapter) -> T:
+        storage = get_cache_storage()
+        if storage is None:
+            return await loader()
+
+        cached = await storage.get(key)
+        if cached is not None:
+            return adapter.validate_json(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(key, loader, adapter))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda done: self._forget_inflight(key, done))
+        # shield: отмена одного ожидающего запроса не отменяет загрузку для остальных
+        return await asyncio.shield(inflight)
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        keys = list(set(keys))
+        for key in keys:
+            # Следующие промахи ждут новую загрузку, а не начатую до сброса
+            self._inflight.pop(key, None)
+        storage = get_cache_storage()
+        if storage is not None:
+            # Поколение должно пережить любую загрузку, начатую до сброса
+            await storage.invalidate(keys, [generation_key(key) for key in keys], self.ttl + self.jitter)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[T]], adapter: TypeAdapter) -> T:
+        storage = get_cache_storage()
+        generation = await storage.get(generation_key(key))
+        value = await loader()
+        await storage.set_if_generation(
+            key, adapter.dump_json(value), self._expire(), generation_key(key), generation
+        )
+        return value
+
+    def _forget_inflight(self, key: str, done: asyncio.Future) -> None:
+        # После сброса ключа под ним может ждать уже новая загрузка
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+
+    def _expire(self) -> int:
+        return self.ttl + random.randint(0, self.jitter)
+
+
+read_through_cache = ReadThroughCache(ttl=settings.cache_ttl_sec, jitter=settings.cache_ttl_jitter_sec)
@@ -0,0 +1,39 @@
+import base64
+import binascii
+from uuid import UUID
+from datetime import datetime
+
+from exceptions.services import InvalidCursorError
+
+
+CURSOR_SEPARATOR = "|"
+
+
+def encode_cursor(created_at: datetime, id_: UUID) -> str:
+    """Курсор — позиция последней записи страницы по ключу (created_at, _id)"""
+    raw = f"{created_at.isoformat()}{CURSOR_SEPARATOR}{id_}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, id_ = raw.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(created_at), UUID(id_)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursorError(cursor)
+
+
+def encode_score_cursor(score: float, id_: UUID) -> str:
+    """Курсор полнотекстового поиска — позиция по ключу (textScore, _id)"""
+    raw = f"{score!r}{CURSOR_SEPARATOR}{id_}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        score, id_ = raw.split(CURSOR_SEPARATOR)
+        return float(score), UUID(id_)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursorError(cursor)
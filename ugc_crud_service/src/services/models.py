@@ -1,4 +1,5 @@
 from uuid import UUID
+from enum import StrEnum
 from datetime import datetime
 
 from pydantic import BaseModel, Field
@@ -16,4 +17,26 @@ class CommentUpdateModel(UpdateModel):
 
 
 class LikeUpdateModel(UpdateModel):
-    rate: int | None = Field(None, ge=0, le=10)
\ No newline at end of file
+    rate: int | None = Field(None, ge=0, le=10)
+
+
+class BulkItemStatus(StrEnum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    DUPLICATE = "duplicate"
+    CONFLICT = "conflict"
+    ERROR = "error"
+
+
+class BulkItemResult(BaseModel):
+    id: UUID
+    status: BulkItemStatus
+
+
+class SearchLanguage(StrEnum):
+    """Язык стемминга и стоп-слов поискового запроса (коды ISO 639-1, их понимает MongoDB)"""
+    RU = "ru"
+    EN = "en"
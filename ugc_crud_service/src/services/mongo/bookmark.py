@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from .mixin import MongoCUDMixin, MongoReadMixin
 from ..base import BookmarkServiceABC
 from ..models import UpdateModel
@@ -9,5 +11,6 @@ class MongoBookmarkService(MongoCUDMixin[Bookmark, UpdateModel], MongoReadMixin[
         super().__init__(Bookmark)
     
 
+@lru_cache()
 def get_bookmark_service() -> BookmarkServiceABC:
     return MongoBookmarkService()
@@ -1,19 +1,178 @@
-from .mixin import MongoCUDMixin, MongoReadMixin
+from uuid import UUID
+from functools import lru_cache
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ExecutionTimeout
+
+from .mixin import MongoCUDMixin, MongoReadMixin, as_uuid
 from ..base import CommentServiceABC
-from ..models import CommentUpdateModel
-from models.entity import Comment
+from ..models import CommentUpdateModel, SearchLanguage, BulkItemResult
+from ..cursor import decode_score_cursor, encode_score_cursor
+from models.entity import Comment, CommentThread
+from exceptions.services import SearchTimeoutError, NotFoundKeyError, InvalidParentError
+from core.config import settings
 
 
 class MongoCommentService(MongoCUDMixin[Comment, CommentUpdateModel], MongoReadMixin[Comment], CommentServiceABC):
+    # Место в ветке задаётся при создании: перенос под другого родителя оставил бы
+    # ancestors и depth всех ответов устаревшими
+    insert_only_fields = frozenset({"parent_id", "ancestors", "depth"})
+    # Ветка живёт в одном фильме (и на одном шарде): перенос комментария в другой фильм
+    # оторвал бы его от родителя и ответов
+    immutable_fields = frozenset({"content_id"})
+
     def __init__(self):
         super().__init__(Comment)
 
-    async def search_by_text(self, term: str) -> list[Comment]:
-        comments = await Comment.find_many({'$text': {'$search': term}}).to_list()
-        if not comments:
-            return []
-        return comments
-        
+    async def insert(self, entities: list[Comment]) -> list[Comment]:
+        await self._attach_to_parents(entities)
+        return await super().insert(entities)
+
+    async def bulk_upsert(self, owner_id: UUID, entities: list[Comment]) -> list[BulkItemResult]:
+        await self._attach_to_parents(entities)
+        return await super().bulk_upsert(owner_id, entities)
+
+    async def _blocked_deletes(self, ids: list[UUID]) -> set[UUID]:
+        """
+        Комментарии с ответами, которые не удаляются в том же запросе: иначе ancestors ответов
+        ссылались бы на отсутствующий документ. Ветку удаляют целиком, вместе с ответами.
+        """
+        encoded_ids = self.encoder.encode(ids)
+        referenced = await self.model.get_motor_collection().distinct(
+            "ancestors", {"ancestors": {"$in": encoded_ids}, "_id": {"$nin": encoded_ids}}
+        )
+        return set(ids).intersection(as_uuid(id_) for id_ in referenced)
+
+    async def get_thread(self, comment_id: UUID, max_depth: int, limit: int) -> list[Comment]:
+        """
+        Комментарий и его ответы не глубже max_depth уровней в порядке создания.
+        Поддерево выбирается одним запросом по индексу (ancestors, depth, created_at).
+        """
+        comment = await self.model.get(comment_id)
+        if not comment:
+            raise NotFoundKeyError([comment_id])
+        if limit == 1:
+            return [comment]
+        replies = await (
+            self.model.find({
+                "ancestors": self.encoder.encode(comment_id),
+                "depth": {"$lte": comment.depth + max_depth},
+                **self._shard_filter(content_id=comment.content_id),
+            })
+            .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+            .limit(limit - 1)
+            .to_list()
+        )
+        return [comment, *replies]
+
+    async def get_content_threads(
+        self, content_id: UUID, page_size: int, cursor: str | None = None, replies: int = 3
+    ) -> list[CommentThread]:
+        """
+        Страница корневых комментариев фильма и первые ответы на каждый из них.
+        Ответы на всю страницу выбираются одной агрегацией с $topN по корню.
+        """
+        roots = await self._find_page(
+            [self.model.content_id == content_id, {"parent_id": None}],
+            page_size, cursor, descending=True,
+        )
+        replies_by_root = {}
+        if roots and replies:
+            pipeline = [
+                {"$match": {
+                    "ancestors": {"$in": self.encoder.encode([root.id for root in roots])},
+                    "depth": 1,
+                    **self._shard_filter(content_id=content_id),
+                }},
+                {"$group": {
+                    "_id": {"$first": "$ancestors"},
+                    "replies": {"$topN": {
+                        "n": replies,
+                        "sortBy": {"created_at": ASCENDING, "_id": ASCENDING},
+                        "output": "$$ROOT",
+                    }},
+                }},
+            ]
+            groups = await self.model.get_motor_collection().aggregate(pipeline).to_list(length=None)
+            replies_by_root = {
+                as_uuid(group["_id"]): [self.model.model_validate(reply) for reply in group["replies"]]
+                for group in groups
+            }
+        return [CommentThread(comment=root, replies=replies_by_root.get(root.id, [])) for root in roots]
+
+    async def search_by_text(
+        self,
+        term: str,
+        page_size: int,
+        cursor: str | None = None,
+        content_id: UUID | None = None,
+        language: SearchLanguage | None = None,
+    ) -> tuple[list[Comment], str | None]:
+        """
+        Страница результатов по убыванию релевантности (textScore, затем _id).
+        Сортировка с лимитом держит в памяти только page_size лучших совпадений,
+        а maxTimeMS не даёт запросу по частому слову занять базу надолго.
+        """
+        text_query = {"$search": term}
+        if language:
+            text_query["$language"] = language.value
+        match = {"$text": text_query}
+        if content_id:
+            match["content_id"] = self.encoder.encode(content_id)
+        pipeline = [{"$match": match}, {"$addFields": {"score": {"$meta": "textScore"}}}]
+        if cursor:
+            pipeline.append({"$match": self._after_score_cursor_filter(cursor)})
+        pipeline += [
+            {"$sort": {"score": DESCENDING, "_id": ASCENDING}},
+            {"$limit": page_size},
+        ]
+        try:
+            documents = await self.model.get_motor_collection().aggregate(
+                pipeline, maxTimeMS=settings.search_max_time_ms
+            ).to_list(length=page_size)
+        except ExecutionTimeout:
+            raise SearchTimeoutError(term)
+
+        comments = [self.model.model_validate(document) for document in documents]
+        next_cursor = None
+        if len(documents) == page_size:
+            next_cursor = encode_score_cursor(documents[-1]["score"], comments[-1].id)
+        return comments, next_cursor
+
+    async def _attach_to_parents(self, comments: list[Comment]) -> None:
+        """Заполняет предков и глубину ответов по родительским комментариям одним запросом"""
+        parent_ids = list({comment.parent_id for comment in comments if comment.parent_id})
+        if not parent_ids:
+            return
+        parents = await self._find_fields(parent_ids, ["content_id", "ancestors", "depth"])
+        missing_ids = set(parent_ids).difference(parents)
+        if missing_ids:
+            raise NotFoundKeyError(missing_ids)
+        for comment in comments:
+            if not comment.parent_id:
+                continue
+            parent = parents[comment.parent_id]
+            parent_ancestors = [as_uuid(id_) for id_ in parent.get("ancestors", [])]
+            if comment.parent_id == comment.id or comment.id in parent_ancestors:
+                raise InvalidParentError(comment.parent_id, "it is the comment itself or one of its replies")
+            if as_uuid(parent["content_id"]) != comment.content_id:
+                raise InvalidParentError(comment.parent_id, "it belongs to another content")
+            depth = parent.get("depth", 0) + 1
+            if depth > settings.comment_thread_max_depth:
+                raise InvalidParentError(comment.parent_id, "the thread is too deep")
+            comment.ancestors = [*parent_ancestors, comment.parent_id]
+            comment.depth = depth
+
+    def _after_score_cursor_filter(self, cursor: str) -> dict:
+        score, id_ = decode_score_cursor(cursor)
+        return {
+            "$or": [
+                {"score": {"$lt": score}},
+                {"score": score, "_id": {"$gt": self.encoder.encode(id_)}},
+            ]
+        }
+
 
+@lru_cache()
 def get_comment_service() -> CommentServiceABC:
     return MongoCommentService()
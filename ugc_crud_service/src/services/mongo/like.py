@@ -1,24 +1,182 @@
+import logging
 from uuid import UUID
+from functools import lru_cache
+from collections import Counter, defaultdict
 
-from .mixin import MongoCUDMixin, MongoReadMixin
+from pydantic import TypeAdapter
+from pymongo import UpdateOne
+
+from .mixin import MongoCUDMixin, MongoReadMixin, as_uuid
 from ..base import LikeServiceABC
-from ..models import LikeUpdateModel
-from models.entity import Like
+from ..models import LikeUpdateModel, BulkItemResult, BulkItemStatus
+from ..cache import read_through_cache, content_rating_key
+from models.entity import Like, ContentRating
 from exceptions.services import NotFoundKeyError
+from core.config import settings
+
+CONTENT_RATING_ADAPTER = TypeAdapter(ContentRating)
+
+
+class RatingChanges:
+    """Накопитель приращений $inc для агрегатов ContentRating"""
+
+    def __init__(self):
+        self.increments: defaultdict[UUID, Counter] = defaultdict(Counter)
+
+    def add(self, content_id: UUID, rate: int, sign: int = 1):
+        increment = self.increments[content_id]
+        increment["rate_sum"] += sign * rate
+        increment["rate_count"] += sign
+        increment[f"histogram.{rate}"] += sign
+
+    def remove(self, content_id: UUID, rate: int):
+        self.add(content_id, rate, sign=-1)
+
+    def replace(self, previous: tuple[UUID, int], current: tuple[UUID, int]):
+        if previous != current:
+            self.remove(*previous)
+            self.add(*current)
+
+    def operations(self, encoder) -> list[UpdateOne]:
+        # reconciled_at новых агрегатов защищает их от удаления идущим параллельно пересчётом
+        now = settings.get_timezone_aware_now()
+        operations = []
+        for content_id, increment in self.increments.items():
+            inc = {field: value for field, value in increment.items() if value}
+            if inc:
+                operations.append(UpdateOne(
+                    {"_id": encoder.encode(content_id)},
+                    {"$inc": inc, "$setOnInsert": {"reconciled_at": now}},
+                    upsert=True,
+                ))
+        return operations
 
 
 class MongoLikeService(MongoCUDMixin[Like, LikeUpdateModel], MongoReadMixin[Like], LikeServiceABC):
     def __init__(self):
         super().__init__(Like)
 
+    async def insert(self, entities: list[Like]) -> list[Like]:
+        likes = await super().insert(entities)
+        changes = RatingChanges()
+        for like in likes:
+            changes.add(like.content_id, like.rate)
+        await self._apply_rating_changes(changes)
+        return likes
+
+    async def update(self, entity_update: LikeUpdateModel) -> Like:
+        previous, updated = await self._update(entity_update)
+        changes = RatingChanges()
+        changes.replace((previous.content_id, previous.rate), (updated.content_id, updated.rate))
+        await self._apply_rating_changes(changes)
+        return updated
+
+    async def delete(self, ids: list[UUID]) -> list[UUID]:
+        previous = await self._get_rates(ids)
+        deleted_ids = await super().delete(ids)
+        changes = RatingChanges()
+        for content_id, rate in previous.values():
+            changes.remove(content_id, rate)
+        await self._apply_rating_changes(changes)
+        return deleted_ids
+
+    async def bulk_update(self, owner_id: UUID, entity_updates: list[LikeUpdateModel]) -> list[BulkItemResult]:
+        previous = await self._get_rates([entity_update.id for entity_update in entity_updates], user_id=owner_id)
+        results = await super().bulk_update(owner_id, entity_updates)
+        changes = RatingChanges()
+        for entity_update, result in zip(entity_updates, results):
+            if result.status == BulkItemStatus.UPDATED:
+                if entity_update.id not in previous:
+                    self._log_unknown_previous(entity_update.id)
+                    continue
+                content_id, rate = previous[entity_update.id]
+                changes.replace(
+                    (content_id, rate),
+                    (entity_update.content_id or content_id, rate if entity_update.rate is None else entity_update.rate),
+                )
+        await self._apply_rating_changes(changes)
+        return results
+
+    async def bulk_upsert(self, owner_id: UUID, entities: list[Like]) -> list[BulkItemResult]:
+        previous = await self._get_rates([entity.id for entity in entities], user_id=owner_id)
+        results = await super().bulk_upsert(owner_id, entities)
+        changes = RatingChanges()
+        for entity, result in zip(entities, results):
+            if result.status == BulkItemStatus.INSERTED:
+                changes.add(entity.content_id, entity.rate)
+            elif result.status == BulkItemStatus.UPDATED:
+                if entity.id not in previous:
+                    self._log_unknown_previous(entity.id)
+                    continue
+                changes.replace(previous[entity.id], (entity.content_id, entity.rate))
+        await self._apply_rating_changes(changes)
+        return results
+
+    async def bulk_delete(self, owner_id: UUID, ids: list[UUID]) -> list[BulkItemResult]:
+        previous = await self._get_rates(ids, user_id=owner_id)
+        results = await super().bulk_delete(owner_id, ids)
+        changes = RatingChanges()
+        for result in results:
+            if result.status == BulkItemStatus.DELETED:
+                if result.id not in previous:
+                    self._log_unknown_previous(result.id)
+                    continue
+                changes.remove(*previous[result.id])
+        await self._apply_rating_changes(changes)
+        return results
+
     async def get_avg_content_rate(self, content_id: UUID) -> float:
-        avg_rate = await Like.find(
-            Like.content_id == content_id
-        ).avg(Like.rate)
-        if not avg_rate:
-            raise NotFoundKeyError([content_id])
-        return avg_rate
+        rating = await self.get_content_rating(content_id)
+        return rating.rate_sum / rating.rate_count
+
+    async def get_content_rating(self, content_id: UUID) -> ContentRating:
+        async def load() -> ContentRating:
+            rating = await ContentRating.get(content_id)
+            if not rating or not rating.rate_count:
+                raise NotFoundKeyError([content_id])
+            return rating
+
+        return await read_through_cache.get_or_load(
+            content_rating_key(content_id), load, CONTENT_RATING_ADAPTER
+        )
+
+    async def reconcile_ratings(self) -> None:
+        """
+        Полный пересчёт агрегатов по коллекции лайков.
+        Агрегаты фильмов, у которых не осталось лайков, удаляются.
+        """
+        started_at = settings.get_timezone_aware_now()
+        pipeline = [
+            {"$group": {"_id": {"content_id": "$content_id", "rate": "$rate"}, "count": {"$sum": 1}}},
+            {"$group": {
+                "_id": "$_id.content_id",
+                "rate_sum": {"$sum": {"$multiply": ["$_id.rate", "$count"]}},
+                "rate_count": {"$sum": "$count"},
+                "histogram": {"$push": {"k": {"$toString": "$_id.rate"}, "v": "$count"}},
+            }},
+            {"$set": {"histogram": {"$arrayToObject": "$histogram"}, "reconciled_at": started_at}},
+            {"$merge": {"into": ContentRating.get_collection_name(), "whenMatched": "replace"}},
+        ]
+        await Like.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        await ContentRating.get_motor_collection().delete_many({"reconciled_at": {"$lt": started_at}})
+
+    async def _get_rates(self, ids: list[UUID], **shard_hint: UUID) -> dict[UUID, tuple[UUID, int]]:
+        documents = await self._find_fields(ids, ["content_id", "rate"], **shard_hint)
+        return {id_: (as_uuid(document["content_id"]), document["rate"]) for id_, document in documents.items()}
+
+    @staticmethod
+    def _log_unknown_previous(id_: UUID) -> None:
+        # Документ создан параллельно уже после чтения прежних оценок: запись выполнена,
+        # а агрегат поправит периодический пересчёт
+        logging.warning("Previous rate of like %s is unknown, leaving it to reconciliation", id_)
+
+    async def _apply_rating_changes(self, changes: RatingChanges) -> None:
+        operations = changes.operations(self.encoder)
+        if operations:
+            await ContentRating.get_motor_collection().bulk_write(operations, ordered=False)
+            await read_through_cache.invalidate(content_rating_key(content_id) for content_id in changes.increments)
     
 
+@lru_cache()
 def get_like_service() -> LikeServiceABC:
     return MongoLikeService()
@@ -1,14 +1,25 @@
+import json
 from uuid import UUID
-from typing import TypeVar, Generic, Type, Iterable
+from typing import Any, AsyncIterator, TypeVar, Generic, Type, Iterable
 from datetime import datetime
+from collections import Counter
+from functools import cache
 
 from beanie import UpdateResponse
 from beanie.operators import In 
+from beanie.odm.utils.encoder import Encoder
+from bson import Binary
+from pydantic import TypeAdapter
+from pymongo import ASCENDING, DESCENDING, DeleteOne, UpdateOne
 from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from ..models import UpdateModel
+from ..models import UpdateModel, BulkItemResult, BulkItemStatus
 from models.entity import Entity
-from exceptions.services import DuplicateError, NotFoundKeyError
+from exceptions.services import DuplicateError, NotFoundKeyError, ImmutableFieldError, DeleteConflictError
+from ..cursor import decode_cursor
+from ..cache import read_through_cache, content_page_key
+from .summary import UserSummaryUpdater
+from core.config import settings
 
 
 DUPLICATE_KEY_ERROR_CODE = 11000
@@ -18,15 +29,63 @@ TDocument = TypeVar("TDocument", bound=Entity)
 TUpdateModel = TypeVar("TUpdateModel", bound=UpdateModel)
 
 
+def as_uuid(value: UUID | Binary) -> UUID:
+    """Сырые документы Motor без uuidRepresentation содержат UUID в виде bson.Binary"""
+    return value.as_uuid() if isinstance(value, Binary) else value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Binary):
+        return str(value.as_uuid())
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson_line(document: dict) -> bytes:
+    """Сериализует сырой BSON-документ в строку NDJSON в том же виде, что и JSON-ответ API"""
+    return (json.dumps(document, default=_json_default, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def get_shard_key_fields(model: Type[Entity]) -> tuple[str, ...]:
+    if not settings.mongo_sharding_enabled:
+        return ()
+    return tuple(settings.mongo_shard_keys.get(model.__name__, {}))
+
+
+@cache
+def list_adapter(model: Type[Entity]) -> TypeAdapter:
+    """Адаптер списка документов для кэша страниц: строится один раз на модель"""
+    return TypeAdapter(list[model])
+
+
+# Поля, которые нельзя менять через $set при массовых операциях
+BULK_IMMUTABLE_FIELDS = {"_id", "id", "user_id", "revision_id"}
+
+
 class MongoCUDMixin(Generic[TDocument, TUpdateModel]):
+    # Поля, которые bulk_upsert записывает только при вставке документа
+    insert_only_fields: frozenset[str] = frozenset()
+    # Поля, которые нельзя менять у существующего документа
+    immutable_fields: frozenset[str] = frozenset()
+
     def __init__(self, model: Type[TDocument]):
         self.model = model 
+        self.encoder = Encoder(to_db=True, exclude=BULK_IMMUTABLE_FIELDS)
+        self.shard_key_fields = get_shard_key_fields(model)
+        self.summary = UserSummaryUpdater(model)
 
     async def insert(self, entities: list[TDocument]) -> list[TDocument]:
         try:
             await self.model.insert_many(entities)
+            await self._invalidate_content([entity.content_id for entity in entities])
+            await self.summary.added(entities)
             return entities
         except BulkWriteError as bwe:
+            await self._invalidate_content([entity.content_id for entity in entities])
+            await self.summary.refresh(entity.user_id for entity in entities)
             write_errors = bwe.details.get("writeErrors", [])
             for error in write_errors:
                 if error.get("code") == DUPLICATE_KEY_ERROR_CODE:
@@ -35,32 +94,231 @@ class MongoCUDMixin(Generic[TDocument, TUpdateModel]):
             raise bwe
         
     async def delete(self, ids: list[UUID]) -> list[UUID]:
-        nonexistent_ids = await self._get_nonexistent_ids(ids)
+        documents = await self._find_fields(ids, ["user_id", "content_id"])
+        nonexistent_ids = set(ids).difference(documents)
         if nonexistent_ids:
             raise NotFoundKeyError(nonexistent_ids)
+        blocked_ids = await self._blocked_deletes(ids)
+        if blocked_ids:
+            raise DeleteConflictError(blocked_ids)
         await self.model.find_many(In(self.model.id, ids)).delete_many()
+        await self._invalidate_content(as_uuid(document["content_id"]) for document in documents.values())
+        await self.summary.removed(Counter(as_uuid(document["user_id"]) for document in documents.values()))
         return ids
 
-    async def _get_nonexistent_ids(self, ids: list[UUID]) -> Iterable[UUID]:
-        existing_entities = await self.model.find_many(In(self.model.id, ids)).to_list()
-        if len(existing_entities) == len(ids):
-            return []
-        existing_ids = [entity.id for entity in existing_entities]
-        nonexistent_ids = set(ids).difference(existing_ids)
-        return nonexistent_ids
+    async def _blocked_deletes(self, ids: list[UUID]) -> set[UUID]:
+        """Документы из ids, которые нельзя удалить вместе с остальными; по умолчанию таких нет"""
+        return set()
+
+    async def _reject_immutable_changes(self, changes: dict[UUID, dict[str, Any]]) -> None:
+        """Запрещает менять immutable_fields у существующих документов; changes — новые значения по _id"""
+        changes = {
+            id_: {field: value for field, value in mapping.items() if field in self.immutable_fields}
+            for id_, mapping in changes.items()
+        }
+        changes = {id_: mapping for id_, mapping in changes.items() if mapping}
+        if not changes:
+            return
+        documents = await self._find_fields(list(changes), list(self.immutable_fields))
+        for field in self.immutable_fields:
+            changed_ids = [
+                id_ for id_, mapping in changes.items()
+                if field in mapping and id_ in documents
+                and as_uuid(documents[id_].get(field)) != mapping[field]
+            ]
+            if changed_ids:
+                raise ImmutableFieldError(field, changed_ids)
+
+    async def _get_owned_content(
+        self, ids: list[UUID], **shard_hint: UUID
+    ) -> tuple[dict[UUID, UUID], dict[UUID, UUID]]:
+        """Владельцы и фильмы существующих документов одним запросом с проекцией"""
+        documents = await self._find_fields(ids, ["user_id", "content_id"], **shard_hint)
+        owners = {id_: as_uuid(document["user_id"]) for id_, document in documents.items()}
+        contents = {id_: as_uuid(document["content_id"]) for id_, document in documents.items()}
+        return owners, contents
+
+    async def _invalidate_content(self, content_ids: Iterable[UUID]) -> None:
+        """Сбрасывает кэш первых страниц затронутых фильмов"""
+        await read_through_cache.invalidate(
+            content_page_key(self.model.__name__, content_id) for content_id in content_ids
+        )
+
+    async def _find_fields(self, ids: list[UUID], fields: list[str], **shard_hint: UUID) -> dict[UUID, dict]:
+        """
+        Загружает по _id только перечисленные поля.
+        shard_hint — известные значения полей (например, user_id владельца): если среди них есть
+        ключ шардирования, запрос уходит на один шард. Чужие документы при этом не находятся.
+        """
+        cursor = self.model.get_motor_collection().find(
+            {"_id": {"$in": self.encoder.encode(ids)}, **self._shard_filter(**shard_hint)},
+            projection=dict.fromkeys(["_id", *fields], 1),
+        )
+        return {as_uuid(document["_id"]): document async for document in cursor}
 
     async def update(self, entity_update: TUpdateModel) -> TDocument:
+        _, updated = await self._update(entity_update)
+        return updated
+
+    async def _update(self, entity_update: TUpdateModel) -> tuple[TDocument, TDocument]:
+        """Обновляет документ за один find_one_and_update и возвращает его состояние до и после"""
         try:
-            entity = await self.model.get(entity_update.id)
-            if not entity:
+            update_mapping = entity_update.model_dump(exclude_unset=True, exclude={"id"})
+            await self._reject_immutable_changes({entity_update.id: update_mapping})
+            previous_document = (await self.model.find_one(self.model.id == entity_update.id)
+                                 .update_one({"$set": update_mapping}, response_type=UpdateResponse.OLD_DOCUMENT))
+            if not previous_document:
                 raise NotFoundKeyError([entity_update.id])
-            update_mapping = entity_update.model_dump(exclude_unset=True)
-            updated_document = (await self.model.find_one(self.model.id == entity_update.id)
-                                .update_one({"$set": update_mapping}, response_type=UpdateResponse.NEW_DOCUMENT))
-            return self.model(**updated_document.model_dump())
+            previous = self.model(**previous_document.model_dump())
+            updated = self.model(**{**previous.model_dump(), **update_mapping})
+            await self._invalidate_content({previous.content_id, updated.content_id})
+            if (previous.user_id, previous.created_at) != (updated.user_id, updated.created_at):
+                await self.summary.refresh({previous.user_id, updated.user_id})
+            return previous, updated
         except DuplicateKeyError:
             collection_name = self.model.__name__
             raise DuplicateError(collection_name)
+
+    async def bulk_update(self, owner_id: UUID, entity_updates: list[TUpdateModel]) -> list[BulkItemResult]:
+        await self._reject_immutable_changes({
+            entity_update.id: entity_update.model_dump(exclude_unset=True) for entity_update in entity_updates
+        })
+        owners, contents = await self._get_owned_content(
+            [entity_update.id for entity_update in entity_updates], user_id=owner_id
+        )
+        operations = {}
+        for index, entity_update in enumerate(entity_updates):
+            if owners.get(entity_update.id) != owner_id:
+                continue
+            update_mapping = self.encoder.encode(
+                entity_update.model_dump(exclude_unset=True, exclude=BULK_IMMUTABLE_FIELDS))
+            operations[index] = UpdateOne(
+                self._owner_filter(entity_update.id, owner_id, content_id=contents[entity_update.id]),
+                {"$set": update_mapping},
+            )
+
+        statuses = await self._bulk_write(operations, BulkItemStatus.UPDATED)
+        await self._invalidate_content([
+            *(contents[entity_updates[index].id] for index in operations),
+            *(entity_updates[index].content_id for index in operations if entity_updates[index].content_id),
+        ])
+        if any(entity_updates[index].created_at for index in operations):
+            await self.summary.refresh([owner_id])
+        return [
+            BulkItemResult(id=entity_update.id, status=statuses.get(index) or self._missing_status(
+                owners, entity_update.id))
+            for index, entity_update in enumerate(entity_updates)
+        ]
+
+    async def bulk_upsert(self, owner_id: UUID, entities: list[TDocument]) -> list[BulkItemResult]:
+        # Отсутствие документа определяется по результату записи: upsert по чужому _id падает
+        # на уникальности _id. В фильтр попадают только неизменяемые поля ключа шардирования,
+        # иначе смена значения у своего документа тоже выглядела бы как дубликат
+        await self._reject_immutable_changes({
+            entity.id: {field: getattr(entity, field) for field in self.immutable_fields} for entity in entities
+        })
+        operations = {
+            index: UpdateOne(
+                self._owner_filter(
+                    entity.id, owner_id, **{field: getattr(entity, field) for field in self.immutable_fields}
+                ),
+                self._upsert_update(entity),
+                upsert=True,
+            )
+            for index, entity in enumerate(entities)
+        }
+        statuses = await self._bulk_write(operations, BulkItemStatus.UPDATED)
+        await self._mark_foreign_duplicates(owner_id, entities, statuses)
+        # Смена content_id у существующего документа оставит старый фильм в кэше до истечения TTL
+        await self._invalidate_content([entity.content_id for entity in entities])
+        # Обновлённые записи могли сменить created_at, поэтому раздел сводки перечитывается целиком
+        if statuses:
+            await self.summary.refresh([owner_id])
+        return [BulkItemResult(id=entity.id, status=statuses[index]) for index, entity in enumerate(entities)]
+
+    async def _mark_foreign_duplicates(
+        self, owner_id: UUID, entities: list[TDocument], statuses: dict[int, BulkItemStatus]
+    ) -> None:
+        """Дубликаты _id чужих документов отмечаются как forbidden, как в bulk_update и bulk_delete"""
+        duplicate_ids = [
+            entities[index].id for index, status in statuses.items() if status == BulkItemStatus.DUPLICATE
+        ]
+        if not duplicate_ids:
+            return
+        documents = await self._find_fields(duplicate_ids, ["user_id"])
+        for index, status in statuses.items():
+            document = documents.get(entities[index].id)
+            if status == BulkItemStatus.DUPLICATE and document and as_uuid(document["user_id"]) != owner_id:
+                statuses[index] = BulkItemStatus.FORBIDDEN
+
+    def _upsert_update(self, entity: TDocument) -> dict:
+        document = self.encoder.encode(entity)
+        update = {"$set": {key: value for key, value in document.items() if key not in self.insert_only_fields}}
+        on_insert = {key: value for key, value in document.items() if key in self.insert_only_fields}
+        if on_insert:
+            update["$setOnInsert"] = on_insert
+        return update
+
+    async def bulk_delete(self, owner_id: UUID, ids: list[UUID]) -> list[BulkItemResult]:
+        owners, contents = await self._get_owned_content(ids, user_id=owner_id)
+        owned_ids = [id_ for id_ in ids if owners.get(id_) == owner_id]
+        blocked_ids = await self._blocked_deletes(owned_ids) if owned_ids else set()
+        operations = {
+            index: DeleteOne(self._owner_filter(id_, owner_id, content_id=contents[id_]))
+            for index, id_ in enumerate(ids)
+            if owners.get(id_) == owner_id and id_ not in blocked_ids
+        }
+        statuses = await self._bulk_write(operations, BulkItemStatus.DELETED)
+        statuses.update({index: BulkItemStatus.CONFLICT for index, id_ in enumerate(ids) if id_ in blocked_ids})
+        await self._invalidate_content(contents[ids[index]] for index in operations)
+        deleted = sum(status == BulkItemStatus.DELETED for status in statuses.values())
+        await self.summary.removed(Counter({owner_id: deleted}))
+        return [
+            BulkItemResult(id=id_, status=statuses.get(index) or self._missing_status(owners, id_))
+            for index, id_ in enumerate(ids)
+        ]
+
+    async def _bulk_write(self, operations: dict[int, Any], status: BulkItemStatus) -> dict[int, BulkItemStatus]:
+        """
+        Выполняет операции одним неупорядоченным bulk_write.
+        Принимает операции по позиции элемента в запросе и возвращает статусы по тем же позициям.
+        """
+        if not operations:
+            return {}
+        positions = list(operations)
+        statuses = dict.fromkeys(positions, status)
+        try:
+            result = await self.model.get_motor_collection().bulk_write(list(operations.values()), ordered=False)
+            upserted_indexes = result.upserted_ids.keys()
+        except BulkWriteError as bwe:
+            upserted_indexes = [upserted["index"] for upserted in bwe.details.get("upserted", [])]
+            for error in bwe.details.get("writeErrors", []):
+                is_duplicate = error.get("code") == DUPLICATE_KEY_ERROR_CODE
+                statuses[positions[error["index"]]] = (
+                    BulkItemStatus.DUPLICATE if is_duplicate else BulkItemStatus.ERROR
+                )
+        for index in upserted_indexes:
+            statuses[positions[index]] = BulkItemStatus.INSERTED
+        return statuses
+
+    def _owner_filter(self, id_: UUID, owner_id: UUID, **shard_hint: UUID) -> dict:
+        return {
+            "_id": self.encoder.encode(id_),
+            "user_id": self.encoder.encode(owner_id),
+            **self._shard_filter(**shard_hint),
+        }
+
+    def _shard_filter(self, **known: UUID) -> dict:
+        """Условия на поля ключа шардирования, значения которых известны заранее"""
+        return {
+            field: self.encoder.encode(known[field])
+            for field in self.shard_key_fields
+            if known.get(field) is not None
+        }
+
+    @staticmethod
+    def _missing_status(owners: dict[UUID, UUID], id_: UUID) -> BulkItemStatus:
+        return BulkItemStatus.FORBIDDEN if id_ in owners else BulkItemStatus.NOT_FOUND
         
 
 class MongoReadMixin(Generic[TDocument]):
@@ -73,20 +331,78 @@ class MongoReadMixin(Generic[TDocument]):
             raise NotFoundKeyError(ids)
         return entities
 
-    async def get_by_user(self, user_id: UUID) -> list[TDocument]:
-        user_entities = await self.model.find(self.model.user_id == user_id).to_list()
-        if not user_entities:
-            return []
-        return user_entities
-
-    async def get_by_timerange(self, start: datetime, end: datetime) -> list[TDocument]:
-        timerange_entities = await self.model.find(self.model.created_at >= start, self.model.created_at < end).to_list()
-        if not timerange_entities:
-            return []
-        return timerange_entities
+    async def get_by_user(
+        self, user_id: UUID, page_size: int, cursor: str | None = None
+    ) -> list[TDocument]:
+        return await self._find_page(
+            [self.model.user_id == user_id], page_size, cursor, descending=True
+        )
+
+    async def get_by_timerange(
+        self, start: datetime, end: datetime, page_size: int, cursor: str | None = None
+    ) -> list[TDocument]:
+        return await self._find_page(
+            [self.model.created_at >= start, self.model.created_at < end], page_size, cursor, descending=False
+        )
     
-    async def get_by_content_id(self, content_id: UUID) -> list[TDocument]:
-        content_entities = await self.model.find(self.model.content_id == content_id).to_list()
-        if not content_entities:
-            return []
-        return content_entities
+    async def get_by_content_id(
+        self, content_id: UUID, page_size: int, cursor: str | None = None
+    ) -> list[TDocument]:
+        async def load() -> list[TDocument]:
+            return await self._find_page(
+                [self.model.content_id == content_id], page_size, cursor, descending=True
+            )
+
+        # Кэшируется только первая страница стандартного размера — её и читают чаще всего
+        if cursor or page_size != settings.page_size_default:
+            return await load()
+        return await read_through_cache.get_or_load(
+            content_page_key(self.model.__name__, content_id), load, list_adapter(self.model)
+        )
+
+    async def stream_by_timerange(self, start: datetime, end: datetime) -> AsyncIterator[bytes]:
+        """
+        Построчная выгрузка без создания моделей Beanie:
+        документы читаются курсором Motor пачками и сразу сериализуются.
+        """
+        cursor = self.model.get_motor_collection().find(
+            {"created_at": {"$gte": start, "$lt": end}},
+            projection=self._stream_projection(),
+            sort=[("created_at", ASCENDING), ("_id", ASCENDING)],
+            batch_size=settings.stream_batch_size,
+        )
+        async for document in cursor:
+            yield to_ndjson_line(document)
+
+    def _stream_projection(self) -> dict:
+        fields = {field.alias or name for name, field in self.model.model_fields.items()}
+        fields.discard("revision_id")
+        return dict.fromkeys(fields, 1)
+
+    async def _find_page(
+        self, filters: list, page_size: int, cursor: str | None, descending: bool
+    ) -> list[TDocument]:
+        """
+        Keyset-пагинация по (created_at, _id): следующая страница начинается
+        строго после последней записи предыдущей, без skip.
+        """
+        if cursor:
+            filters = [*filters, self._after_cursor_filter(cursor, descending)]
+        direction = DESCENDING if descending else ASCENDING
+        return await (
+            self.model.find(*filters)
+            .sort([("created_at", direction), ("_id", direction)])
+            .limit(page_size)
+            .to_list()
+        )
+
+    @staticmethod
+    def _after_cursor_filter(cursor: str, descending: bool) -> dict:
+        created_at, id_ = decode_cursor(cursor)
+        operator = "$lt" if descending else "$gt"
+        return {
+            "$or": [
+                {"created_at": {operator: created_at}},
+                {"created_at": created_at, "_id": {operator: id_}},
+            ]
+        }
@@ -0,0 +1,120 @@
+from uuid import UUID
+from typing import Iterable, Type
+from functools import lru_cache
+from collections import Counter, defaultdict
+
+from beanie.odm.utils.encoder import Encoder
+from pymongo import DESCENDING, UpdateOne
+
+from ..base import UserSummaryServiceABC
+from models.entity import Entity, Like, Bookmark, Comment, UserSummary, RecentItem
+from core.config import settings
+
+
+# Раздел сводки для каждой коллекции UGC
+SUMMARY_SECTIONS = {Like.__name__: "likes", Bookmark.__name__: "bookmarks", Comment.__name__: "comments"}
+
+
+class UserSummaryUpdater:
+    """
+    Поддерживает раздел сводки пользователя для одной коллекции:
+    вставки добавляют записи через $inc и $push с $sort/$slice,
+    удаления и прочие изменения перечитывают последние записи индексированным запросом.
+    """
+
+    def __init__(self, model: Type[Entity]):
+        self.model = model
+        self.section = SUMMARY_SECTIONS[model.__name__]
+        self.encoder = Encoder(to_db=True)
+
+    async def added(self, entities: Iterable[Entity]) -> None:
+        by_user: defaultdict[UUID, list[RecentItem]] = defaultdict(list)
+        for entity in entities:
+            by_user[entity.user_id].append(RecentItem(id=entity.id, created_at=entity.created_at))
+        await self._write([
+            UpdateOne(
+                {"_id": self.encoder.encode(user_id)},
+                {
+                    "$inc": {f"{self.section}.count": len(items)},
+                    "$push": {f"{self.section}.recent": {
+                        "$each": self.encoder.encode(items),
+                        "$sort": {"created_at": DESCENDING},
+                        "$slice": settings.user_summary_recent_size,
+                    }},
+                },
+                upsert=True,
+            )
+            for user_id, items in by_user.items()
+        ])
+
+    async def removed(self, counts: Counter[UUID]) -> None:
+        await self._write([
+            UpdateOne(
+                {"_id": self.encoder.encode(user_id)},
+                {
+                    "$inc": {f"{self.section}.count": -count},
+                    "$set": {f"{self.section}.recent": await self._recent(user_id)},
+                },
+                upsert=True,
+            )
+            for user_id, count in counts.items()
+            if count
+        ])
+
+    async def refresh(self, user_ids: Iterable[UUID]) -> None:
+        """Пересчитывает раздел целиком: после частичных ошибок записи или смены владельца и даты"""
+        operations = []
+        for user_id in set(user_ids):
+            count = await self.model.get_motor_collection().count_documents(
+                {"user_id": self.encoder.encode(user_id)}
+            )
+            operations.append(UpdateOne(
+                {"_id": self.encoder.encode(user_id)},
+                {"$set": {f"{self.section}.count": count, f"{self.section}.recent": await self._recent(user_id)}},
+                upsert=True,
+            ))
+        await self._write(operations)
+
+    async def _recent(self, user_id: UUID) -> list[dict]:
+        cursor = self.model.get_motor_collection().find(
+            {"user_id": self.encoder.encode(user_id)},
+            projection={"_id": 1, "created_at": 1},
+            sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+            limit=settings.user_summary_recent_size,
+        )
+        return [{"id": document["_id"], "created_at": document["created_at"]} async for document in cursor]
+
+    @staticmethod
+    async def _write(operations: list[UpdateOne]) -> None:
+        if operations:
+            await UserSummary.get_motor_collection().bulk_write(operations, ordered=False)
+
+
+class MongoUserSummaryService(UserSummaryServiceABC):
+    async def get(self, user_id: UUID) -> UserSummary:
+        summary = await UserSummary.get(user_id)
+        return summary or UserSummary(id=user_id)
+
+    async def rebuild(self) -> None:
+        """Полный пересчёт сводок по всем коллекциям UGC, по одному разделу за проход"""
+        for model in (Like, Bookmark, Comment):
+            section = SUMMARY_SECTIONS[model.__name__]
+            pipeline = [
+                {"$group": {
+                    "_id": "$user_id",
+                    "count": {"$sum": 1},
+                    "recent": {"$topN": {
+                        "n": settings.user_summary_recent_size,
+                        "sortBy": {"created_at": DESCENDING, "_id": DESCENDING},
+                        "output": {"id": "$_id", "created_at": "$created_at"},
+                    }},
+                }},
+                {"$project": {section: {"count": "$count", "recent": "$recent"}}},
+                {"$merge": {"into": UserSummary.get_collection_name(), "whenMatched": "merge"}},
+            ]
+            await model.get_motor_collection().aggregate(pipeline).to_list(length=None)
+
+
+@lru_cache()
+def get_user_summary_service() -> UserSummaryServiceABC:
+    return MongoUserSummaryService()
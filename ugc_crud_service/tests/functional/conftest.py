@@ -27,3 +27,25 @@ def fetch(aiohttp_client):
         async with aiohttp_client.get(settings.get_base_api_url() + url_path, headers=headers) as response:
             return (response.status, await response.json())
     return _fetch
+
+
+@pytest.fixture
+def fetch_page(aiohttp_client):
+    async def _fetch_page(url_path, params):
+        headers = {"Authorization": f"Bearer {settings.user_token}"}
+        async with aiohttp_client.get(
+            settings.get_base_api_url() + url_path, params=params, headers=headers
+        ) as response:
+            return (response.status, await response.json(), response.headers.get("X-Next-Cursor"))
+    return _fetch_page
+
+
+@pytest.fixture
+def send(aiohttp_client):
+    async def _send(method, url_path, payload):
+        headers = {"Authorization": f"Bearer {settings.user_token}"}
+        async with aiohttp_client.request(
+            method, settings.get_base_api_url() + url_path, json=payload, headers=headers
+        ) as response:
+            return (response.status, await response.json())
+    return _send
@@ -1,6 +1,10 @@
+import json
+
 import pytest
 from http.client import OK
 
+from ..settings import settings
+
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
@@ -23,4 +27,23 @@ async def test_timerange_search(start_date, end_date, expected_status, expected_
     assert status == expected_status
     if expected_status == OK:
         assert len(bookmarks) == expected_bookmark_num
-        assert all([(start_date <= bookmark["created_at"] < end_date) for bookmark in bookmarks])
\ No newline at end of file
+        assert all([(start_date <= bookmark["created_at"] < end_date) for bookmark in bookmarks])
+
+
+@pytest.mark.asyncio
+async def test_timerange_stream(aiohttp_client):
+    # Arrange
+    url = settings.get_base_api_url() + "bookmarks/timerange/2021-01-01T10:00:00/2021-01-02T13:00:00/stream"
+    headers = {"Authorization": f"Bearer {settings.user_token}"}
+
+    # Act
+    async with aiohttp_client.get(url, headers=headers) as response:
+        status = response.status
+        content_type = response.headers.get("Content-Type")
+        bookmarks = [json.loads(line) async for line in response.content if line.strip()]
+
+    # Assert
+    assert status == OK
+    assert content_type == "application/x-ndjson"
+    assert len(bookmarks) == 3
+    assert [bookmark["created_at"] for bookmark in bookmarks] == sorted(bookmark["created_at"] for bookmark in bookmarks)
@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+from http.client import OK
+
+
+# Пользователь из USER_ACCESS_TOKEN
+TOKEN_USER_ID = "02a15566-6bcf-4a0d-9570-d04317da1e6b"
+FOREIGN_BOOKMARK_ID = "f9a63c7e-d0bf-47b2-b821-3d2a74185a2d"
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_update_delete(send):
+    # Arrange
+    ids = [str(uuid.uuid4()) for _ in range(2)]
+    missing_id = str(uuid.uuid4())
+    bookmarks = [
+        {"id": id_, "user_id": TOKEN_USER_ID, "content_id": str(uuid.uuid4()), "created_at": "2021-01-05T10:00:00"}
+        for id_ in ids
+    ]
+
+    # Act
+    upsert_status, upserted = await send("PUT", "bookmarks/bulk/upsert", bookmarks)
+    update_status, updated = await send("PUT", "bookmarks/bulk/update", [
+        {"id": ids[0], "created_at": "2021-01-06T10:00:00"},
+        {"id": missing_id, "created_at": "2021-01-06T10:00:00"},
+        {"id": FOREIGN_BOOKMARK_ID, "created_at": "2021-01-06T10:00:00"},
+    ])
+    delete_status, deleted = await send("DELETE", "bookmarks/bulk/remove", ids + [missing_id])
+
+    # Assert
+    assert upsert_status == OK
+    assert [item["status"] for item in upserted] == ["inserted", "inserted"]
+    assert update_status == OK
+    assert [item["status"] for item in updated] == ["updated", "not_found", "forbidden"]
+    assert delete_status == OK
+    assert [item["status"] for item in deleted] == ["deleted", "deleted", "not_found"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_duplicate(send):
+    # Arrange
+    content_id = str(uuid.uuid4())
+    likes = [
+        {"id": str(uuid.uuid4()), "user_id": TOKEN_USER_ID, "content_id": content_id,
+         "created_at": "2021-01-05T10:00:00", "rate": rate}
+        for rate in (3, 7)
+    ]
+
+    # Act
+    status, results = await send("PUT", "likes/bulk/upsert", likes)
+    await send("DELETE", "likes/bulk/remove", [like["id"] for like in likes])
+
+    # Assert
+    assert status == OK
+    assert sorted(item["status"] for item in results) == ["duplicate", "inserted"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_foreign_id(send):
+    # Arrange
+    bookmark = {"user_id": TOKEN_USER_ID, "content_id": str(uuid.uuid4()), "created_at": "2021-01-05T10:00:00"}
+
+    # Act
+    status, results = await send("PUT", "bookmarks/bulk/upsert", [{**bookmark, "id": FOREIGN_BOOKMARK_ID}])
+
+    # Assert
+    assert status == OK
+    assert [item["status"] for item in results] == ["forbidden"]
@@ -1,5 +1,7 @@
+import uuid
+
 import pytest
-from http.client import OK
+from http.client import OK, BAD_REQUEST, NOT_FOUND
 
 
 @pytest.mark.asyncio
@@ -21,3 +23,96 @@ async def test_fulltext_search(search_term, expected_status, expected_match_num,
     assert status == expected_status
     if expected_status == OK:
         assert len(comments) == expected_match_num
+
+
+# Пользователь из USER_ACCESS_TOKEN
+TOKEN_USER_ID = "02a15566-6bcf-4a0d-9570-d04317da1e6b"
+
+
+@pytest.mark.asyncio
+async def test_comment_thread(send, fetch):
+    # Arrange
+    content_id = str(uuid.uuid4())
+    root, reply, nested = (str(uuid.uuid4()) for _ in range(3))
+    comment = {"user_id": TOKEN_USER_ID, "content_id": content_id, "text": "thread"}
+    await send("PUT", "comments/bulk/upsert", [{**comment, "id": root, "created_at": "2021-01-05T10:00:00"}])
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": reply, "parent_id": root, "created_at": "2021-01-05T10:01:00"}])
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": nested, "parent_id": reply, "created_at": "2021-01-05T10:02:00"}])
+
+    # Act
+    status, thread = await fetch(f"comments/thread/{root}")
+    _, shallow_thread = await fetch(f"comments/thread/{root}?max_depth=1")
+    # Корень нельзя сделать ответом на собственный ответ
+    cycle_status, _ = await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": root, "parent_id": nested, "created_at": "2021-01-05T10:00:00"}])
+    # Существующий ответ не переносится под другого родителя
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": nested, "parent_id": root, "created_at": "2021-01-05T10:02:00"}])
+    _, unchanged_thread = await fetch(f"comments/thread/{root}")
+    await send("DELETE", "comments/bulk/remove", [root, reply, nested])
+
+    # Assert
+    assert status == OK
+    assert [item["_id"] for item in thread] == [root, reply, nested]
+    assert thread[2]["ancestors"] == [root, reply]
+    assert [item["_id"] for item in shallow_thread] == [root, reply]
+    assert cycle_status == BAD_REQUEST
+    assert [item["_id"] for item in unchanged_thread] == [root, reply, nested]
+    assert unchanged_thread[2]["ancestors"] == [root, reply]
+
+
+@pytest.mark.asyncio
+async def test_comment_cannot_move_to_other_content(send, fetch):
+    # Arrange
+    content_id, other_content_id = str(uuid.uuid4()), str(uuid.uuid4())
+    root, reply = str(uuid.uuid4()), str(uuid.uuid4())
+    comment = {"user_id": TOKEN_USER_ID, "content_id": content_id, "text": "thread"}
+    await send("PUT", "comments/bulk/upsert", [{**comment, "id": root, "created_at": "2021-01-06T10:00:00"}])
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": reply, "parent_id": root, "created_at": "2021-01-06T10:01:00"}])
+
+    # Act
+    bulk_update_status, _ = await send("PUT", "comments/bulk/update", [
+        {"id": root, "content_id": other_content_id}])
+    upsert_status, _ = await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": reply, "content_id": other_content_id, "created_at": "2021-01-06T10:01:00"}])
+    # Прежний content_id можно передавать вместе с остальными полями
+    _, same_results = await send("PUT", "comments/bulk/update", [
+        {"id": reply, "content_id": content_id, "text": "edited"}])
+    _, thread = await fetch(f"comments/thread/{root}")
+    await send("DELETE", "comments/bulk/remove", [root, reply])
+
+    # Assert
+    assert bulk_update_status == BAD_REQUEST
+    assert upsert_status == BAD_REQUEST
+    assert [item["status"] for item in same_results] == ["updated"]
+    assert [(item["_id"], item["content_id"]) for item in thread] == [(root, content_id), (reply, content_id)]
+    assert thread[1]["text"] == "edited"
+
+
+@pytest.mark.asyncio
+async def test_comment_with_replies_is_not_deleted_alone(send, fetch):
+    # Arrange
+    content_id = str(uuid.uuid4())
+    root, reply, nested = (str(uuid.uuid4()) for _ in range(3))
+    comment = {"user_id": TOKEN_USER_ID, "content_id": content_id, "text": "thread"}
+    await send("PUT", "comments/bulk/upsert", [{**comment, "id": root, "created_at": "2021-01-07T10:00:00"}])
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": reply, "parent_id": root, "created_at": "2021-01-07T10:01:00"}])
+    await send("PUT", "comments/bulk/upsert", [
+        {**comment, "id": nested, "parent_id": reply, "created_at": "2021-01-07T10:02:00"}])
+
+    # Act
+    _, bulk_results = await send("DELETE", "comments/bulk/remove", [root, nested])
+    _, thread = await fetch(f"comments/thread/{root}")
+    # Поддерево целиком удаляется одним запросом
+    _, subtree_results = await send("DELETE", "comments/bulk/remove", [reply, root])
+    root_status, _ = await fetch(f"comments/thread/{root}")
+
+    # Assert
+    assert [item["status"] for item in bulk_results] == ["conflict", "deleted"]
+    assert [item["_id"] for item in thread] == [root, reply]
+    assert [item["status"] for item in subtree_results] == ["deleted", "deleted"]
+    assert root_status == NOT_FOUND
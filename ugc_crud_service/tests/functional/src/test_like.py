@@ -61,3 +61,42 @@ async def test_like_avg_rate(content_id, expected_status, expected_avg_rate, fet
     assert status == expected_status
     if expected_status == OK:
         assert avg_rate == expected_avg_rate
+
+
+@pytest.mark.asyncio
+async def test_user_likes_pagination(fetch_page):
+    # Arrange
+    user_id = "476bff82-92d5-4c21-99ef-67cbbdd5fd5e"
+
+    # Act
+    first_status, first_page, cursor = await fetch_page(f"likes/user/{user_id}", {"page_size": 2})
+    second_status, second_page, last_cursor = await fetch_page(
+        f"likes/user/{user_id}", {"page_size": 2, "cursor": cursor}
+    )
+
+    # Assert
+    assert first_status == OK and second_status == OK
+    assert len(first_page) == 2 and len(second_page) == 1
+    assert last_cursor is None
+    created = [like["created_at"] for like in first_page + second_page]
+    assert created == sorted(created, reverse=True)
+    assert len({like["_id"] for like in first_page + second_page}) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content_id, expected_status, expected_count, expected_histogram",
+    [
+        ("c9d4c530-7657-4ca3-bc8d-0b888e65000b", 200, 2, {"5": 1, "10": 1}),
+        ("a7f12e4b-5c8d-40e9-821e-9d2b3478f1a4", 404, None, None),
+    ]
+)
+async def test_content_rating(content_id, expected_status, expected_count, expected_histogram, fetch):
+    # Act
+    status, rating = await fetch(f"likes/rating/{content_id}")
+
+    # Assert
+    assert status == expected_status
+    if expected_status == OK:
+        assert rating["rate_count"] == expected_count
+        assert {rate: num for rate, num in rating["histogram"].items() if num} == expected_histogram
@@ -0,0 +1,30 @@
+import uuid
+
+import pytest
+from http.client import OK
+
+
+# Пользователь из USER_ACCESS_TOKEN
+TOKEN_USER_ID = "02a15566-6bcf-4a0d-9570-d04317da1e6b"
+
+
+@pytest.mark.asyncio
+async def test_user_summary(send, fetch):
+    # Arrange
+    ids = [str(uuid.uuid4()) for _ in range(2)]
+    bookmarks = [
+        {"id": id_, "user_id": TOKEN_USER_ID, "content_id": str(uuid.uuid4()), "created_at": f"2030-01-0{day}T10:00:00"}
+        for day, id_ in enumerate(ids, start=1)
+    ]
+    await send("PUT", "bookmarks/bulk/upsert", bookmarks)
+
+    # Act
+    status, summary = await fetch(f"users/{TOKEN_USER_ID}/summary")
+    await send("DELETE", "bookmarks/bulk/remove", ids)
+    _, summary_after_delete = await fetch(f"users/{TOKEN_USER_ID}/summary")
+
+    # Assert
+    assert status == OK
+    assert [item["id"] for item in summary["bookmarks"]["recent"][:2]] == [ids[1], ids[0]]
+    assert summary_after_delete["bookmarks"]["count"] == summary["bookmarks"]["count"] - 2
+    assert not set(ids) & {item["id"] for item in summary_after_delete["bookmarks"]["recent"]}
@@ -0,0 +1,99 @@
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from beanie import init_beanie
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError
+
+from core.config import settings
+from models import entity
+
+
+# Объём каждой коллекции: на маленьких данных планировщик не отличит хороший индекс от плохого
+SEED_SIZE = int(os.getenv("UGC_CRUD_EXPLAIN_SEED_SIZE", 100_000))
+USERS = max(SEED_SIZE // 100, 1)
+CONTENTS = max(SEED_SIZE // 20, 1)
+BATCH_SIZE = 10_000
+DATABASE_NAME = f"{settings.mongo_db_name}_query_plans"
+DOCUMENT_MODELS = [entity.Like, entity.Bookmark, entity.Comment, entity.ContentRating, entity.UserSummary]
+WORDS = ["отличный", "скучный", "сюжет", "актёры", "финал", "фильм", "music", "plot", "ending", "actors"]
+# Служебные поля команды, которые не принимает explain
+COMMAND_META_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber"}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Запоминает find, aggregate и count, которые сервис отправляет в MongoDB"""
+
+    def __init__(self):
+        self.commands: list[dict] = []
+
+    def started(self, event):
+        if event.command_name in ("find", "aggregate", "count") and event.database_name == DATABASE_NAME:
+            self.commands.append({
+                key: value for key, value in event.command.items() if key not in COMMAND_META_FIELDS
+            })
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _documents(extra):
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    pairs = set()
+    while len(pairs) < SEED_SIZE:
+        pairs.add((random.randrange(USERS), random.randrange(CONTENTS)))
+    for user, content in pairs:
+        yield {
+            "_id": Binary.from_uuid(uuid.uuid4()),
+            "user_id": Binary.from_uuid(uuid.UUID(int=user)),
+            "content_id": Binary.from_uuid(uuid.UUID(int=content)),
+            "created_at": start + timedelta(seconds=random.randrange(365 * 24 * 3600)),
+            **extra(),
+        }
+
+
+async def _seed(model, extra):
+    collection = model.get_motor_collection()
+    if await collection.estimated_document_count() >= SEED_SIZE:
+        return
+    batch = []
+    for document in _documents(extra):
+        batch.append(document)
+        if len(batch) == BATCH_SIZE:
+            await _insert(collection, batch)
+            batch = []
+    if batch:
+        await _insert(collection, batch)
+
+
+async def _insert(collection, batch):
+    try:
+        await collection.insert_many(batch, ordered=False)
+    except BulkWriteError:
+        pass
+
+
+@pytest.fixture(scope="session")
+def recorder():
+    return CommandRecorder()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def database(recorder):
+    client = AsyncIOMotorClient(settings.get_mongodb_connection_string(), event_listeners=[recorder])
+    database = client[DATABASE_NAME]
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+    await _seed(entity.Like, lambda: {"rate": random.randint(0, 10)})
+    await _seed(entity.Bookmark, lambda: {})
+    await _seed(entity.Comment, lambda: {"text": " ".join(random.choices(WORDS, k=8))})
+    yield database
+    client.close()
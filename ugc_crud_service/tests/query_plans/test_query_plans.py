@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+
+from models.entity import Like, Bookmark, Comment
+from services.cursor import encode_cursor
+from services.mongo.like import MongoLikeService
+from services.mongo.bookmark import MongoBookmarkService
+from services.mongo.comment import MongoCommentService
+from services.mongo.summary import MongoUserSummaryService
+
+# Размер страницы отличается от стандартного, чтобы запросы шли в MongoDB мимо кэша первых страниц
+PAGE_SIZE = 20
+
+
+async def consume(stream):
+    async for _ in stream:
+        pass
+
+
+# Запросы MongoReadMixin и вспомогательные чтения записи, которые должны идти по индексу
+READ_QUERIES = {
+    "get_by_ids": lambda service, sample: service.get_by_ids([sample.id]),
+    "get_by_user": lambda service, sample: service.get_by_user(sample.user_id, PAGE_SIZE),
+    "get_by_user_next_page": lambda service, sample: service.get_by_user(
+        sample.user_id, PAGE_SIZE, encode_cursor(sample.created_at, sample.id)),
+    "get_by_content_id": lambda service, sample: service.get_by_content_id(sample.content_id, PAGE_SIZE),
+    "get_by_content_id_next_page": lambda service, sample: service.get_by_content_id(
+        sample.content_id, PAGE_SIZE, encode_cursor(sample.created_at, sample.id)),
+    "get_by_timerange": lambda service, sample: service.get_by_timerange(
+        sample.created_at, sample.created_at + timedelta(hours=1), PAGE_SIZE),
+    "get_by_timerange_next_page": lambda service, sample: service.get_by_timerange(
+        sample.created_at, sample.created_at + timedelta(hours=1), PAGE_SIZE,
+        encode_cursor(sample.created_at, sample.id)),
+    "stream_by_timerange": lambda service, sample: consume(service.stream_by_timerange(
+        sample.created_at, sample.created_at + timedelta(hours=1))),
+    "find_fields_by_owner": lambda service, sample: service._get_owned_content([sample.id], user_id=sample.user_id),
+    "summary_recent": lambda service, sample: service.summary.refresh([sample.user_id]),
+}
+
+SERVICES = {Like: MongoLikeService, Bookmark: MongoBookmarkService, Comment: MongoCommentService}
+
+
+def find_collection_scans(plan) -> list[dict]:
+    """Все стадии COLLSCAN в выигравших планах ответа explain, включая планы шардов"""
+    scans = []
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            scans.append(plan)
+        for key, value in plan.items():
+            if key != "rejectedPlans":
+                scans.extend(find_collection_scans(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            scans.extend(find_collection_scans(item))
+    return scans
+
+
+async def assert_index_only_access(database, recorder, run):
+    recorder.commands.clear()
+    await run()
+    assert recorder.commands, "Запрос не дошёл до MongoDB"
+    for command in recorder.commands:
+        explain = await database.command({"explain": command, "verbosity": "queryPlanner"})
+        scans = find_collection_scans(explain)
+        assert not scans, f"COLLSCAN в плане {command}: {scans}"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("model", SERVICES, ids=lambda model: model.__name__)
+@pytest.mark.parametrize("query", READ_QUERIES.values(), ids=READ_QUERIES.keys())
+async def test_read_queries_use_indexes(model, query, database, recorder):
+    service = SERVICES[model]()
+    sample = await model.find_one({})
+
+    await assert_index_only_access(database, recorder, lambda: query(service, sample))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("content_filter", [False, True], ids=["all", "by_content"])
+async def test_comment_search_uses_text_index(content_filter, database, recorder):
+    service = MongoCommentService()
+    sample = await Comment.find_one({})
+    content_id = sample.content_id if content_filter else None
+
+    await assert_index_only_access(
+        database, recorder, lambda: service.search_by_text("сюжет", PAGE_SIZE, content_id=content_id)
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_user_summary_read_uses_id(database, recorder):
+    sample = await Like.find_one({})
+
+    await assert_index_only_access(database, recorder, lambda: MongoUserSummaryService().get(sample.user_id))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_comment_threads_use_indexes(database, recorder):
+    service = MongoCommentService()
+    sample = await Comment.find_one({})
+
+    await assert_index_only_access(database, recorder, lambda: service.get_thread(sample.id, 8, 100))
+    await assert_index_only_access(
+        database, recorder, lambda: service.get_content_threads(sample.content_id, PAGE_SIZE, replies=3)
+    )
+    await assert_index_only_access(database, recorder, lambda: service._blocked_deletes([sample.id]))
@@ -1,7 +1,8 @@
 import logging
+import uuid
 from http import HTTPStatus
 
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
 from flasgger import Swagger
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -9,6 +10,11 @@ import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from core.config import settings
+from core.logger import (
+    bind_request_context,
+    reset_request_context,
+    update_request_context,
+)
 from db.kafka import send_to_broker
 from schemas.entity import EventSchema, ma
 from utils.auth_middleware import internal_auth_required
@@ -92,6 +98,33 @@ limiter = Limiter(
 event_schema = EventSchema()
 
 
+@app.before_request
+def bind_log_context():
+    g.request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
+    g.log_context_token = bind_request_context(
+        request_id=g.request_id,
+        host=request.host,
+        method=request.method,
+        path=request.path,
+        query_params=request.query_string.decode("utf-8", "replace"),
+        **{"user-agent": request.user_agent.string},
+    )
+
+
+@app.after_request
+def add_request_id(response):
+    update_request_context(status_code=response.status_code)
+    response.headers["X-Request-ID"] = g.request_id
+    return response
+
+
+@app.teardown_request
+def reset_log_context(exc):
+    token = g.pop("log_context_token", None)
+    if token is not None:
+        reset_request_context(token)
+
+
 @app.route("/api/v1/event", methods=["POST"])
 @internal_auth_required
 @limiter.limit("10 per second")
@@ -149,13 +182,17 @@ def handle_event():
 
         errors = event_schema.validate(raw_data)
         if errors:
-            logging.error(f"Validation errors: {errors}")
+            logging.error("Validation errors: %s", errors)
             return jsonify(
                 {"message": "Validation failed"}
             ), HTTPStatus.UNPROCESSABLE_ENTITY
 
         event_data = event_schema.load(raw_data)
-        logging.info(f"Received valid event: {event_data}")
+        logging.info(
+            "Received valid event: %s",
+            event_data,
+            extra={"sampled": True},
+        )
 
         send_to_broker(
             topic=settings.kafka_topic_name,
@@ -167,7 +204,7 @@ def handle_event():
         ), HTTPStatus.OK
 
     except Exception as e:
-        logging.error(f"Error processing event: {str(e)}")
+        logging.error("Error processing event: %s", e)
         return jsonify(
             {"message": "Internal server error"}
         ), HTTPStatus.INTERNAL_SERVER_ERROR
@@ -1,6 +1,6 @@
 import os
 from logging import config as logging_config
-from core.logger import LOGGING
+from core.logger import LOGGING, setup_queue_logging
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,7 +15,21 @@ class Settings(BaseSettings):
 
     # Безопасность
     # Секретный ключ (должен быть одинаковый для frontend и backend)
-    ugc_api_secret_key: str = Field(..., alias="UGC_API_SECRET_KEY")
+    # Пустое значение отключает проверку по общему секрету
+    ugc_api_secret_key: str = Field("", alias="UGC_API_SECRET_KEY")
+    ugc_legacy_service_id: str = Field(
+        "internal", alias="UGC_LEGACY_SERVICE_ID"
+    )
+
+    # HMAC-ключи вызывающих сервисов: {"<service_id>:<key_id>": "<secret>"}
+    # Несколько key_id у одного сервиса позволяют ротировать ключи
+    ugc_service_keys: dict[str, str] = Field(
+        default_factory=dict, alias="UGC_SERVICE_KEYS"
+    )
+    # Время жизни токена, сек.
+    ugc_auth_token_ttl: int = Field(300, alias="UGC_AUTH_TOKEN_TTL")
+    # Размер LRU-кэша проверенных подписей
+    ugc_auth_cache_size: int = Field(1024, alias="UGC_AUTH_CACHE_SIZE")
 
     # Настройки Kafka
     kafka_bootstrap_servers: str = Field(..., alias="KAFKA_BOOTSTRAP_SERVER")
@@ -27,8 +41,16 @@ class Settings(BaseSettings):
     # Настройки Sentry
     sentry_dsn_ugc: str = Field(..., alias="SENTRY_DSN_UGC")
 
+    # Доля успешных запросов, попадающих в лог
+    log_success_sample_rate: float = Field(
+        0.1, alias="UGC_LOG_SUCCESS_SAMPLE_RATE", ge=0, le=1
+    )
+
 
 # Корень проекта
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 settings = Settings()
+
+# Запись логов выполняется в отдельном потоке
+setup_queue_logging(settings.log_success_sample_rate)
@@ -1,8 +1,29 @@
+import atexit
+import contextvars
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
 LOG_FORMAT = '{"request_id": "%(request_id)s", "asctime": \
              "%(asctime)s", "levelname": "%(levelname)s", \
              "name": "%(name)s", "message": "%(message)s", \
              "host": "%(host)s", "user-agent": "%(user-agent)s", "method": "%(method)s", "path": "%(path)s", \
-             "query_params": "%(query_params)s", "status_code": "%(status_code)s"}'
+             "query_params": "%(query_params)s", "status_code": "%(status_code)s", \
+             "service_id": "%(service_id)s"}'
+# Поля контекста запроса, которые ожидает LOG_FORMAT
+REQUEST_CONTEXT_FIELDS = (
+    "request_id",
+    "host",
+    "user-agent",
+    "method",
+    "path",
+    "query_params",
+    "status_code",
+    "service_id",
+)
+EMPTY_CONTEXT_VALUE = "-"
+
 LOG_DEFAULT_HANDLERS = [
     "console",
 ]
@@ -61,3 +82,90 @@ LOGGING = {
         "handlers": LOG_DEFAULT_HANDLERS,
     },
 }
+
+
+# Контекст текущего запроса (у каждого greenlet/потока свой)
+request_context: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+def bind_request_context(**fields) -> contextvars.Token:
+    """Устанавливает контекст запроса для логов"""
+    return request_context.set(fields)
+
+
+def update_request_context(**fields) -> None:
+    """Дополняет контекст текущего запроса (например, status_code)"""
+    context = request_context.get() or {}
+    request_context.set({**context, **fields})
+
+
+def reset_request_context(token: contextvars.Token) -> None:
+    request_context.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Добавляет в запись поля контекста запроса.
+    Отсутствующие поля заполняются заглушкой, чтобы LOG_FORMAT
+    не падал на записях вне запроса (старт gunicorn, фоновые задачи).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get() or {}
+        for field in REQUEST_CONTEXT_FIELDS:
+            if field not in record.__dict__:
+                setattr(
+                    record, field, context.get(field, EMPTY_CONTEXT_VALUE)
+                )
+        return True
+
+
+class SuccessSamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей, помеченных extra={"sampled": True}.
+    Остальные записи (ошибки, предупреждения) проходят всегда.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler без предварительного форматирования: сообщение
+    собирается из msg % args уже в потоке QueueListener.
+    Очередь внутрипроцессная, поэтому запись не нужно сериализовать.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_queue_logging(success_sample_rate: float = 1.0) -> QueueListener:
+    """
+    Переносит обработчики root-логгера за очередь.
+    Контекст запроса и сэмплирование применяются в вызывающем потоке,
+    форматирование и запись в поток вывода — в QueueListener.
+    """
+    root = logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SuccessSamplingFilter(success_sample_rate))
+
+    listener = QueueListener(
+        log_queue, *root.handlers, respect_handler_level=True
+    )
+    root.handlers = [queue_handler]
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
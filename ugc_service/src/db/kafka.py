@@ -28,5 +28,5 @@ def send_to_broker(
         )
         producer.flush()
     except KafkaError as e:
-        logging.error(f"Failed to send message to Kafka: {str(e)}")
+        logging.error("Failed to send message to Kafka: %s", e)
         raise
@@ -1,9 +1,77 @@
+import hashlib
+import hmac
+import re
+import time
 from http import HTTPStatus
-from functools import wraps
+from functools import lru_cache, wraps
 
-from flask import request, jsonify
+from flask import g, request, jsonify
 
 from core.config import settings
+from core.logger import update_request_context
+
+# Формат токена: <service_id>.<key_id>.<issued_at>.<signature>
+TOKEN_PARTS_NUMBER = 4
+# Только ASCII-цифры: str.isdigit() пропускает, например, "²"
+ISSUED_AT_PATTERN = re.compile(r"[0-9]+")
+
+
+class InvalidServiceToken(Exception):
+    pass
+
+
+def sign_service_token(
+    service_id: str, key_id: str, secret: str, issued_at: int | None = None
+) -> str:
+    """Выпускает токен для вызывающего сервиса"""
+    if issued_at is None:
+        issued_at = int(time.time())
+    payload = f"{service_id}.{key_id}.{issued_at}"
+    signature = hmac.new(
+        secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return f"{payload}.{signature}"
+
+
+@lru_cache(maxsize=settings.ugc_auth_cache_size)
+def _verify_signature(token: str) -> tuple[str, int]:
+    """
+    Проверяет подпись токена и возвращает (service_id, issued_at).
+    Кэшируются только успешные проверки: исключения lru_cache не сохраняет.
+    """
+    parts = token.split(".")
+    if len(parts) != TOKEN_PARTS_NUMBER:
+        raise InvalidServiceToken("Malformed token")
+    service_id, key_id, issued_at, signature = parts
+
+    secret = settings.ugc_service_keys.get(f"{service_id}:{key_id}")
+    if secret is None:
+        raise InvalidServiceToken("Unknown service key")
+    if not ISSUED_AT_PATTERN.fullmatch(issued_at):
+        raise InvalidServiceToken("Malformed token")
+
+    expected = sign_service_token(service_id, key_id, secret, int(issued_at))
+    # Сравнение байтов: для str с не-ASCII символами compare_digest
+    # выбрасывает TypeError
+    if not hmac.compare_digest(
+        expected.encode("utf-8"), token.encode("utf-8")
+    ):
+        raise InvalidServiceToken("Invalid signature")
+    return service_id, int(issued_at)
+
+
+def verify_service_token(token: str) -> str:
+    """Возвращает идентификатор сервиса, выпустившего токен"""
+    if settings.ugc_api_secret_key and hmac.compare_digest(
+        token.encode("utf-8"), settings.ugc_api_secret_key.encode("utf-8")
+    ):
+        # Общий статический секрет (до перехода всех сервисов на HMAC)
+        return settings.ugc_legacy_service_id
+
+    service_id, issued_at = _verify_signature(token)
+    if abs(time.time() - issued_at) > settings.ugc_auth_token_ttl:
+        raise InvalidServiceToken("Token expired")
+    return service_id
 
 
 def internal_auth_required(func):
@@ -17,12 +85,14 @@ def internal_auth_required(func):
                 {"message": "Authentication required"}
             ), HTTPStatus.UNAUTHORIZED
 
-        # TODO: Нужно ли шифровать?
-        if not auth_header == settings.ugc_api_secret_key:
+        try:
+            g.service_id = verify_service_token(auth_header)
+        except InvalidServiceToken:
             return jsonify(
                 {"message": "Invalid authentication"}
             ), HTTPStatus.FORBIDDEN
 
+        update_request_context(service_id=g.service_id)
         return func(*args, **kwargs)
 
     return decorated_function
@@ -0,0 +1,25 @@
+import os
+
+# Настройки читаются при импорте core.config, поэтому задаются до него
+os.environ.setdefault("KAFKA_BOOTSTRAP_SERVER", "localhost:9092")
+os.environ.setdefault("SENTRY_DSN_UGC", "")
+os.environ.setdefault("UGC_API_SECRET_KEY", "")
+os.environ.setdefault("UGC_SERVICE_KEYS", '{"theatre:k1": "secret"}')
+
+import pytest  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from utils.auth_middleware import internal_auth_required  # noqa: E402
+
+
+@pytest.fixture(name="client")
+def client():
+    """Приложение с одним защищённым обработчиком"""
+    app = Flask(__name__)
+
+    @app.route("/protected")
+    @internal_auth_required
+    def protected():
+        return {"message": "ok"}
+
+    return app.test_client()
@@ -0,0 +1,72 @@
+"""тесты проверки HMAC-токенов вызывающих сервисов"""
+
+import time
+from http import HTTPStatus
+
+import pytest
+
+from core.config import settings
+from utils.auth_middleware import sign_service_token
+
+
+def flip_last_char(token: str) -> str:
+    return token[:-1] + ("1" if token[-1] == "0" else "0")
+
+
+def make_token(**kwargs) -> str:
+    params = {"service_id": "theatre", "key_id": "k1", "secret": "secret"}
+    params.update(kwargs)
+    return sign_service_token(**params)
+
+
+def test_valid_token(client):
+    response = client.get(
+        "/protected", headers={"X-Internal-Auth": make_token()}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_missing_token(client):
+    response = client.get("/protected")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "garbage",
+        "theatre.k1.123",
+        "theatre.unknown.123.abc",
+        # не-ASCII цифра проходит str.isdigit(), но не int()
+        "theatre.k1.².abc",
+        "theatre.k1.123.signé",
+    ],
+    ids=["no parts", "no signature", "unknown key", "unicode digit", "unicode signature"],
+)
+def test_malformed_token(client, token):
+    # Заголовки передаются в latin-1, не-ASCII символы доходят как есть
+    response = client.get("/protected", headers={"X-Internal-Auth": token})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_expired_token(client):
+    issued_at = int(time.time()) - settings.ugc_auth_token_ttl - 10
+    response = client.get(
+        "/protected",
+        headers={"X-Internal-Auth": make_token(issued_at=issued_at)},
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        make_token(secret="other"),
+        make_token().replace("theatre", "admin", 1),
+        flip_last_char(make_token()),
+    ],
+    ids=["wrong secret", "service swapped", "signature changed"],
+)
+def test_tampered_token(client, token):
+    response = client.get("/protected", headers={"X-Internal-Auth": token})
+    assert response.status_code == HTTPStatus.FORBIDDEN